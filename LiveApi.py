@@ -1,242 +1,421 @@
 import asyncio
+import dataclasses
+import functools
 import sys
-import traceback
 import os  # Import the os module
 import time
 
-import pyaudio
-
 from google import genai
 # from google.generativeai import types # Import types for ModalityTokenCount
 
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
-SEND_SAMPLE_RATE = 16000
-RECEIVE_SAMPLE_RATE = 24000
-CHUNK_SIZE = 256
-
-pya = pyaudio.PyAudio()
-
-# GEMINI_API_KEY must be set as env variable
-print(f"GEMINI_API_KEY loaded: {bool(os.environ.get('GEMINI_API_KEY'))}")
-
-client = genai.Client(http_options={"api_version": "v1alpha"})  # GEMINI_API_KEY must be set as env variable
-
-# Load system instruction from file
-with open("system_instruction.txt", "r") as f:
-    system_instruction = f.read()
-
-MODEL = "gemini-2.5-flash-native-audio-preview-12-2025"
-CONFIG = {
-    "system_instruction": system_instruction,
-    "response_modalities": ["AUDIO"],
-    "realtime_input_config": {
-        "automatic_activity_detection": {
-            "disabled": False, # default
-            "start_of_speech_sensitivity": "START_SENSITIVITY_HIGH",
-            "end_of_speech_sensitivity": "END_SENSITIVITY_HIGH",
-            "prefix_padding_ms": 20,
-            "silence_duration_ms": 10 }},
-    "speech_config": {
-        "voice_config": {"prebuilt_voice_config": {"voice_name": "erinome"}}},
-    "enable_affective_dialog": False,
-    "proactivity": {'proactive_audio': True},
-    "output_audio_transcription": {},
-    "input_audio_transcription": {},
-}
+from audio_io import MicrophoneSource, SpeakerSink, open_sink, open_source
+from echo import BargeInGate, EchoCanceller, PlaybackReference
+from event_log import EventLog
+from live_events import (
+    AudioEvent,
+    GenerationCompleteEvent,
+    GoAwayEvent,
+    InputTranscriptionEvent,
+    InterruptedEvent,
+    LiveEventDispatcher,
+    OutputTranscriptionEvent,
+    TextEvent,
+    TurnCompleteEvent,
+    UsageEvent,
+)
+from recorder import SessionRecorder
+from resilient_session import ResilientSession, resilient_connect
+from vad import ACTIVITY_END, ACTIVITY_START, ActivityGate
+from live_config import (
+    API_VERSION,
+    CLIENT_ACTIVITY_CONFIG,
+    CONFIG,
+    INPUT_DEVICE_INDEX,
+    MODEL,
+    OUTPUT_DEVICE_INDEX,
+)
+
+# How long to wait for the last reply once a file or stdin source runs out.
+END_OF_INPUT_REPLY_TIMEOUT_S = 15.0
+OUT_QUEUE_SIZE = 5
 
 
 class AudioLoop:
-    def __init__(self):
+    def __init__(
+        self,
+        client=None,
+        model=MODEL,
+        config=None,
+        source=None,
+        sink=None,
+        event_log=None,
+        session_id=None,
+        client_vad=None,
+        barge_in_gate=True,
+        echo_cancel=False,
+        recorder=None,
+        resilient=True,
+        connect=None,
+        lossless=None,
+    ):
+        # One client is shared by every call a CallServer hosts; a standalone
+        # loop creates its own (GEMINI_API_KEY must be set as env variable).
+        self.client = client
+        # client.aio.live.connect, or SessionPool.connect to start from a warm session.
+        self.connect = connect
+        self.model = model
+        self.session_id = session_id
         self.audio_in_queue = None
         self.out_queue = None
         self.session = None
-        self.audio_stream = None
-        self.output_audio_stream = None
-        self.receive_audio_task = None
-        self.play_audio_task = None
-        self.initial_message_sent_time = None
+        # Any audio_io-style source/sink (headless files and pipes, or
+        # g711.G711Source/G711Sink for a telephony leg) can replace the local
+        # microphone and speaker. PyAudio is only opened if one is needed.
+        self.source = source
+        self.sink = sink
+        # A full uplink queue drops chunks from a live source, which cannot
+        # wait, and holds back one that is not paced in real time (files read
+        # as fast as possible), which would otherwise lose most of its audio.
+        self.lossless = lossless if lossless is not None else not getattr(source, "realtime", True)
+        self.pya = None
+        self.turn_done = asyncio.Event()
+        self.audio_source = None
+        self.speaker = None
         self.total_session_prompt_tokens = 0
         self.total_session_response_tokens = 0
         self.session_start_time = None
-        self._server_content_printed = False # Initialize the flag
+        self.session_end_time = None
+        self.connect_latency_ms = None
+        self.connect_timings = None
+        self.chunks_sent = 0
+        self.chunks_received = 0
+        self.dropped_chunks = 0
+        self.max_out_queue_depth = 0
+        self.error = None
+        # Rotate to a resumed connection on go_away or a dropped WebSocket
+        # instead of ending the call; the counters above span every connection.
+        self.resilient = resilient
+        self.event_log = event_log
+        self.dispatcher = self._make_dispatcher()
+        # Uplink/downlink WAVs and a timeline of server events for QA and replay.
+        self.recorder = recorder
+        if recorder:
+            recorder.attach(self.dispatcher)
+        # Client-side VAD sends activity_start/activity_end itself and leaves
+        # silence off the uplink; the server's automatic detection is disabled.
+        if client_vad is None:
+            client_vad = os.environ.get("LIVE_ACTIVITY_DETECTION", "server") == "client"
+        self.activity_gate = ActivityGate() if client_vad else None
+        self.config = config or (CLIENT_ACTIVITY_CONFIG if client_vad else CONFIG)
+        # Both uplink echo stages use what the speaker actually played: the
+        # canceller subtracts its echo from the mic, then the gate only forwards
+        # mic audio louder than the remaining echo while the model is talking.
+        self.playback_reference = PlaybackReference() if barge_in_gate or echo_cancel else None
+        self.echo_canceller = EchoCanceller(self.playback_reference) if echo_cancel else None
+        self.barge_in_gate = BargeInGate(self.playback_reference) if barge_in_gate else None
+        if sink is not None and getattr(sink, "reference", False) is None:
+            sink.reference = self.playback_reference
+
+    def _log(self, event, level="info", **fields):
+        if self.event_log:
+            self.event_log.log(event, level, **fields)
+
+    def _pyaudio(self):
+        if self.pya is None:
+            import pyaudio
+
+            self.pya = pyaudio.PyAudio()
+        return self.pya
 
     async def listen_audio(self):
-        mic_info = pya.get_default_input_device_info()
-        self.audio_stream = await asyncio.to_thread(
-            pya.open,
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=SEND_SAMPLE_RATE,
-            input=True,
-            input_device_index=mic_info["index"],
-            frames_per_buffer=CHUNK_SIZE,
-        )
-        if __debug__:
-            kwargs = {"exception_on_overflow": False}
-        else:
-            kwargs = {}
+        self.audio_source = self.source or MicrophoneSource(self._pyaudio(), device_index=INPUT_DEVICE_INDEX)
+        await self.audio_source.start()
         while True:
-            data = await asyncio.to_thread(self.audio_stream.read, CHUNK_SIZE, **kwargs)
-            await self.out_queue.put({"data": data, "mime_type": "audio/pcm"})
+            data = await self.audio_source.read()
+            if data is None:
+                await self.end_of_input()
+                return
+            capture_time = getattr(self.audio_source, "last_capture_time", None)
+            if self.echo_canceller:
+                data = self.echo_canceller.process(data, capture_time)
+                if not data:
+                    continue
+            if self.recorder:
+                self.recorder.uplink(data, capture_time)
+            if self.barge_in_gate and not self.barge_in_gate.allow(data, capture_time):
+                continue
+            if self.activity_gate:
+                for item in self.activity_gate.feed(data):
+                    if item is ACTIVITY_START or item is ACTIVITY_END:
+                        # Losing a marker would leave the turn open or never start it.
+                        await self.out_queue.put(item)
+                    else:
+                        await self._enqueue(item)
+            else:
+                await self._enqueue(data)
+            self.max_out_queue_depth = max(self.max_out_queue_depth, self.out_queue.qsize())
+
+    async def _enqueue(self, data):
+        if self.lossless:
+            await self.out_queue.put(data)
+            return
+        try:
+            self.out_queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # Never block a realtime source; count the loss instead.
+            self.dropped_chunks += 1
+
+    async def end_of_input(self):
+        """Close the caller's last turn and wait for the reply to it."""
+        self.turn_done.clear()
+        # audio_stream_end only applies to automatic activity detection.
+        if self.activity_gate:
+            for item in self.activity_gate.flush():
+                await self.out_queue.put(item)
+        else:
+            await self.out_queue.put(None)
+        self._log("end_of_input")
+        try:
+            await asyncio.wait_for(self.turn_done.wait(), END_OF_INPUT_REPLY_TIMEOUT_S)
+        except TimeoutError:
+            self._log("end_of_input_timeout", level="warning")
+        while not self.audio_in_queue.empty():
+            await asyncio.sleep(0.01)
 
     async def send_realtime(self):
+        # Sessions from exp/live.py encode the ring view straight into a
+        # pre-built frame; the stock SDK validates a pydantic Blob and needs bytes.
+        send_audio = getattr(self.session, "send_realtime_audio", None)
         while True:
-            msg = await self.out_queue.get()
-            await self.session.send_realtime_input(audio=msg)
+            data = await self.out_queue.get()
+            if data is None:
+                await self.session.send_realtime_input(audio_stream_end=True)
+                continue
+            if data is ACTIVITY_START:
+                await self.session.send_realtime_input(activity_start={})
+                self._log("activity_start")
+                continue
+            if data is ACTIVITY_END:
+                await self.session.send_realtime_input(activity_end={})
+                self._log("activity_end")
+                continue
+            if send_audio:
+                await send_audio(data)
+            else:
+                await self.session.send_realtime_input(audio={"data": bytes(data), "mime_type": "audio/pcm"})
+            self.chunks_sent += 1
 
     async def receive_audio(self):
         "Background task to reads from the websocket and write pcm chunks to the output queue"
-        while True:
-            turn = self.session.receive()
-            async for response in turn:
-                if data := response.data:
-                    self.audio_in_queue.put_nowait(data)
-                    continue
-                
-                if hasattr(response, 'server_content'):
-                    # Print Server Content Details only if there's relevant content
-                    if any(hasattr(response.server_content, attr) and getattr(response.server_content, attr) is not None
-                           for attr in ['model_turn', 'output_transcription', 'input_transcription']):
-                        if not self._server_content_printed: # Only print if not already printed for this turn
-                            print("\n--- Server Content Details ---")
-                            pydantic_internal_attrs = ['_abc_impl', 'model_computed_fields', 'model_config', 'model_extra', 'model_fields', 'model_fields_set']
-                            for attr_name in dir(response.server_content):
-                                if not attr_name.startswith('__') and attr_name not in pydantic_internal_attrs:
-                                    attr_value = getattr(response.server_content, attr_name)
-                                    if attr_name not in ['model_turn', 'output_transcription', 'input_transcription', 'generation_complete', 'interrupted'] and not callable(attr_value):
-                                        print(f"  Server Content - {attr_name}: {attr_value}")
-                            self._server_content_printed = True # Set the flag to True after printing
-
-                    if hasattr(response.server_content, 'model_turn') and response.server_content.model_turn:
-                        print("\n--- Model Turn Details ---")
-                        for attr_name in dir(response.server_content.model_turn):
-                            if not attr_name.startswith('__') and attr_name != 'parts' and attr_name not in pydantic_internal_attrs and not callable(getattr(response.server_content.model_turn, attr_name)):
-                                print(f"  Model Turn - {attr_name}: {getattr(response.server_content.model_turn, attr_name)}")
-
-                        # The model_turn contains the actual text response from the model
-                        for i, part in enumerate(response.server_content.model_turn.parts):
-                            print(f"\n--- Model Turn Part {i+1} Details ---")
-                            for attr_name in dir(part):
-                                if not attr_name.startswith('__') and attr_name not in pydantic_internal_attrs:
-                                    attr_value = getattr(part, attr_name)
-                                    if attr_name not in ['text', 'thought'] and not callable(attr_value):
-                                        print(f"  Part {i+1} - {attr_name}: {attr_value}")
-                                    elif attr_name == 'text' and attr_value:
-                                        print("Output Transcript:", attr_value)
-                                    elif attr_name == 'thought' and attr_value:
-                                        print("Model Thought:", attr_value)
-
-                    if hasattr(response.server_content, 'output_transcription') and response.server_content.output_transcription:
-                        print("Output Transcription:", response.server_content.output_transcription.text)
-
-                    if hasattr(response.server_content, 'input_transcription') and response.server_content.input_transcription:
-                        print("Input Transcription:", response.server_content.input_transcription.text)
-
-                    if hasattr(response.server_content, 'generation_complete') and response.server_content.generation_complete:
-                        print("\nReceived: Generation Complete")
-
-                    if hasattr(response.server_content, 'interrupted') and response.server_content.interrupted:
-                        print("Received: Interrupted")
-
-                # The server will periodically send messages that include UsageMetadata.
-                if hasattr(response, 'usage_metadata') and (usage := response.usage_metadata):
-                    # print("UsageMetadata object attributes:", dir(usage))
-                    prompt_tokens = usage.prompt_token_count if usage.prompt_token_count is not None else 0
-                    response_tokens = usage.response_token_count if usage.response_token_count is not None else 0 # Use response_token_count
-                    total_tokens = usage.total_token_count if usage.total_token_count is not None else 0
-                    print(f"  Usage: Prompt Tokens: {prompt_tokens}, Response Tokens: {response_tokens}, Total Tokens: {total_tokens}")
-                    print(f"Used {total_tokens} tokens in total. Response token breakdown:")
-                    if usage.response_tokens_details: # Added check for None
-                        for detail in usage.response_tokens_details:
-                            match detail:
-                                case genai.types.ModalityTokenCount(modality=modality, token_count=count):
-                                    print(f"{modality}: {count}")
-                    
-                    # Accumulate for session totals
-                    self.total_session_prompt_tokens += prompt_tokens
-                    self.total_session_response_tokens += response_tokens
-
-            # After the turn is over
-            print("\nReceived: Turn Complete")
-            self._server_content_printed = False # Reset the flag for the next turn
-
-            # If you interrupt the model, it sends a turn_complete.
-            # For interruptions to work, we need to stop playback.
-            # So empty out the audio queue because it may have loaded
-            # much more audio than has played yet.
-            while not self.audio_in_queue.empty():
-                self.audio_in_queue.get_nowait()
+        # exp/live.py sessions can skip pydantic validation for audio frames.
+        await self.dispatcher.pump(self.session)
 
-    async def play_audio(self):
-        self.output_audio_stream = await asyncio.to_thread(
-            pya.open,
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RECEIVE_SAMPLE_RATE,
-            output=True,
+    def _make_dispatcher(self):
+        log = self._log
+        dispatcher = LiveEventDispatcher()
+        dispatcher.on(AudioEvent, self.on_audio)
+        # Text parts of the model_turn are the model's text response or its thoughts.
+        dispatcher.on(
+            TextEvent, lambda event: log("model_thought" if event.thought else "model_text", text=event.text)
         )
+        dispatcher.on(OutputTranscriptionEvent, lambda event: log("output_transcription", text=event.text))
+        dispatcher.on(InputTranscriptionEvent, lambda event: log("input_transcription", text=event.text))
+        dispatcher.on(GenerationCompleteEvent, lambda event: log("generation_complete"))
+        dispatcher.on(InterruptedEvent, self.on_interrupted)
+        dispatcher.on(UsageEvent, self.on_usage)
+        dispatcher.on(GoAwayEvent, lambda event: log("go_away", level="warning", time_left=event.time_left))
+        dispatcher.on(TurnCompleteEvent, self.on_turn_complete)
+        return dispatcher
+
+    def on_audio(self, event):
+        self.audio_in_queue.put_nowait(event.data)
+        self.chunks_received += 1
+
+    def on_interrupted(self, event):
+        self._log("interrupted")
+        self.interrupt_playback()
+
+    def on_usage(self, event):
+        # The server will periodically send messages that include UsageMetadata.
+        self._log(
+            "usage",
+            prompt_tokens=event.prompt_tokens,
+            response_tokens=event.response_tokens,
+            total_tokens=event.total_tokens,
+            response_tokens_details=event.response_tokens_details,
+        )
+        # Accumulate for session totals
+        self.total_session_prompt_tokens += event.prompt_tokens
+        self.total_session_response_tokens += event.response_tokens
+
+    def on_turn_complete(self, event):
+        self._log("turn_complete")
+        # Let the jitter buffer play out the tail of the reply. Barge-in
+        # is handled when the server reports `interrupted`.
+        self.speaker.turn_complete()
+        self.turn_done.set()
+
+    def interrupt_playback(self):
+        # Drop audio that has not reached the device yet and fade out what is
+        # playing, instead of waiting for the turn to complete.
+        while not self.audio_in_queue.empty():
+            self.audio_in_queue.get_nowait()
+        self.speaker.clear()
+
+    async def play_audio(self):
+        await self.speaker.start()
         while True:
             bytestream = await self.audio_in_queue.get()
-            await asyncio.to_thread(self.output_audio_stream.write, bytestream)
+            await self.speaker.write(bytestream)
 
     async def run(self):
         self.session_start_time = time.time()
-        print("--- Starting Gemini Live API Test ---")
-        print("Press Ctrl+C to stop.")
         try:
+            connect = self.connect
+            if connect is None:
+                self.client = self.client or genai.Client(http_options={"api_version": API_VERSION})
+                connect = self.client.aio.live.connect
+            if self.resilient:
+                connect = functools.partial(resilient_connect, connect, event_log=self.event_log)
             # Start the timer *before* the connect call, to include connection and setup time
             connect_start_time = time.time()
             async with (
-                client.aio.live.connect(model=MODEL, config=CONFIG) as session,
+                connect(model=self.model, config=self.config) as session,
                 asyncio.TaskGroup() as tg,
             ):
-                connect_end_time = time.time()
-                initial_connect_latency = (connect_end_time - connect_start_time) * 1000
-                print(f"Latency (connect call completion, including setup): {initial_connect_latency:.2f} ms")
-                print("WebSocket Opened (and setup complete)")
-                
+                self.connect_latency_ms = (time.time() - connect_start_time) * 1000
                 self.session = session
+                # Per-phase breakdown from SDKs that record it (exp/live.py). A
+                # pooled session carries the timings of its original connect.
+                self.connect_timings = getattr(session, "connect_timings", None)
+                self._log(
+                    "connected",
+                    connect_latency_ms=self.connect_latency_ms,
+                    connect_timings=dataclasses.asdict(self.connect_timings) if self.connect_timings else None,
+                )
 
                 self.audio_in_queue = asyncio.Queue()
-                self.out_queue = asyncio.Queue(maxsize=5)
+                self.out_queue = asyncio.Queue(maxsize=OUT_QUEUE_SIZE)
+                self.speaker = self.sink or SpeakerSink(
+                    self._pyaudio(), reference=self.playback_reference, device_index=OUTPUT_DEVICE_INDEX
+                )
 
-                tg.create_task(self.send_realtime())
-                tg.create_task(self.listen_audio())
-                tg.create_task(self.receive_audio())
-                tg.create_task(self.play_audio())
+                listen_task = tg.create_task(self.listen_audio())
+                tasks = [
+                    tg.create_task(self.send_realtime()),
+                    tg.create_task(self.receive_audio()),
+                    tg.create_task(self.play_audio()),
+                ]
+                # A microphone never runs out; a file or pipe ends the session
+                # once the reply to its last turn has been played.
+                await listen_task
+                for task in tasks:
+                    task.cancel()
         except asyncio.CancelledError:
             pass
         except ExceptionGroup as eg: # Changed asyncio.ExceptionGroup to ExceptionGroup
-            if self.audio_stream:
-                self.audio_stream.close()
-            print(f"WebSocket Error: {eg}")
+            self.error = eg.exceptions[0]
         except Exception as e:
-            if self.audio_stream:
-                self.audio_stream.close()
-            print(f"WebSocket Error: {e}")
+            self.error = e
         finally:
-            print("\n--- Stopping Gemini Live API Test ---")
-            if self.audio_stream:
-                self.audio_stream.stop_stream()
-                self.audio_stream.close()
-            if self.output_audio_stream:
-                self.output_audio_stream.stop_stream()
-                self.output_audio_stream.close()
-            pya.terminate()
-            print("Audio streams closed.")
-            
-            if self.session_start_time:
-                session_end_time = time.time()
-                session_duration = session_end_time - self.session_start_time
-                print(f"\n--- Session Summary ---")
-                print(f"Session Duration: {session_duration:.2f} seconds")
-                print(f"Total Session Prompt Tokens: {self.total_session_prompt_tokens}")
-                print(f"Total Session Response Tokens: {self.total_session_response_tokens}")
-                print(f"Total Session Tokens (Prompt + Response): {self.total_session_prompt_tokens + self.total_session_response_tokens}")
-            print("WebSocket Closed")
+            source = self.audio_source or self.source
+            if source:
+                source.close()
+            speaker = self.speaker or self.sink
+            if speaker:
+                speaker.close()
+            if self.pya:
+                self.pya.terminate()
+            self.session_end_time = time.time()
+            if self.error:
+                self._log("error", level="error", error=repr(self.error))
+            self._log("session_end", **self.stats())
+            if self.recorder:
+                await self.recorder.aclose(**self.stats())
+
+    def stats(self):
+        end_time = self.session_end_time or time.time()
+        return {
+            "session_id": self.session_id,
+            "duration_s": end_time - self.session_start_time if self.session_start_time else 0.0,
+            "connect_latency_ms": self.connect_latency_ms,
+            "prompt_tokens": self.total_session_prompt_tokens,
+            "response_tokens": self.total_session_response_tokens,
+            "chunks_sent": self.chunks_sent,
+            "chunks_received": self.chunks_received,
+            "dropped_chunks": self.dropped_chunks,
+            "out_queue_depth": self.out_queue.qsize() if self.out_queue else 0,
+            "max_out_queue_depth": self.max_out_queue_depth,
+            "audio_in_queue_depth": self.audio_in_queue.qsize() if self.audio_in_queue else 0,
+            "activities": self.activity_gate.activities if self.activity_gate else None,
+            "reconnects": self.session.reconnects if isinstance(self.session, ResilientSession) else 0,
+            "rotations": self.session.rotations if isinstance(self.session, ResilientSession) else 0,
+            "error": repr(self.error) if self.error else None,
+        }
+
+    def print_summary(self):
+        print("\n--- Session Summary ---")
+        if self.connect_latency_ms is not None:
+            print(f"Latency (connect call completion, including setup): {self.connect_latency_ms:.2f} ms")
+        # exp/live.py sessions break the connect down by phase.
+        if self.connect_timings:
+            phases = {
+                name: value
+                for name, value in dataclasses.asdict(self.connect_timings).items()
+                if name.endswith("_ms") and value is not None
+            }
+            print("Connect phases (ms): " + ", ".join(
+                f"{name.removesuffix('_ms')} {value:.1f}" for name, value in phases.items()
+            ))
+        stats = self.stats()
+        print(f"Session Duration: {stats['duration_s']:.2f} seconds")
+        print(f"Total Session Prompt Tokens: {self.total_session_prompt_tokens}")
+        print(f"Total Session Response Tokens: {self.total_session_response_tokens}")
+        print(f"Total Session Tokens (Prompt + Response): {self.total_session_prompt_tokens + self.total_session_response_tokens}")
+        if getattr(self.speaker, "jitter_buffer", None):
+            jitter_buffer = self.speaker.jitter_buffer
+            print(f"Audio Played: {jitter_buffer.position_ms / 1000:.2f} seconds")
+            print(f"Playback Underruns: {jitter_buffer.underruns}")
+        if self.dropped_chunks:
+            print(f"Mic Chunks Dropped (uplink queue full): {self.dropped_chunks}")
+        if self.barge_in_gate:
+            print(f"Mic Chunks Held Back During Playback: {self.barge_in_gate.chunks_blocked}")
+        if self.echo_canceller:
+            print(f"Echo Canceller CPU: {self.echo_canceller.cpu_s * 1000:.1f} ms")
+        if self.resilient:
+            print(f"Connection Rotations: {stats['rotations']}, Reconnects: {stats['reconnects']}")
+        if self.error:
+            print(f"WebSocket Error: {self.error}")
+        if self.recorder:
+            print(f"Recording: {self.recorder.directory}")
 
 
 if __name__ == "__main__":
-    loop = AudioLoop()
-    asyncio.run(loop.run())
\ No newline at end of file
+    # GEMINI_API_KEY must be set as env variable
+    print(f"GEMINI_API_KEY loaded: {bool(os.environ.get('GEMINI_API_KEY'))}", file=sys.stderr)
+    # LIVE_INPUT / LIVE_OUTPUT run without a sound card: a WAV file path, or
+    # "-" for raw 16 kHz PCM on stdin / 24 kHz PCM on stdout.
+    source = sink = None
+    if os.environ.get("LIVE_INPUT"):
+        source = open_source(
+            os.environ["LIVE_INPUT"], realtime=os.environ.get("LIVE_INPUT_PACING", "realtime") == "realtime"
+        )
+    if os.environ.get("LIVE_OUTPUT"):
+        sink = open_sink(os.environ["LIVE_OUTPUT"])
+        if os.environ["LIVE_OUTPUT"] == "-":
+            # Keep the console output out of the audio stream.
+            sys.stdout = sys.stderr
+    event_log = EventLog(os.environ.get("LIVE_EVENT_LOG"), level=os.environ.get("LIVE_LOG_LEVEL", "info"))
+    recorder = None
+    if os.environ.get("LIVE_RECORD_DIR"):
+        recorder = SessionRecorder(os.path.join(os.environ["LIVE_RECORD_DIR"], time.strftime("call-%Y%m%d-%H%M%S")))
+    loop = AudioLoop(source=source, sink=sink, event_log=event_log, recorder=recorder)
+    print("--- Starting Gemini Live API Test ---")
+    print("Press Ctrl+C to stop.")
+    try:
+        asyncio.run(loop.run())
+    finally:
+        print("\n--- Stopping Gemini Live API Test ---")
+        loop.print_summary()
+        event_log.close()
+        print("WebSocket Closed")
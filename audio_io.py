@@ -0,0 +1,674 @@
+"""Audio sources and sinks that a call session reads from and writes to.
+
+A source has ``async start()``, ``async read()`` returning one chunk of 16 kHz
+PCM as a bytes-like object (``None`` once the source is exhausted) and
+``close()``. A sink has
+``async start()``, ``async write(data)`` for 24 kHz PCM, ``clear()`` to drop
+pending audio on interruption, ``turn_complete()`` when the model's turn ends
+and ``close()``.
+
+Besides the PyAudio devices there are headless ones that need no sound card:
+WAV files, raw PCM on stdin/stdout, and in-memory buffers. Sources can pace
+their chunks at real time or hand them out as fast as they are read.
+"""
+
+import asyncio
+import collections
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+from live_config import (
+    CHANNELS,
+    CHUNK_SIZE,
+    RECEIVE_SAMPLE_RATE,
+    SAMPLE_WIDTH,
+    SEND_SAMPLE_RATE,
+)
+from pcm_ring import PcmRingBuffer
+from resample import StreamingResampler, device_rate
+
+
+class QueueSource:
+    """In-memory source fed by ``push()``, e.g. from a network connection."""
+
+    def __init__(self, maxsize=0):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    async def start(self):
+        pass
+
+    def push(self, data):
+        self.queue.put_nowait(data)
+
+    def end(self):
+        self.queue.put_nowait(None)
+
+    async def read(self):
+        return await self.queue.get()
+
+    def close(self):
+        pass
+
+
+class QueueSink:
+    """In-memory sink that exposes received audio on an asyncio queue."""
+
+    def __init__(self, maxsize=0):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    async def start(self):
+        pass
+
+    async def write(self, data):
+        await self.queue.put(data)
+
+    def clear(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def turn_complete(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Pacer:
+    """Hands out chunks at ``speed`` times the capture rate, or as fast as asked with ``realtime=False``."""
+
+    def __init__(self, realtime, rate=SEND_SAMPLE_RATE, speed=1.0):
+        self.realtime = realtime
+        self.bytes_per_s = rate * SAMPLE_WIDTH * speed
+        self.max_lag_ms = 0.0
+        self._next_time = None
+
+    async def wait(self, nbytes):
+        if not self.realtime:
+            return
+        if self._next_time is None:
+            self._next_time = time.monotonic()
+        delay = self._next_time - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            # The capture side is behind real time.
+            self.max_lag_ms = max(self.max_lag_ms, -delay * 1000)
+        self._next_time += nbytes / self.bytes_per_s
+
+
+class WavFileSource:
+    """Streams 16 kHz mono 16-bit WAV files one after another.
+
+    Each file is treated as one caller utterance followed by ``gap_ms`` of
+    silence. With ``realtime`` the chunks are paced at ``speed`` times the
+    capture rate; otherwise they are returned as fast as they are read. The
+    time the last chunk of every file is handed out is appended to
+    ``speech_end_times``.
+    """
+
+    def __init__(self, paths, chunk_size=CHUNK_SIZE, realtime=True, gap_ms=0, speed=1.0):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        self.gap_ms = gap_ms
+        self.speech_end_times = []
+        self.finished = asyncio.Event()
+        self._chunks = None
+        self._pacer = _Pacer(realtime, speed=speed)
+
+    @property
+    def max_lag_ms(self):
+        return self._pacer.max_lag_ms
+
+    def _load(self, path):
+        with wave.open(path, "rb") as wav:
+            if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) != (
+                CHANNELS, SAMPLE_WIDTH, SEND_SAMPLE_RATE
+            ):
+                raise ValueError(
+                    f"{path}: expected {SEND_SAMPLE_RATE} Hz mono 16-bit PCM, got "
+                    f"{wav.getframerate()} Hz, {wav.getnchannels()} channel(s), "
+                    f"{wav.getsampwidth() * 8}-bit"
+                )
+            return wav.readframes(wav.getnframes())
+
+    def _iter_chunks(self, files):
+        chunk_bytes = self.chunk_size * SAMPLE_WIDTH
+        silence = bytes(chunk_bytes)
+        gap_chunks = int(self.gap_ms * SEND_SAMPLE_RATE / 1000) // self.chunk_size
+        for pcm in files:
+            pcm = memoryview(pcm)
+            for offset in range(0, len(pcm), chunk_bytes):
+                yield pcm[offset:offset + chunk_bytes], offset + chunk_bytes >= len(pcm)
+            for _ in range(gap_chunks):
+                yield silence, False
+
+    async def start(self):
+        files = [self._load(path) for path in self.paths]
+        self._chunks = self._iter_chunks(files)
+
+    async def read(self):
+        try:
+            data, speech_end = next(self._chunks)
+        except StopIteration:
+            self.finished.set()
+            return None
+        await self._pacer.wait(len(data))
+        if speech_end:
+            self.speech_end_times.append(time.monotonic())
+        return data
+
+    def close(self):
+        self.finished.set()
+
+
+class MemorySource:
+    """Streams an in-memory buffer of 16 kHz PCM in ``chunk_size`` chunks."""
+
+    def __init__(self, pcm, chunk_size=CHUNK_SIZE, realtime=False, speed=1.0):
+        self.pcm = memoryview(pcm).cast("B")
+        self.chunk_bytes = chunk_size * SAMPLE_WIDTH
+        self.realtime = realtime
+        self.offset = 0
+        self.finished = asyncio.Event()
+        self._pacer = _Pacer(realtime, speed=speed)
+
+    async def start(self):
+        pass
+
+    async def read(self):
+        if self.offset >= len(self.pcm):
+            self.finished.set()
+            return None
+        data = self.pcm[self.offset:self.offset + self.chunk_bytes]
+        self.offset += len(data)
+        await self._pacer.wait(len(data))
+        return data
+
+    def close(self):
+        self.finished.set()
+
+
+class StreamSource:
+    """Reads raw 16 kHz PCM from a binary stream, by default stdin.
+
+    Reads happen on a worker thread so a pipe that stalls does not block the
+    event loop. Without ``realtime`` each chunk is returned as soon as it has
+    been read, so the producer on the other end sets the pace.
+    """
+
+    def __init__(self, stream=None, chunk_size=CHUNK_SIZE, realtime=False):
+        self.stream = stream
+        self.chunk_bytes = chunk_size * SAMPLE_WIDTH
+        self.realtime = realtime
+        self._pacer = _Pacer(realtime)
+        self._carry = b""  # odd byte of a sample split across pipe reads
+
+    async def start(self):
+        if self.stream is None:
+            self.stream = sys.stdin.buffer
+
+    async def read(self):
+        data = b""
+        while not data:
+            data = await asyncio.to_thread(self.stream.read, self.chunk_bytes)
+            if not data:
+                return None  # a byte still carried at EOF is half a sample
+            data = self._carry + data
+            whole = len(data) - len(data) % SAMPLE_WIDTH
+            data, self._carry = data[:whole], data[whole:]
+        await self._pacer.wait(len(data))
+        return data
+
+    def close(self):
+        pass
+
+
+class MemorySink:
+    """Collects 24 kHz response audio in memory.
+
+    ``arrival_times`` records when each reply's first chunk was written, for
+    latency measurements; ``clear()`` only counts the interruption, since
+    everything written has already been "played".
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.arrival_times = []
+        self.interruptions = 0
+        self.turns = 0
+        self._in_turn = False
+
+    async def start(self):
+        pass
+
+    def _note_arrival(self):
+        if not self._in_turn:
+            self._in_turn = True
+            self.arrival_times.append(time.monotonic())
+
+    async def write(self, data):
+        self._note_arrival()
+        self.data += data
+
+    def clear(self):
+        self.interruptions += 1
+        self._in_turn = False
+
+    def turn_complete(self):
+        self.turns += 1
+        self._in_turn = False
+
+    def close(self):
+        pass
+
+
+class StreamSink(MemorySink):
+    """Writes raw 24 kHz PCM to a binary stream, by default stdout."""
+
+    def __init__(self, stream=None):
+        super().__init__()
+        self.stream = stream
+        self.bytes_written = 0
+
+    async def start(self):
+        if self.stream is None:
+            self.stream = sys.stdout.buffer
+
+    async def write(self, data):
+        self._note_arrival()
+        self.stream.write(data)
+        self.bytes_written += len(data)
+
+    def turn_complete(self):
+        super().turn_complete()
+        self.stream.flush()
+
+    def close(self):
+        if self.stream:
+            self.stream.flush()
+
+
+class WavFileSink(MemorySink):
+    """Writes the 24 kHz response audio to a mono 16-bit WAV file."""
+
+    def __init__(self, path, rate=RECEIVE_SAMPLE_RATE):
+        super().__init__()
+        self.path = path
+        self.rate = rate
+        self.bytes_written = 0
+        self._wav = None
+
+    async def start(self):
+        if self._wav:
+            return
+        self._wav = wave.open(self.path, "wb")
+        self._wav.setnchannels(CHANNELS)
+        self._wav.setsampwidth(SAMPLE_WIDTH)
+        self._wav.setframerate(self.rate)
+
+    async def write(self, data):
+        self._note_arrival()
+        self._wav.writeframesraw(data)
+        self.bytes_written += len(data)
+
+    def close(self):
+        if self._wav:
+            # Patches the header with the final length.
+            self._wav.close()
+            self._wav = None
+
+
+def open_source(spec, realtime=True):
+    """Headless source for ``spec``: ``-`` for stdin, else a WAV file path."""
+    if spec == "-":
+        return StreamSource(sys.stdin.buffer, realtime=realtime)
+    return WavFileSource(spec, realtime=realtime)
+
+
+def open_sink(spec):
+    """Headless sink for ``spec``: ``-`` for stdout, else a WAV file path."""
+    if spec == "-":
+        return StreamSink(sys.stdout.buffer)
+    return WavFileSink(spec)
+
+
+PA_CONTINUE = 0  # pyaudio.paContinue
+CAPTURE_BUFFER_MS = 1000
+
+
+class MicrophoneSource:
+    """Reads the default (or given) PyAudio input device.
+
+    In the default callback mode PortAudio's stream callback writes each
+    hardware buffer into a ``PcmRingBuffer`` and wakes the event loop with
+    ``call_soon_threadsafe`` only once ``block_size`` frames are ready, so no
+    executor thread is tied up per chunk. ``read()`` then returns a
+    ``memoryview`` into the ring and records the block's capture time in
+    ``last_capture_time``. ``callback=False`` keeps the old blocking ``read``
+    through ``asyncio.to_thread``.
+
+    With ``native_rate`` the device is opened at its own default rate and
+    captured audio is resampled to 16 kHz here rather than by PortAudio or
+    the OS.
+    """
+
+    def __init__(
+        self,
+        pya,
+        device_index=None,
+        chunk_size=CHUNK_SIZE,
+        block_size=None,
+        callback=True,
+        native_rate=True,
+    ):
+        self.pya = pya
+        self.device_index = device_index
+        self.native_rate = native_rate
+        self.device_rate = SEND_SAMPLE_RATE
+        self.resampler = None
+        self.chunk_size = chunk_size
+        self.block_size = block_size or chunk_size
+        self.callback = callback
+        self.audio_stream = None
+        self.ring = None
+        self.last_capture_time = None
+        self._loop = None
+        self._ready = None
+        self._wake_pending = False
+
+    @property
+    def overruns(self):
+        return self.ring.overruns if self.ring else 0
+
+    async def start(self):
+        if self.device_index is None:
+            self.device_index = self.pya.get_default_input_device_info()["index"]
+        if self.native_rate:
+            self.device_rate = device_rate(self.pya, self.device_index, SEND_SAMPLE_RATE)
+        if self.device_rate != SEND_SAMPLE_RATE:
+            self.resampler = StreamingResampler(self.device_rate, SEND_SAMPLE_RATE)
+        kwargs = {}
+        if self.callback:
+            self._loop = asyncio.get_running_loop()
+            self._ready = asyncio.Event()
+            self.ring = PcmRingBuffer(CAPTURE_BUFFER_MS, self.block_size * SAMPLE_WIDTH)
+            kwargs["stream_callback"] = self._on_audio
+        self.audio_stream = await asyncio.to_thread(
+            self.pya.open,
+            format=self.pya.get_format_from_width(SAMPLE_WIDTH),
+            channels=CHANNELS,
+            rate=self.device_rate,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=self.chunk_size * self.device_rate // SEND_SAMPLE_RATE,
+            **kwargs,
+        )
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        # PortAudio thread: copy into the ring, wake the loop once per block.
+        if self.resampler:
+            in_data = self.resampler.process(in_data)
+        self.ring.write(in_data)
+        if not self._wake_pending and self.ring.available() >= self.ring.max_read:
+            self._wake_pending = True
+            self._loop.call_soon_threadsafe(self._wake)
+        return None, PA_CONTINUE
+
+    def _wake(self):
+        self._wake_pending = False
+        self._ready.set()
+
+    async def read(self):
+        if not self.callback:
+            data = await asyncio.to_thread(
+                self.audio_stream.read,
+                self.chunk_size * self.device_rate // SEND_SAMPLE_RATE,
+                exception_on_overflow=False,
+            )
+            return self.resampler.process(data) if self.resampler else data
+        while (block := self.ring.read(self.ring.max_read)) is None:
+            self._ready.clear()
+            if self.ring.available() >= self.ring.max_read:
+                continue
+            await self._ready.wait()
+        data, self.last_capture_time = block
+        return data
+
+    def close(self):
+        if self.audio_stream:
+            self.audio_stream.stop_stream()
+            self.audio_stream.close()
+            self.audio_stream = None
+
+
+PREBUFFER_MS = 120
+FADE_OUT_MS = 12
+PLAYBACK_FRAMES = 960  # 40 ms at 24 kHz
+MAX_PLAYBACK_BUFFER_MS = 120000
+
+
+class JitterBuffer:
+    """Playout buffer between the event loop and the audio device callback.
+
+    ``push()`` runs on the loop, ``read()`` on the device thread. Playback
+    starts once ``prebuffer_ms`` of audio is queued (or the turn has ended)
+    and goes back to prebuffering after an underrun. ``interrupt()`` ramps the
+    audio that is playing down to silence over ``fade_out_ms`` and drops
+    everything still queued. ``played_bytes`` is the byte-accurate count of
+    response audio handed to the device.
+    """
+
+    def __init__(
+        self,
+        rate=RECEIVE_SAMPLE_RATE,
+        prebuffer_ms=PREBUFFER_MS,
+        fade_out_ms=FADE_OUT_MS,
+        max_buffer_ms=MAX_PLAYBACK_BUFFER_MS,
+    ):
+        self.rate = rate
+        bytes_per_ms = rate * SAMPLE_WIDTH / 1000
+        self.prebuffer_bytes = int(prebuffer_ms * bytes_per_ms) // SAMPLE_WIDTH * SAMPLE_WIDTH
+        self.fade_bytes = int(fade_out_ms * bytes_per_ms) // SAMPLE_WIDTH * SAMPLE_WIDTH
+        self.max_bytes = int(max_buffer_ms * bytes_per_ms)
+        self._lock = threading.Lock()
+        self._chunks = collections.deque()
+        self._offset = 0
+        self.buffered_bytes = 0
+        self.prebuffering = True
+        self._turn_ended = False
+        self._interrupted = False
+        self.played_bytes = 0
+        self.underruns = 0
+        self.interruptions = 0
+        self.overflow_bytes = 0
+
+    def push(self, data):
+        with self._lock:
+            if self.buffered_bytes + len(data) > self.max_bytes:
+                self.overflow_bytes += len(data)
+                return
+            self._chunks.append(data)
+            self.buffered_bytes += len(data)
+            self._turn_ended = False
+
+    def turn_complete(self):
+        with self._lock:
+            self._turn_ended = True
+
+    def interrupt(self):
+        with self._lock:
+            self._interrupted = True
+
+    @property
+    def playing(self):
+        return not self.prebuffering and self.buffered_bytes > 0
+
+    @property
+    def buffered_ms(self):
+        return self.buffered_bytes / (self.rate * SAMPLE_WIDTH) * 1000
+
+    @property
+    def position_ms(self):
+        return self.played_bytes / (self.rate * SAMPLE_WIDTH) * 1000
+
+    def _take(self, nbytes):
+        parts = []
+        while nbytes and self._chunks:
+            chunk = self._chunks[0]
+            available = len(chunk) - self._offset
+            if available <= nbytes:
+                parts.append(chunk[self._offset:] if self._offset else chunk)
+                self._chunks.popleft()
+                self._offset = 0
+                nbytes -= available
+            else:
+                parts.append(chunk[self._offset:self._offset + nbytes])
+                self._offset += nbytes
+                nbytes = 0
+        data = b"".join(parts)
+        self.buffered_bytes -= len(data)
+        return data
+
+    def read(self, nbytes):
+        """Return exactly ``nbytes`` for the device, padded with silence."""
+        with self._lock:
+            if self._interrupted:
+                data = self._take(min(nbytes, self.fade_bytes))
+                self._chunks.clear()
+                self._offset = 0
+                self.buffered_bytes = 0
+                self._interrupted = False
+                self.prebuffering = True
+                self.interruptions += 1
+                if data:
+                    samples = np.frombuffer(data, dtype=np.int16)
+                    gain = np.linspace(1.0, 0.0, len(samples), endpoint=False, dtype=np.float32)
+                    data = (samples * gain).astype(np.int16).tobytes()
+                    self.played_bytes += len(data)
+                return data + bytes(nbytes - len(data))
+
+            if self.prebuffering:
+                if self.buffered_bytes < self.prebuffer_bytes and not (
+                    self._turn_ended and self.buffered_bytes
+                ):
+                    return bytes(nbytes)
+                self.prebuffering = False
+
+            data = self._take(nbytes)
+            self.played_bytes += len(data)
+            if len(data) < nbytes:
+                if not self._turn_ended:
+                    # Ran dry mid-turn: rebuild the prebuffer before resuming.
+                    self.underruns += 1
+                self.prebuffering = True
+                return data + bytes(nbytes - len(data))
+            return data
+
+
+class SpeakerSink:
+    """Plays audio on the default PyAudio output device.
+
+    By default playback is driven by the device callback pulling from a
+    ``JitterBuffer``; ``callback=False`` keeps the old blocking ``write``
+    through ``asyncio.to_thread`` per chunk. If given an
+    ``echo.PlaybackReference``, all 24 kHz audio handed to the device is also
+    written there for the uplink's echo handling.
+
+    With ``native_rate`` the device is opened at its own default rate and the
+    24 kHz stream is resampled on the way out.
+    """
+
+    def __init__(
+        self,
+        pya,
+        callback=True,
+        prebuffer_ms=PREBUFFER_MS,
+        frames_per_buffer=PLAYBACK_FRAMES,
+        reference=None,
+        device_index=None,
+        native_rate=True,
+    ):
+        self.pya = pya
+        self.reference = reference
+        self.device_index = device_index
+        self.native_rate = native_rate
+        self.device_rate = RECEIVE_SAMPLE_RATE
+        self.resampler = None
+        self._resampled = bytearray()
+        self.callback = callback
+        self.frames_per_buffer = frames_per_buffer
+        self.jitter_buffer = JitterBuffer(prebuffer_ms=prebuffer_ms) if callback else None
+        self.output_audio_stream = None
+
+    async def start(self):
+        if self.device_index is None:
+            self.device_index = self.pya.get_default_output_device_info()["index"]
+        if self.native_rate:
+            self.device_rate = device_rate(self.pya, self.device_index, RECEIVE_SAMPLE_RATE)
+        if self.device_rate != RECEIVE_SAMPLE_RATE:
+            self.resampler = StreamingResampler(RECEIVE_SAMPLE_RATE, self.device_rate)
+        kwargs = {}
+        if self.callback:
+            kwargs["stream_callback"] = self._on_playback
+            kwargs["frames_per_buffer"] = self.frames_per_buffer * self.device_rate // RECEIVE_SAMPLE_RATE
+        self.output_audio_stream = await asyncio.to_thread(
+            self.pya.open,
+            format=self.pya.get_format_from_width(SAMPLE_WIDTH),
+            channels=CHANNELS,
+            rate=self.device_rate,
+            output=True,
+            output_device_index=self.device_index,
+            **kwargs,
+        )
+        if self.reference:
+            self.reference.latency_s = self.output_audio_stream.get_output_latency()
+
+    def _on_playback(self, in_data, frame_count, time_info, status):
+        nbytes = frame_count * SAMPLE_WIDTH
+        if not self.resampler:
+            data = self.jitter_buffer.read(nbytes)
+            if self.reference:
+                self.reference.write(data)
+            return data, PA_CONTINUE
+        # Pull whole 24 kHz blocks and keep any resampled surplus for the
+        # next callback; the reference is stamped with when it will play.
+        pending = self._resampled
+        while len(pending) < nbytes:
+            frames = -(-(frame_count - len(pending) // SAMPLE_WIDTH) * RECEIVE_SAMPLE_RATE // self.device_rate)
+            data = self.jitter_buffer.read(max(frames, 1) * SAMPLE_WIDTH)
+            if self.reference:
+                delay = len(pending) / (self.device_rate * SAMPLE_WIDTH)
+                self.reference.write(data, time.monotonic() + self.reference.latency_s + delay)
+            pending += self.resampler.process(data)
+        data = bytes(pending[:nbytes])
+        del pending[:nbytes]
+        return data, PA_CONTINUE
+
+    async def write(self, data):
+        if self.callback:
+            self.jitter_buffer.push(data)
+        else:
+            if self.reference:
+                self.reference.write(data)
+            if self.resampler:
+                data = self.resampler.process(data)
+            await asyncio.to_thread(self.output_audio_stream.write, data)
+
+    def clear(self):
+        if self.callback:
+            self.jitter_buffer.interrupt()
+
+    def turn_complete(self):
+        if self.callback:
+            self.jitter_buffer.turn_complete()
+
+    def close(self):
+        if self.output_audio_stream:
+            self.output_audio_stream.stop_stream()
+            self.output_audio_stream.close()
+            self.output_audio_stream = None
@@ -0,0 +1,299 @@
+"""Re-run a directory of recorded calls through Live sessions.
+
+Every ``*.wav`` in the input directory is streamed as one caller through the
+same ``AudioLoop`` path a live call uses, at most ``concurrency`` at a time
+and at ``speed`` times real time (0 for no pacing). When the recording ends
+the caller's turn is closed and the reply to it awaited. For each recording
+the output directory gets:
+
+    <name>.wav   the model's 24 kHz response audio
+    <name>.json  input and output transcripts, token usage and call stats
+
+plus ``batch_summary.json``. The uplink waits for the session rather than
+dropping audio; a call that still lost some is reported as ``degraded``. A
+call that fails (connect error, dropped session) is retried up to
+``retries`` times with exponential backoff; bad input files are reported
+and not retried. Recordings of any rate are
+resampled to 16 kHz; they must be mono 16-bit.
+
+    python batch.py calls/ results/ --concurrency 8 --speed 4
+    python batch.py calls/ results/ --mock --skip-existing
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import wave
+
+from google import genai
+
+from audio_io import MemorySink, MemorySource
+from call_server import AdmissionError, CallServer
+from live_config import API_VERSION, CHANNELS, RECEIVE_SAMPLE_RATE, SAMPLE_WIDTH, SEND_SAMPLE_RATE
+from live_events import InputTranscriptionEvent, OutputTranscriptionEvent, TurnCompleteEvent, UsageEvent
+from resample import StreamingResampler
+
+CONCURRENCY = 4
+SPEED = 1.0
+RETRIES = 2
+RETRY_BACKOFF_S = 1.0
+REPLY_TIMEOUT_S = 20.0
+
+
+def load_recording(path):
+    """16 kHz int16 PCM bytes of a mono 16-bit WAV at any sample rate."""
+    with wave.open(path, "rb") as wav:
+        if (wav.getnchannels(), wav.getsampwidth()) != (CHANNELS, SAMPLE_WIDTH):
+            raise ValueError(
+                f"{path}: expected mono 16-bit PCM, got {wav.getnchannels()} channel(s), "
+                f"{wav.getsampwidth() * 8}-bit"
+            )
+        rate = wav.getframerate()
+        pcm = wav.readframes(wav.getnframes())
+    if rate == SEND_SAMPLE_RATE:
+        return pcm
+    resampler = StreamingResampler(rate, SEND_SAMPLE_RATE)
+    # Push the filter delay's worth of silence through so the tail is not cut.
+    tail = bytes(int(resampler.delay * rate / SEND_SAMPLE_RATE + resampler.taps) * SAMPLE_WIDTH)
+    return resampler.process(pcm) + resampler.process(tail)
+
+
+class CallRecord:
+    """What one Live session said and cost for one recording."""
+
+    def __init__(self, call):
+        self.input_transcript = []
+        self.output_transcript = []
+        self.response_tokens_details = {}
+        self.turns = 0
+        self.turn_done = asyncio.Event()
+        call.dispatcher.on(InputTranscriptionEvent, self.on_input_transcription)
+        call.dispatcher.on(OutputTranscriptionEvent, self.on_output_transcription)
+        call.dispatcher.on(UsageEvent, self.on_usage)
+        call.dispatcher.on(TurnCompleteEvent, self.on_turn_complete)
+
+    def on_input_transcription(self, event):
+        if event.text:
+            self.input_transcript.append(event.text)
+
+    def on_output_transcription(self, event):
+        if event.text:
+            self.output_transcript.append(event.text)
+
+    def on_usage(self, event):
+        for modality, count in event.response_tokens_details.items():
+            self.response_tokens_details[modality] = self.response_tokens_details.get(modality, 0) + count
+
+    def on_turn_complete(self, event):
+        self.turns += 1
+        self.turn_done.set()
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        server,
+        out_dir,
+        concurrency=CONCURRENCY,
+        speed=SPEED,
+        retries=RETRIES,
+        reply_timeout_s=REPLY_TIMEOUT_S,
+        skip_existing=False,
+    ):
+        self.server = server
+        self.out_dir = out_dir
+        self.speed = speed
+        self.retries = retries
+        self.reply_timeout_s = reply_timeout_s
+        self.skip_existing = skip_existing
+        self._slots = asyncio.Semaphore(concurrency)
+        self.results = []
+
+    async def run(self, paths):
+        os.makedirs(self.out_dir, exist_ok=True)
+        start = time.monotonic()
+        await asyncio.gather(*(self._run_file(path) for path in paths))
+        wall_s = time.monotonic() - start
+        summary = self.summary(wall_s)
+        with open(os.path.join(self.out_dir, "batch_summary.json"), "w") as f:
+            json.dump({**summary, "files": self.results}, f, indent=2)
+        return summary
+
+    def _output_paths(self, path):
+        stem = os.path.join(self.out_dir, os.path.splitext(os.path.basename(path))[0])
+        return stem + ".wav", stem + ".json"
+
+    async def _run_file(self, path):
+        wav_path, json_path = self._output_paths(path)
+        if self.skip_existing and os.path.exists(json_path):
+            self.results.append({"file": path, "status": "skipped"})
+            return
+        result = {"file": path, "status": "failed", "attempts": 0}
+        try:
+            pcm = load_recording(path)
+        except (OSError, EOFError, wave.Error, ValueError) as e:
+            result["error"] = repr(e)
+            pcm = None
+        if pcm is not None:
+            result["input_s"] = len(pcm) / (SEND_SAMPLE_RATE * SAMPLE_WIDTH)
+            await self._run_attempts(pcm, path, wav_path, json_path, result)
+        self.results.append(result)
+        status = f"{path}: {result['status']} after {result['attempts']} attempt(s)"
+        if result.get("dropped_chunks"):
+            status += f", {result['dropped_chunks']} uplink chunks dropped"
+        if result.get("error"):
+            status += f": {result['error']}"
+        print(status)
+
+    async def _run_attempts(self, pcm, path, wav_path, json_path, result):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Backing off outside the slot lets other files use it meanwhile.
+                await asyncio.sleep(RETRY_BACKOFF_S * 2 ** (attempt - 1))
+            result["attempts"] = attempt + 1
+            try:
+                async with self._slots:
+                    call, record, sink = await self._attempt(pcm)
+            except AdmissionError as e:
+                result["error"] = repr(e)
+                continue
+            if call.error:
+                result["error"] = repr(call.error)
+                continue
+            result.pop("error", None)
+            result.update(self._write_outputs(wav_path, json_path, path, call, record, sink))
+            # A reply to a recording with holes in it is not a faithful re-run.
+            if result["dropped_chunks"]:
+                result["status"] = "degraded"
+            else:
+                result["status"] = "ok" if record.turns else "no_reply"
+            break
+
+    async def _attempt(self, pcm):
+        source = MemorySource(pcm, realtime=self.speed > 0, speed=self.speed or 1.0)
+        sink = MemorySink()
+        # A recording can always wait for the uplink, paced or not.
+        call = self.server.admit(source, sink, lossless=True)
+        record = CallRecord(call)
+        done = asyncio.create_task(self.server.wait(call.session_id))
+        finished = asyncio.create_task(source.finished.wait())
+        try:
+            await asyncio.wait([done, finished], return_when=asyncio.FIRST_COMPLETED)
+            if not done.done():
+                # The reply to the last utterance comes after the recording ends.
+                record.turn_done.clear()
+                reply = asyncio.create_task(record.turn_done.wait())
+                await asyncio.wait([done, reply], timeout=self.reply_timeout_s, return_when=asyncio.FIRST_COMPLETED)
+                reply.cancel()
+        finally:
+            finished.cancel()
+            await self.server.hangup(call.session_id)
+            await asyncio.gather(done, return_exceptions=True)
+        return call, record, sink
+
+    def _write_outputs(self, wav_path, json_path, path, call, record, sink):
+        with wave.open(wav_path, "wb") as wav:
+            wav.setnchannels(CHANNELS)
+            wav.setsampwidth(SAMPLE_WIDTH)
+            wav.setframerate(RECEIVE_SAMPLE_RATE)
+            wav.writeframes(sink.data)
+        stats = call.stats()
+        output = {
+            "file": path,
+            "input_transcript": "".join(record.input_transcript),
+            "output_transcript": "".join(record.output_transcript),
+            "turns": record.turns,
+            "prompt_tokens": stats["prompt_tokens"],
+            "response_tokens": stats["response_tokens"],
+            "total_tokens": stats["prompt_tokens"] + stats["response_tokens"],
+            "response_tokens_details": record.response_tokens_details,
+            "response_audio_s": len(sink.data) / (RECEIVE_SAMPLE_RATE * SAMPLE_WIDTH),
+            "interruptions": sink.interruptions,
+            "connect_latency_ms": stats["connect_latency_ms"],
+            "duration_s": stats["duration_s"],
+            "chunks_sent": stats["chunks_sent"],
+            "dropped_chunks": stats["dropped_chunks"],
+        }
+        with open(json_path, "w") as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
+        return {
+            "output": json_path,
+            "prompt_tokens": output["prompt_tokens"],
+            "response_tokens": output["response_tokens"],
+            "dropped_chunks": output["dropped_chunks"],
+        }
+
+    def summary(self, wall_s):
+        statuses = [result["status"] for result in self.results]
+        input_s = sum(result.get("input_s", 0.0) for result in self.results)
+        return {
+            "files": len(self.results),
+            "ok": statuses.count("ok"),
+            "degraded": statuses.count("degraded"),
+            "no_reply": statuses.count("no_reply"),
+            "failed": statuses.count("failed"),
+            "skipped": statuses.count("skipped"),
+            "retries": sum(max(0, result.get("attempts", 1) - 1) for result in self.results),
+            "prompt_tokens": sum(result.get("prompt_tokens", 0) for result in self.results),
+            "response_tokens": sum(result.get("response_tokens", 0) for result in self.results),
+            "wall_s": wall_s,
+            "audio_s_per_wall_s": input_s / wall_s if wall_s else 0.0,
+        }
+
+
+async def main(args):
+    from mock_live_server import MockLiveServer, make_self_signed_cert
+
+    paths = sorted(
+        os.path.join(args.in_dir, name) for name in os.listdir(args.in_dir) if name.lower().endswith(".wav")
+    )
+    mock = None
+    tmpdir = tempfile.TemporaryDirectory()
+    http_options = {"api_version": API_VERSION}
+    if args.mock:
+        certfile, keyfile = make_self_signed_cert(tmpdir.name)
+        mock = MockLiveServer(port=0, certfile=certfile, keyfile=keyfile)
+        await mock.start()
+        http_options = mock.client_http_options(API_VERSION)
+    api_key = os.environ.get("GEMINI_API_KEY") or ("test" if args.mock else None)
+    server = CallServer(
+        client=genai.Client(api_key=api_key, http_options=http_options),
+        max_sessions=args.concurrency,
+        client_vad=args.client_vad,
+    )
+    runner = BatchRunner(
+        server,
+        args.out_dir,
+        concurrency=args.concurrency,
+        speed=args.speed,
+        retries=args.retries,
+        reply_timeout_s=args.reply_timeout_s,
+        skip_existing=args.skip_existing,
+    )
+    try:
+        summary = await runner.run(paths)
+    finally:
+        await server.shutdown()
+        if mock:
+            await mock.close()
+        tmpdir.cleanup()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("in_dir", help="directory of mono 16-bit WAV recordings")
+    parser.add_argument("out_dir")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--speed", type=float, default=SPEED, help="pace at this multiple of real time, 0 for no pacing")
+    parser.add_argument("--retries", type=int, default=RETRIES)
+    parser.add_argument("--reply-timeout-s", type=float, default=REPLY_TIMEOUT_S)
+    parser.add_argument("--skip-existing", action="store_true", help="skip recordings that already have results")
+    parser.add_argument("--mock", action="store_true", help="run against an in-process mock_live_server")
+    parser.add_argument(
+        "--client-vad", action="store_true", help="detect activity locally and send activity_start/activity_end"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,203 @@
+"""Run many Gemini Live calls on one event loop.
+
+Each call is a ``LiveApi.AudioLoop`` with its own audio source and sink, its
+queues and its token counters. ``CallServer`` admits new calls up to
+``max_sessions``, tears each one down independently and keeps aggregate stats
+across live and finished calls.
+"""
+
+import asyncio
+import itertools
+import os
+
+from google import genai
+
+from LiveApi import AudioLoop
+from live_config import API_VERSION, CLIENT_ACTIVITY_CONFIG, CONFIG, MODEL, with_current_instruction
+from recorder import RecordingWriter, SessionRecorder
+
+MAX_SESSIONS = 200
+
+
+class AdmissionError(RuntimeError):
+    """Raised when a call cannot be admitted (server full or shutting down)."""
+
+
+class CallServer:
+    def __init__(
+        self,
+        client=None,
+        model=MODEL,
+        config=None,
+        max_sessions=MAX_SESSIONS,
+        event_log=None,
+        client_vad=False,
+        record_dir=None,
+        pool=None,
+        resilient=True,
+        echo_cancel=False,
+        barge_in_gate=False,
+    ):
+        # One client (and one HTTP/WebSocket stack) is shared by every call.
+        self.client = client or (pool.client if pool else genai.Client(http_options={"api_version": API_VERSION}))
+        # Calls whose model/config the pool keeps warm skip the connect handshake.
+        self.pool = pool
+        # Calls move to a resumed connection on go_away or a dropped WebSocket.
+        self.resilient = resilient
+        self.model = model
+        # With client_vad every call runs its own ActivityGate and the server's
+        # automatic activity detection is disabled.
+        self.client_vad = client_vad
+        # Network and telephony legs arrive without the speaker's echo; turn
+        # these on for calls that play through a local loudspeaker.
+        self.echo_cancel = echo_cancel
+        self.barge_in_gate = barge_in_gate
+        # The default config follows edits to system_instruction.txt from the
+        # next admitted call on; an explicit config is used as given.
+        self.follow_instruction_file = config is None
+        self.config = config or (CLIENT_ACTIVITY_CONFIG if client_vad else CONFIG)
+        self.max_sessions = max_sessions
+        self.event_log = event_log
+        # Every call is recorded under record_dir/call-<id>, all through one writer thread.
+        self.record_dir = record_dir
+        self._recording_writer = RecordingWriter() if record_dir else None
+        self.sessions = {}
+        self._tasks = {}
+        self._ids = itertools.count(1)
+        self._closing = False
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self._finished_totals = {
+            "prompt_tokens": 0,
+            "response_tokens": 0,
+            "chunks_sent": 0,
+            "chunks_received": 0,
+            "dropped_chunks": 0,
+        }
+
+    def admit(self, source, sink, config=None, lossless=None):
+        """Start a new call for ``source``/``sink`` and return its ``AudioLoop``.
+
+        ``lossless`` makes the uplink wait for room instead of dropping audio;
+        by default only sources that are not paced in real time wait.
+        """
+        if self._closing or len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            if self.event_log:
+                self.event_log.log("call_rejected", level="warning", active_sessions=len(self.sessions))
+            raise AdmissionError(
+                f"Cannot admit call: {len(self.sessions)}/{self.max_sessions} sessions active"
+            )
+        session_id = next(self._ids)
+        event_log = self.event_log.bind(session_id=session_id) if self.event_log else None
+        if self.follow_instruction_file:
+            config_before, self.config = self.config, with_current_instruction(self.config)
+            if self.pool and self.config is not config_before:
+                self.pool.unwarm(self.model, config_before)
+                self.pool.warm(self.model, self.config)
+        call = AudioLoop(
+            client=self.client,
+            model=self.model,
+            config=config or self.config,
+            source=source,
+            sink=sink,
+            event_log=event_log,
+            session_id=session_id,
+            client_vad=self.client_vad,
+            barge_in_gate=self.barge_in_gate,
+            echo_cancel=self.echo_cancel,
+            recorder=(
+                SessionRecorder(os.path.join(self.record_dir, f"call-{session_id}"), self._recording_writer)
+                if self.record_dir
+                else None
+            ),
+            resilient=self.resilient,
+            connect=self.pool.connect if self.pool else None,
+            lossless=lossless,
+        )
+        self.sessions[session_id] = call
+        self._tasks[session_id] = asyncio.create_task(self._run_call(call))
+        self.admitted += 1
+        return call
+
+    async def _run_call(self, call):
+        try:
+            await call.run()
+        finally:
+            del self.sessions[call.session_id]
+            del self._tasks[call.session_id]
+            if call.error:
+                self.failed += 1
+            else:
+                self.completed += 1
+            stats = call.stats()
+            self._finished_totals["prompt_tokens"] += stats["prompt_tokens"]
+            self._finished_totals["response_tokens"] += stats["response_tokens"]
+            self._finished_totals["chunks_sent"] += stats["chunks_sent"]
+            self._finished_totals["chunks_received"] += stats["chunks_received"]
+            self._finished_totals["dropped_chunks"] += stats["dropped_chunks"]
+
+    async def wait(self, session_id):
+        """Wait for a call to end on its own."""
+        task = self._tasks.get(session_id)
+        if task:
+            await asyncio.shield(task)
+
+    async def hangup(self, session_id):
+        """Tear down one call without touching the others."""
+        task = self._tasks.get(session_id)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def shutdown(self):
+        """Stop admitting calls and hang up every active one."""
+        self._closing = True
+        await asyncio.gather(*(self.hangup(sid) for sid in list(self._tasks)))
+        if self._recording_writer:
+            await self._recording_writer.aclose()
+
+    def stats(self):
+        totals = dict(self._finished_totals)
+        out_queue_depth = 0
+        for call in self.sessions.values():
+            call_stats = call.stats()
+            for key in totals:
+                totals[key] += call_stats[key]
+            out_queue_depth += call_stats["out_queue_depth"]
+        return {
+            "active_sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "out_queue_depth": out_queue_depth,
+            **totals,
+        }
+
+
+if __name__ == "__main__":
+    import pyaudio
+
+    from audio_io import MicrophoneSource, SpeakerSink
+    from event_log import EventLog
+
+    async def main():
+        pya = pyaudio.PyAudio()
+        event_log = EventLog()
+        # The local call plays through the speaker, so it needs echo handling.
+        server = CallServer(event_log=event_log, echo_cancel=True, barge_in_gate=True)
+        call = server.admit(MicrophoneSource(pya), SpeakerSink(pya))
+        print("Call server running one local call. Press Ctrl+C to stop.")
+        try:
+            await server.wait(call.session_id)
+        finally:
+            await server.shutdown()
+            pya.terminate()
+            event_log.close()
+            print(server.stats())
+
+    asyncio.run(main())
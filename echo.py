@@ -0,0 +1,363 @@
+"""Uplink stages that deal with the model's own voice coming back into the mic.
+
+``PlaybackReference`` keeps the last couple of seconds of exactly what the
+speaker played, stamped with when it reached the device; ``SpeakerSink``
+writes it from the playback callback. ``BargeInGate`` uses it while the model
+is talking: a capture chunk is forwarded only if its level is above
+``threshold_db`` and well above the echo expected from the reference over the
+same stretch of time. Once caller speech gets through, the gate stays open for
+``hangover_ms`` so the tail of the word is not cut off. With nothing playing
+every chunk passes.
+
+``EchoCanceller`` runs before the gate and subtracts an adaptive estimate of
+the echo from the capture stream, taking the same reference resampled to the
+capture rate. It costs roughly 0.2-0.3 ms of CPU per 16 ms block while the
+model is talking and next to nothing otherwise.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from live_config import CHUNK_SIZE, RECEIVE_SAMPLE_RATE, SAMPLE_WIDTH, SEND_SAMPLE_RATE
+from resample import StreamingResampler
+from vad import FRAME_MS, frame_levels_db
+
+REFERENCE_MS = 2000
+PLAYBACK_FLOOR_DB = -50.0  # reference quieter than this counts as silence
+BARGE_IN_THRESHOLD_DB = -36.5  # dBFS, ~0.015 RMS, as in the OpenAI demo's barge-in
+ECHO_RETURN_LOSS_DB = 20.0  # how much quieter the echo is at the mic than the reference
+ECHO_MARGIN_DB = 6.0  # caller speech must beat the expected echo by this much
+ECHO_TAIL_MS = 150  # how long after playback its echo can still reach the mic
+HANGOVER_MS = 300
+
+
+class PlaybackReference:
+    """Ring of recently played samples, written on the device thread."""
+
+    def __init__(self, rate=RECEIVE_SAMPLE_RATE, capacity_ms=REFERENCE_MS):
+        self.rate = rate
+        self.capacity = int(rate * capacity_ms / 1000)
+        self._samples = np.zeros(self.capacity, dtype=np.int16)
+        self._lock = threading.Lock()
+        self.write_pos = 0  # total samples written
+        self.end_time = None  # when the newest sample reaches the speaker
+        self.latency_s = 0.0  # output latency added to write times
+
+    def write(self, pcm, timestamp=None):
+        """Record ``pcm`` as played starting at ``timestamp`` (default: now + latency)."""
+        samples = np.frombuffer(pcm, dtype=np.int16)[-self.capacity:]
+        start_time = (time.monotonic() + self.latency_s) if timestamp is None else timestamp
+        with self._lock:
+            start = self.write_pos % self.capacity
+            first = min(len(samples), self.capacity - start)
+            self._samples[start:start + first] = samples[:first]
+            self._samples[:len(samples) - first] = samples[first:]
+            self.write_pos += len(samples)
+            self.end_time = start_time + len(samples) / self.rate
+
+    def window(self, start_time, end_time):
+        """Return a copy of the samples played between ``start_time`` and ``end_time``."""
+        with self._lock:
+            if self.end_time is None:
+                return np.empty(0, dtype=np.int16)
+            oldest = max(0, self.write_pos - self.capacity)
+            first = self.write_pos - int((self.end_time - start_time) * self.rate)
+            last = self.write_pos - int((self.end_time - end_time) * self.rate)
+            first, last = max(first, oldest), min(last, self.write_pos)
+            if last <= first:
+                return np.empty(0, dtype=np.int16)
+            begin, end = first % self.capacity, last % self.capacity or self.capacity
+            if begin < end:
+                return self._samples[begin:end].copy()
+            return np.concatenate((self._samples[begin:], self._samples[:end]))
+
+    def position_at(self, timestamp):
+        """The (fractional) sample index played at ``timestamp``, or None before any write."""
+        with self._lock:
+            if self.end_time is None:
+                return None
+            return self.write_pos - (self.end_time - timestamp) * self.rate
+
+    def read(self, first, last):
+        """Samples ``first`` to ``last`` by absolute index, zero where not (or no longer) held."""
+        out = np.zeros(last - first, dtype=np.int16)
+        with self._lock:
+            lo, hi = max(first, self.write_pos - self.capacity, 0), min(last, self.write_pos)
+            if lo >= hi:
+                return out
+            begin, end = lo % self.capacity, hi % self.capacity or self.capacity
+            if begin < end:
+                out[lo - first:hi - first] = self._samples[begin:end]
+            else:
+                split = self.capacity - begin
+                out[lo - first:lo - first + split] = self._samples[begin:]
+                out[lo - first + split:hi - first] = self._samples[:end]
+        return out
+
+
+class BargeInGate:
+    def __init__(
+        self,
+        reference,
+        rate=SEND_SAMPLE_RATE,
+        threshold_db=BARGE_IN_THRESHOLD_DB,
+        echo_return_loss_db=ECHO_RETURN_LOSS_DB,
+        margin_db=ECHO_MARGIN_DB,
+        echo_tail_ms=ECHO_TAIL_MS,
+        hangover_ms=HANGOVER_MS,
+        playback_floor_db=PLAYBACK_FLOOR_DB,
+    ):
+        self.reference = reference
+        self.rate = rate
+        self.frame_samples = int(rate * FRAME_MS / 1000)
+        self.reference_frame_samples = int(reference.rate * FRAME_MS / 1000)
+        self.threshold_db = threshold_db
+        self.echo_return_loss_db = echo_return_loss_db
+        self.margin_db = margin_db
+        self.echo_tail_s = echo_tail_ms / 1000
+        self.hangover_s = hangover_ms / 1000
+        self.playback_floor_db = playback_floor_db
+        self._open_until = 0.0
+        self.chunks_blocked = 0
+        self.chunks_passed = 0
+        self.barge_ins = 0
+
+    def reference_level_db(self, start_time, end_time):
+        """Loudest 10 ms of playback whose echo could overlap ``[start_time, end_time]``."""
+        samples = self.reference.window(start_time - self.echo_tail_s, end_time)
+        if not len(samples):
+            return None
+        return float(frame_levels_db(samples, self.reference_frame_samples).max())
+
+    def allow(self, chunk, capture_time=None):
+        """Return True if ``chunk`` (captured at ``capture_time``) should go on the uplink."""
+        duration = len(chunk) / (self.rate * SAMPLE_WIDTH)
+        if capture_time is None:
+            capture_time = time.monotonic() - duration
+        end_time = capture_time + duration
+
+        reference_db = self.reference_level_db(capture_time, end_time)
+        if reference_db is None or reference_db < self.playback_floor_db:
+            self.chunks_passed += 1
+            return True
+
+        mic_db = frame_levels_db(np.frombuffer(chunk, dtype=np.int16), self.frame_samples)
+        echo_db = reference_db - self.echo_return_loss_db + self.margin_db
+        speech = np.count_nonzero((mic_db > self.threshold_db) & (mic_db > echo_db))
+        if speech:
+            if capture_time >= self._open_until:
+                self.barge_ins += 1
+            self._open_until = end_time + self.hangover_s
+        if speech or capture_time < self._open_until:
+            self.chunks_passed += 1
+            return True
+        self.chunks_blocked += 1
+        return False
+
+    def stats(self):
+        return {
+            "chunks_passed": self.chunks_passed,
+            "chunks_blocked": self.chunks_blocked,
+            "barge_ins": self.barge_ins,
+        }
+
+
+AEC_BLOCK = CHUNK_SIZE  # capture samples per adaptation block
+AEC_PARTITIONS = 12  # filter length = partitions * block, 192 ms at 16 kHz
+AEC_STEP = 0.5  # normalised step size
+AEC_LEAD_MS = 16  # reference taken this far ahead of the capture clock
+AEC_RESYNC_MS = 20  # re-align the reference cursor if it drifts this far
+AEC_ERLE_BLOCKS = 64  # smoothing of the ERLE estimate, about 1 s
+AEC_MIN_ERLE_DB = 10.0  # below this the filter is still converging: always adapt
+DOUBLE_TALK_MARGIN_DB = 6.0  # block ERLE this far under the running ERLE is double talk
+DOUBLE_TALK_HOLD = 4  # blocks to keep adaptation frozen after double talk
+AEC_OUTPUT_MS = 1000  # output ring: a view returned by process() stays valid this long
+
+
+class EchoCanceller:
+    """Partitioned-block frequency-domain NLMS echo canceller for the uplink.
+
+    Each ``block`` of capture samples is matched with the reference that was
+    playing at the same time (read at a continuous sample cursor, resampled to
+    the capture rate) and the filtered reference is subtracted. The filter is
+    ``partitions`` blocks long and adapts with a normalised step per frequency
+    bin. Double talk is judged on the output: once the running echo return
+    loss enhancement (ERLE, mic over output energy) reaches ``min_erle_db``,
+    a block whose own ERLE falls ``double_talk_margin_db`` below it has
+    caller speech in it and adaptation freezes. Until then the filter always
+    adapts, so a far-end-only start converges instead of being mistaken for
+    double talk. When no playback reached the filter span, blocks pass
+    through without any FFTs.
+    """
+
+    def __init__(
+        self,
+        reference,
+        rate=SEND_SAMPLE_RATE,
+        block=AEC_BLOCK,
+        partitions=AEC_PARTITIONS,
+        step=AEC_STEP,
+        lead_ms=AEC_LEAD_MS,
+        min_erle_db=AEC_MIN_ERLE_DB,
+        double_talk_margin_db=DOUBLE_TALK_MARGIN_DB,
+    ):
+        self.reference = reference
+        self.rate = rate
+        self.block = block
+        self.partitions = partitions
+        self.step = step
+        self.lead_s = lead_ms / 1000
+        self.resync_samples = int(reference.rate * AEC_RESYNC_MS / 1000)
+        self.min_erle = 10 ** (min_erle_db / 10)
+        self.double_talk_margin = 10 ** (double_talk_margin_db / 10)
+        if block * reference.rate % rate:
+            raise ValueError(f"A {block}-sample block is not a whole number of reference samples")
+        self.reference_block = block * reference.rate // rate
+        self._resampler = StreamingResampler(reference.rate, rate)
+        bins = block + 1
+        self._weights = np.zeros((partitions, bins), dtype=np.complex64)
+        self._spectra = np.zeros((partitions, bins), dtype=np.complex64)  # newest first
+        self._power = np.full(bins, 1.0, dtype=np.float32)
+        self._peaks = np.zeros(partitions, dtype=np.float32)
+        self._energy = np.zeros(partitions, dtype=np.float32)
+        self._last_ref = np.zeros(block, dtype=np.float32)
+        self._pending = np.empty(0, dtype=np.int16)
+        self._out = np.empty(int(rate * AEC_OUTPUT_MS / 1000) // block * block, dtype=np.int16)
+        self._out_pos = 0
+        self._cursor = None  # reference sample aligned with the next block
+        self._double_talk_hold = 0
+        self._mic_level = 0.0  # smoothed energies behind the ERLE estimate
+        self._error_level = 0.0
+        self._double_talk_run = 0
+        self.blocks = 0
+        self.blocks_bypassed = 0
+        self.blocks_double_talk = 0
+        self.resyncs = 0
+        self.resets = 0
+        self.cpu_s = 0.0
+
+    def _reference_block(self, block_time):
+        """The next ``block`` reference samples at the capture rate, float32."""
+        reference = self.reference
+        expected = reference.position_at(block_time + self.lead_s)
+        if expected is None:
+            return None
+        if self._cursor is None or abs(expected - self._cursor) > self.resync_samples:
+            if self._cursor is not None:
+                self.resyncs += 1
+            self._cursor = int(expected)
+            self._resampler.reset()
+        x = reference.read(self._cursor, self._cursor + self.reference_block)
+        self._cursor += self.reference_block
+        return self._resampler.process_samples(x)
+
+    def process(self, chunk, capture_time=None):
+        """Return the echo-cancelled audio for ``chunk`` as a byte ``memoryview``.
+
+        The view aliases a preallocated output ring, like a ``PcmRingBuffer``
+        read: use it before another ``AEC_OUTPUT_MS`` of audio is processed.
+        Output lags input by less than one block when chunks are not a
+        multiple of ``block`` samples.
+        """
+        started = time.process_time()
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        if capture_time is None:
+            capture_time = time.monotonic() - len(samples) / self.rate
+        if len(self._pending):
+            capture_time -= len(self._pending) / self.rate
+            samples = np.concatenate((self._pending, samples))
+        block = self.block
+        blocks = len(samples) // block
+        size = blocks * block
+        if size > len(self._out):
+            self._out = np.empty(size, dtype=np.int16)
+            self._out_pos = 0
+        elif self._out_pos + size > len(self._out):
+            self._out_pos = 0
+        out = self._out[self._out_pos:self._out_pos + size]
+        self._out_pos += size
+        for i in range(blocks):
+            mic = samples[i * block:(i + 1) * block]
+            out[i * block:(i + 1) * block] = self._process_block(mic, capture_time + i * block / self.rate)
+        self._pending = samples[blocks * block:].copy()
+        self.cpu_s += time.process_time() - started
+        return memoryview(out).cast("B")
+
+    def _process_block(self, mic, block_time):
+        self.blocks += 1
+        block = self.block
+        ref = self._reference_block(block_time)
+        if ref is None:
+            ref = np.zeros(block, dtype=np.float32)
+
+        self._peaks[1:] = self._peaks[:-1]
+        self._peaks[0] = np.abs(ref).max(initial=0.0)
+        self._energy[1:] = self._energy[:-1]
+        self._energy[0] = np.dot(ref, ref)
+        reference_peak = self._peaks.max()
+        self._spectra[1:] = self._spectra[:-1]
+        if not reference_peak:
+            self._spectra[0] = 0
+            self._last_ref = ref
+            self.blocks_bypassed += 1
+            return mic
+
+        # Overlap-save: each spectrum covers the previous and the current block.
+        x_spectrum = np.fft.rfft(np.concatenate((self._last_ref, ref)))
+        self._last_ref = ref
+        self._spectra[0] = x_spectrum
+        y = np.fft.irfft((self._weights * self._spectra).sum(axis=0))[block:]
+        d = mic.astype(np.float32)
+        e = d - y
+
+        if np.dot(y, y) > 4.0 * (np.dot(d, d) + self._energy.sum()):
+            # The filter is louder than mic and reference together: it has
+            # diverged (e.g. the echo path changed abruptly), so start over.
+            self._weights[:] = 0
+            self.resets += 1
+            e = d
+
+        mic_energy, error_energy = float(np.dot(d, d)), float(np.dot(e, e))
+        erle = self._mic_level / self._error_level if self._error_level else 1.0
+        active = mic_energy > 0.1 * self._mic_level  # not a pause in the far end
+        if erle >= self.min_erle and active:
+            if error_energy * erle > self.double_talk_margin * mic_energy:
+                self._double_talk_hold = DOUBLE_TALK_HOLD
+                self._double_talk_run += 1
+            else:
+                self._double_talk_run = 0
+            if self._double_talk_run >= AEC_ERLE_BLOCKS:
+                # Too long for a caller talking over the model: more likely
+                # the echo path changed. Forget the ERLE so adaptation resumes.
+                self._mic_level = self._error_level = 0.0
+                self._double_talk_hold = self._double_talk_run = 0
+        if self._double_talk_hold:
+            self._double_talk_hold -= 1
+            self.blocks_double_talk += 1
+        else:
+            if active:
+                self._mic_level += (mic_energy - self._mic_level) / AEC_ERLE_BLOCKS
+                self._error_level += (error_energy - self._error_level) / AEC_ERLE_BLOCKS
+            power = (self._spectra.real ** 2 + self._spectra.imag ** 2).sum(axis=0)
+            self._power = 0.5 * self._power + 0.5 * power
+            e_spectrum = np.fft.rfft(np.concatenate((np.zeros(block, dtype=np.float32), e)))
+            gradient = self.step * np.conj(self._spectra) * e_spectrum / (self._power + 1e3)
+            # Constrain each partition to a causal block-long impulse response.
+            g = np.fft.irfft(gradient, axis=1)
+            g[:, block:] = 0
+            self._weights += np.fft.rfft(g, axis=1)
+
+        return np.clip(e, -32768, 32767).astype(np.int16)
+
+    def stats(self):
+        return {
+            "blocks": self.blocks,
+            "blocks_bypassed": self.blocks_bypassed,
+            "blocks_double_talk": self.blocks_double_talk,
+            "resyncs": self.resyncs,
+            "resets": self.resets,
+            "erle_db": float(10 * np.log10(self._mic_level / self._error_level)) if self._error_level else 0.0,
+            "cpu_ms": self.cpu_s * 1000,
+        }
@@ -0,0 +1,88 @@
+"""Structured, non-blocking event log that writes JSON lines.
+
+``EventLog.log()`` only builds a small dict and puts it on a bounded queue;
+JSON encoding and the actual write happen on a background thread, so a slow or
+piped stdout never stalls the event loop that also feeds playback. When the
+queue is full, events are dropped and counted rather than waited for.
+
+Events below ``level`` are discarded, and ``sample_rates`` keeps only a
+fraction of chosen event types (e.g. ``{"output_transcription": 0.1}``).
+"""
+
+import json
+import queue
+import sys
+import threading
+import time
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+MAX_PENDING_EVENTS = 10000
+
+_CLOSE = object()
+
+
+class EventLog:
+    def __init__(self, output=None, level="info", sample_rates=None, fields=None, max_pending=MAX_PENDING_EVENTS):
+        """``output`` is a path to append to or a text stream (default stdout)."""
+        if isinstance(output, str):
+            self._stream = open(output, "a", buffering=1 << 16)
+            self._owns_stream = True
+        else:
+            self._stream = output or sys.stdout
+            self._owns_stream = False
+        self.level = LEVELS[level]
+        self.sample_rates = dict(sample_rates or {})
+        self.fields = dict(fields or {})
+        self.dropped = 0
+        self._sample_credit = {}
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._write_loop, name="event-log", daemon=True)
+        self._thread.start()
+
+    def bind(self, **fields):
+        """Return a logger that adds ``fields`` (e.g. a session id) to every event."""
+        child = object.__new__(EventLog)
+        child.__dict__.update(self.__dict__)
+        child.fields = {**self.fields, **fields}
+        child._sample_credit = {}
+        return child
+
+    def enabled(self, level):
+        return LEVELS[level] >= self.level
+
+    def log(self, event, level="info", **fields):
+        if LEVELS[level] < self.level:
+            return
+        rate = self.sample_rates.get(event)
+        if rate is not None:
+            # Deterministic sampling: keep one event per 1/rate occurrences.
+            credit = self._sample_credit.get(event, 1.0) + rate
+            if credit < 1.0:
+                self._sample_credit[event] = credit
+                return
+            self._sample_credit[event] = credit - 1.0
+        record = {"ts": time.time(), "level": level, "event": event, **self.fields, **fields}
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        stream = self._stream
+        while True:
+            record = self._queue.get()
+            if record is _CLOSE:
+                break
+            stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            if self._queue.empty():
+                stream.flush()
+        stream.flush()
+
+    def close(self):
+        """Flush pending events and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self._owns_stream:
+            self._stream.close()
@@ -17,11 +17,20 @@
 
 import asyncio
 import base64
+import collections
 import contextlib
+import copy
+import dataclasses
+import datetime
+import functools
+import hashlib
 import json
 import logging
+import socket
+import time
 import typing
-from typing import Any, AsyncIterator, Optional, Sequence, Union, get_args
+from typing import Any, AsyncIterator, Callable, Optional, Sequence, Union, get_args
+import urllib.parse
 import warnings
 
 import google.auth
@@ -55,6 +64,13 @@ try:
 except ImportError:
   requests = None  # type: ignore[assignment]
 
+try:
+  from websockets.proxy import get_proxy
+  from websockets.uri import parse_uri
+except ImportError:
+  # websockets without proxy support never connects through one.
+  get_proxy = None  # type: ignore[assignment]
+
 if typing.TYPE_CHECKING:
   from mcp import ClientSession as McpClientSession
   from mcp.types import Tool as McpTool
@@ -82,6 +98,437 @@ _FUNCTION_RESPONSE_REQUIRES_ID = (
     ' response of a ToolCall.FunctionalCalls in Google AI.'
 )
 
+# Encodes to '+//+...' in standard and '-__-...' in url-safe base64, so the
+# rendered template also reveals which alphabet the converters use.
+_AUDIO_TEMPLATE_SENTINEL = b'\xfb\xff\xfe' * 4
+
+# (vertexai, mime_type) -> (prefix, base64 encoder, suffix)
+_REALTIME_AUDIO_TEMPLATES: dict[
+    tuple[bool, str], tuple[str, typing.Callable[[Any], bytes], str]
+] = {}
+
+
+_NOT_DECODED = object()
+
+# Serialized setup messages by _setup_cache_key(), least recently used first.
+_SETUP_CACHE: collections.OrderedDict[str, tuple[str, dict[str, Any]]] = (
+    collections.OrderedDict()
+)
+_MAX_CACHED_SETUPS = 64
+
+# (id(config), model, client settings) -> (config, copy of it, setup key), so
+# a config passed again unchanged skips validation, dumping and hashing.
+_SETUP_KEYS: collections.OrderedDict[
+    tuple[Any, ...], tuple[Any, Any, Optional[str]]
+] = collections.OrderedDict()
+
+
+def _json_default(value: Any) -> Any:
+  if isinstance(value, pydantic.BaseModel):
+    return value.model_dump(mode='json', exclude_none=True)
+  raise TypeError(f'{type(value).__name__} is not cacheable')
+
+
+def _setup_cache_key(
+    api_client: BaseApiClient,
+    model: str,
+    config: Optional[types.LiveConnectConfigOrDict],
+) -> Optional[str]:
+  """Stable hash of everything the setup message is built from.
+
+  Returns None for configs that must be rebuilt on every connect: tools may
+  be MCP sessions whose tool list can change, and anything that does not
+  serialize has no stable key.
+  """
+  if config is not None and getv(config, ['tools']):
+    return None
+  try:
+    key = json.dumps(
+        [model, config, *_client_settings(api_client)],
+        sort_keys=True,
+        default=_json_default,
+    )
+  except (TypeError, ValueError):
+    return None
+  return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _client_settings(api_client: BaseApiClient) -> tuple[Any, ...]:
+  return (
+      api_client.vertexai,
+      api_client._http_options.api_version,
+      api_client.project,
+      api_client.location,
+      api_client.custom_base_url,
+      bool(api_client.api_key),
+  )
+
+
+def _lookup_setup_key(
+    api_client: BaseApiClient,
+    model: str,
+    config: Optional[types.LiveConnectConfigOrDict],
+) -> Optional[str]:
+  """`_setup_cache_key()` of the config as the caller passed it.
+
+  The key of a config object seen before is reused as long as the object
+  still equals the copy taken then, so editing a dict in place is noticed.
+  """
+  identity = (id(config), model, *_client_settings(api_client))
+  entry = _SETUP_KEYS.get(identity)
+  if entry is not None and entry[0] is config and entry[1] == config:
+    _SETUP_KEYS.move_to_end(identity)
+    return entry[2]
+  key = _setup_cache_key(api_client, model, config)
+  if key is None:
+    return None
+  try:
+    snapshot = copy.deepcopy(config)
+  except Exception:  # pylint: disable=broad-exception-caught
+    return key
+  _SETUP_KEYS[identity] = (config, snapshot, key)
+  while len(_SETUP_KEYS) > _MAX_CACHED_SETUPS:
+    _SETUP_KEYS.popitem(last=False)
+  return key
+
+
+def _cache_setup(key: str, setup: tuple[str, dict[str, Any]]) -> None:
+  _SETUP_CACHE[key] = setup
+  while len(_SETUP_CACHE) > _MAX_CACHED_SETUPS:
+    _SETUP_CACHE.popitem(last=False)
+
+
+def clear_setup_cache() -> None:
+  """Forget every cached setup message.
+
+  Not needed when a config changes, since the config is part of the key.
+  """
+  _SETUP_CACHE.clear()
+  _SETUP_KEYS.clear()
+
+
+_CLOUD_PLATFORM_SCOPES = ['https://www.googleapis.com/auth/cloud-platform']
+# Refresh this long before the token expires; google-auth itself treats a
+# token as expired a few minutes early.
+_TOKEN_REFRESH_MARGIN_S = 600.0
+_TOKEN_RETRY_S = 30.0
+
+
+class CredentialProvider:
+  """Keeps a bearer token ready for Vertex connects, off the event loop.
+
+  ``google.auth.default()`` and ``creds.refresh()`` are blocking HTTP calls
+  (metadata server, token endpoint), so both run in a worker thread. After
+  the first token, a background task refreshes it ``_TOKEN_REFRESH_MARGIN_S``
+  before expiry, and ``bearer_token()`` returns without awaiting anything.
+  Concurrent callers that do need a refresh share one.
+  """
+
+  def __init__(self, credentials: Any = None):
+    self._credentials = credentials
+    self._refreshing: Optional[asyncio.Future[None]] = None
+    self._scheduled: Optional[asyncio.Task[None]] = None
+    # The client (and this provider) can outlive an event loop, e.g. across
+    # asyncio.run() calls; a task left on a closed loop never finishes, so
+    # each task is only trusted on the loop it was created on.
+    self._refreshing_loop: Optional[asyncio.AbstractEventLoop] = None
+    self._scheduled_loop: Optional[asyncio.AbstractEventLoop] = None
+
+  def _seconds_left(self) -> Optional[float]:
+    expiry = getattr(self._credentials, 'expiry', None)
+    if expiry is None:
+      return None
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return (expiry - now).total_seconds()
+
+  def _refresh_sync(self) -> None:
+    if self._credentials is None:
+      # Get bearer token through Application Default Credentials.
+      self._credentials, _ = google.auth.default(  # type: ignore
+          scopes=_CLOUD_PLATFORM_SCOPES
+      )
+    if requests is None:
+      raise ValueError('The requests module is required to refresh google-auth credentials. Please install with `pip install google-auth[requests]`')
+    self._credentials.refresh(requests.Request())  # type: ignore
+
+  async def refresh(self) -> None:
+    """Refresh in a worker thread, joining a refresh already under way."""
+    loop = asyncio.get_running_loop()
+    if self._refreshing is None or self._refreshing_loop is not loop:
+      self._refreshing = loop.create_task(
+          asyncio.to_thread(self._refresh_sync)
+      )
+      self._refreshing_loop = loop
+    refreshing = self._refreshing
+    try:
+      await asyncio.shield(refreshing)
+    finally:
+      if self._refreshing is refreshing and refreshing.done():
+        self._refreshing = None
+    self._schedule()
+
+  def _schedule(self) -> None:
+    loop = asyncio.get_running_loop()
+    if (
+        self._scheduled is not None
+        and self._scheduled_loop is loop
+        and not self._scheduled.done()
+    ):
+      return
+    seconds_left = self._seconds_left()
+    if seconds_left is None:
+      return
+    self._refresh_in(seconds_left - _TOKEN_REFRESH_MARGIN_S)
+
+  def _refresh_in(self, delay: float) -> None:
+    loop = asyncio.get_running_loop()
+    self._scheduled = loop.create_task(self._refresh_later(delay))
+    self._scheduled_loop = loop
+
+  async def _refresh_later(self, delay: float) -> None:
+    await asyncio.sleep(max(0.0, delay))
+    self._scheduled = None
+    try:
+      await self.refresh()
+    except Exception as e:  # pylint: disable=broad-except
+      # The token is still valid for a while; try again before it expires.
+      logger.warning('Background credential refresh failed: %s', e)
+      self._refresh_in(_TOKEN_RETRY_S)
+
+  async def bearer_token(self) -> str:
+    creds = self._credentials
+    if creds is None or not (creds.token and creds.valid):
+      await self.refresh()
+      creds = self._credentials
+    else:
+      self._schedule()
+    return creds.token
+
+
+def _credential_provider(api_client: BaseApiClient) -> CredentialProvider:
+  """The provider shared by every connect on ``api_client``."""
+  provider = getattr(api_client, '_live_credential_provider', None)
+  if provider is None:
+    provider = CredentialProvider(api_client._credentials)
+    api_client._live_credential_provider = provider  # type: ignore[attr-defined]
+  return provider
+
+
+@dataclasses.dataclass
+class ConnectTimings:
+  """[Preview] Where the time of one `AsyncLive.connect` went, in milliseconds.
+
+  `config_ms` covers everything before the network that is not the
+  credential fetch: config and model transforms (mostly skipped when the
+  setup message is cached, see `setup_cached`), serialization and headers.
+  `credentials_ms` is 0 unless a Vertex bearer token had to be awaited.
+  `dns_ms`, `tcp_ms` and `tls_ms` are None when websockets opened the
+  connection itself (through a proxy, or with a websockets version without
+  the asyncio client); the whole handshake is then in `upgrade_ms`.
+  `setup_complete_ms` runs from the setup message being sent to the
+  server's reply, so it is the server's share. A failed connect is reported
+  too, with `error` set and the phases it did not reach left as None.
+  """
+
+  config_ms: float = 0.0
+  credentials_ms: float = 0.0
+  dns_ms: Optional[float] = None
+  tcp_ms: Optional[float] = None
+  tls_ms: Optional[float] = None
+  upgrade_ms: Optional[float] = None
+  setup_send_ms: Optional[float] = None
+  setup_complete_ms: Optional[float] = None
+  total_ms: float = 0.0
+  setup_cached: bool = False
+  address: Optional[str] = None
+  error: Optional[str] = None
+
+
+def _elapsed_ms(since: float) -> float:
+  return (time.perf_counter() - since) * 1000
+
+
+if ClientConnection.__module__.startswith('websockets.asyncio'):
+
+  class _TimedClientConnection(ClientConnection):
+    """Notes when the transport, TLS included, is ready for the upgrade."""
+
+    transport_ready_at: Optional[float] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+      self.transport_ready_at = time.perf_counter()
+      super().connection_made(transport)
+
+else:
+  _TimedClientConnection = None  # type: ignore[assignment,misc]
+
+
+async def _connect_socket(
+    host: str, port: int, timings: ConnectTimings
+) -> socket.socket:
+  """Resolves `host` and connects to the first address that accepts."""
+  loop = asyncio.get_running_loop()
+  started = time.perf_counter()
+  addresses = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+  timings.dns_ms = _elapsed_ms(started)
+  started = time.perf_counter()
+  error: Optional[OSError] = None
+  for family, type_, proto, _, address in addresses:
+    sock = socket.socket(family, type_, proto)
+    sock.setblocking(False)
+    try:
+      await loop.sock_connect(sock, address)
+    except OSError as e:
+      sock.close()
+      error = e
+      continue
+    except BaseException:
+      # Timed out or cancelled mid-connect.
+      sock.close()
+      raise
+    timings.tcp_ms = _elapsed_ms(started)
+    timings.address = str(address[0])
+    return sock
+  raise error or OSError(f'No address found for {host}')
+
+
+@contextlib.asynccontextmanager
+async def _timed_ws_connect(
+    uri: str,
+    headers: Optional[dict[str, str]],
+    connect_kwargs: _common.StringDict,
+    timings: ConnectTimings,
+) -> AsyncIterator[ClientConnection]:
+  """`ws_connect` that records the DNS, TCP, TLS and upgrade phases."""
+  started = time.perf_counter()
+  parts = urllib.parse.urlsplit(uri)
+  use_proxy = get_proxy is not None and get_proxy(parse_uri(uri)) is not None
+  if _TimedClientConnection is None or use_proxy or 'sock' in connect_kwargs:
+    async with ws_connect(
+        uri, additional_headers=headers, **connect_kwargs
+    ) as ws:
+      timings.upgrade_ms = _elapsed_ms(started)
+      yield ws
+    return
+
+  port = parts.port or (443 if parts.scheme == 'wss' else 80)
+  # ws_connect's open_timeout (10 s by default) only starts once it has the
+  # socket, so DNS and TCP get the same budget here and the handshake the
+  # rest of it: the whole connect stays within open_timeout.
+  open_timeout = connect_kwargs.get('open_timeout', 10)
+  sock = await asyncio.wait_for(
+      _connect_socket(parts.hostname or '', port, timings), open_timeout
+  )
+  connected_at = time.perf_counter()
+  if open_timeout is not None:
+    connect_kwargs = {
+        **connect_kwargs,
+        'open_timeout': max(0.0, open_timeout - (connected_at - started)),
+    }
+  # The socket belongs to the connection once the handshake starts; closing
+  # it again if the handshake fails is harmless.
+  with contextlib.closing(sock):
+    async with ws_connect(
+        uri,
+        additional_headers=headers,
+        sock=sock,
+        create_connection=_TimedClientConnection,
+        **connect_kwargs,
+    ) as ws:
+      ready_at = ws.transport_ready_at or connected_at
+      if parts.scheme == 'wss':
+        timings.tls_ms = (ready_at - connected_at) * 1000
+      timings.upgrade_ms = _elapsed_ms(ready_at)
+      yield ws
+
+
+def _decode_inline_data(data: str) -> bytes:
+  # Accepts both the standard and the url-safe base64 alphabet, like the
+  # pydantic `Blob` validation does.
+  return base64.b64decode(data, altchars=b'-_')
+
+
+def _audio_only_parts(response: _common.StringDict) -> Optional[list[Any]]:
+  """Returns the parts of a frame that carries nothing but inline audio."""
+  if len(response) != 1:
+    return None
+  server_content = response.get('serverContent')
+  if not isinstance(server_content, dict) or len(server_content) != 1:
+    return None
+  model_turn = server_content.get('modelTurn')
+  if not isinstance(model_turn, dict) or len(model_turn) != 1:
+    return None
+  parts = model_turn.get('parts')
+  if not parts:
+    return None
+  for part in parts:
+    inline_data = part.get('inlineData') if len(part) == 1 else None
+    if not inline_data or not inline_data.get('mimeType', '').startswith(
+        'audio/'
+    ):
+      return None
+  return parts
+
+
+class LazyLiveServerMessage:
+  """[Preview] A server message that is only validated when needed.
+
+  Frames that carry nothing but inline audio expose the decoded PCM as `data`
+  without building a `types.LiveServerMessage`. Any other attribute, e.g.
+  `server_content` or `usage_metadata`, parses and validates the full message
+  once and delegates to it, so the object can be used in place of a
+  `types.LiveServerMessage`.
+  """
+
+  __slots__ = ('_response', '_vertexai', '_data', '_message')
+
+  def __init__(
+      self,
+      response: _common.StringDict,
+      vertexai: bool,
+      data: Any = _NOT_DECODED,
+  ):
+    self._response = response
+    self._vertexai = vertexai
+    self._data = data
+    self._message: Optional[types.LiveServerMessage] = None
+
+  @property
+  def is_audio(self) -> bool:
+    """True if the frame is audio only and `data` needed no validation."""
+    return self._data is not _NOT_DECODED
+
+  @property
+  def data(self) -> Optional[bytes]:
+    if self._data is _NOT_DECODED:
+      return self.message.data
+    return self._data
+
+  @property
+  def turn_complete(self) -> bool:
+    server_content = self._response.get('serverContent')
+    return bool(server_content and server_content.get('turnComplete'))
+
+  @property
+  def message(self) -> types.LiveServerMessage:
+    """The fully validated message."""
+    if self._message is None:
+      if self._vertexai:
+        response_dict = live_converters._LiveServerMessage_from_vertex(
+            self._response
+        )
+      else:
+        response_dict = self._response
+      self._message = types.LiveServerMessage._from_response(
+          response=response_dict, kwargs={}
+      )
+    return self._message
+
+  def __getattr__(self, name: str) -> Any:
+    if name.startswith('_'):
+      raise AttributeError(name)
+    return getattr(self.message, name)
+
 
 class AsyncSession:
   """[Preview] AsyncSession."""
@@ -95,6 +542,8 @@ class AsyncSession:
     self._api_client = api_client
     self._ws = websocket
     self.session_id = session_id
+    # Set by `AsyncLive.connect`.
+    self.connect_timings: Optional[ConnectTimings] = None
 
   async def send(
       self,
@@ -320,6 +769,63 @@ class AsyncSession:
           f'Only one argument can be set, got {len(kwargs)}:'
           f' {list(kwargs.keys())}'
       )
+    await self._ws.send(self._realtime_input_message(kwargs))
+
+  async def send_realtime_audio(
+      self,
+      data: Union[bytes, bytearray, memoryview],
+      mime_type: str = 'audio/pcm',
+  ) -> None:
+    """Send one chunk of raw audio, skipping validation and conversion.
+
+    Produces exactly the frame that `send_realtime_input(audio=...)` sends,
+    but builds it by splicing the base64 payload into a cached template
+    instead of validating a `Blob` and running the converters per chunk.
+    `data` can be any bytes-like object, so a `memoryview` into a capture
+    ring buffer is encoded without an intermediate copy.
+
+    Args:
+      data: Raw audio bytes, e.g. 16-bit PCM.
+      mime_type: The MIME type of the audio.
+
+    Example:
+
+    .. code-block:: python
+
+      async with client.aio.live.connect(model='...', config=config) as session:
+        while chunk := await mic.read():
+          await session.send_realtime_audio(chunk, 'audio/pcm;rate=16000')
+    """
+    prefix, b64encode, suffix = self._realtime_audio_template(mime_type)
+    await self._ws.send(prefix + b64encode(data).decode('ascii') + suffix)
+
+  def _realtime_audio_template(
+      self, mime_type: str
+  ) -> tuple[str, typing.Callable[[Any], bytes], str]:
+    key = (bool(self._api_client.vertexai), mime_type)
+    template = _REALTIME_AUDIO_TEMPLATES.get(key)
+    if template is None:
+      # Render the regular message once around a sentinel payload, so the
+      # template always matches whatever the converters produce.
+      message = self._realtime_input_message({
+          'audio': types.Blob(
+              data=_AUDIO_TEMPLATE_SENTINEL, mime_type=mime_type
+          )
+      })
+      for b64encode in (base64.urlsafe_b64encode, base64.b64encode):
+        marker = b64encode(_AUDIO_TEMPLATE_SENTINEL).decode('ascii')
+        if message.count(marker) == 1:
+          prefix, _, suffix = message.partition(marker)
+          template = (prefix, b64encode, suffix)
+          break
+      else:
+        raise ValueError(
+            f'Unable to build a realtime audio template from {message!r}'
+        )
+      _REALTIME_AUDIO_TEMPLATES[key] = template
+    return template
+
+  def _realtime_input_message(self, kwargs: _common.StringDict) -> str:
     realtime_input = types.LiveSendRealtimeInputParameters.model_validate(
         kwargs
     )
@@ -340,7 +846,7 @@ class AsyncSession:
     realtime_input_dict = _common.encode_unserializable_types(
         realtime_input_dict
     )
-    await self._ws.send(json.dumps({'realtime_input': realtime_input_dict}))
+    return json.dumps({'realtime_input': realtime_input_dict})
 
   async def send_tool_response(
       self,
@@ -456,6 +962,33 @@ class AsyncSession:
         break
       yield result
 
+  async def receive_lazy(self) -> AsyncIterator[LazyLiveServerMessage]:
+    """Receive model responses, validating only the frames that need it.
+
+    Same turn semantics as `receive`, but yields `LazyLiveServerMessage`s:
+    audio-only frames carry the decoded PCM in `data` and skip pydantic
+    validation entirely; other frames are validated on first attribute
+    access.
+
+    Yields:
+      The model responses from the server.
+
+    Example usage:
+
+    .. code-block:: python
+
+      async with client.aio.live.connect(model='...', config=config) as session:
+        async for message in session.receive_lazy():
+          if message.is_audio:
+            play(message.data)
+          elif message.server_content and message.server_content.interrupted:
+            stop_playback()
+    """
+    while result := await self._receive_lazy():
+      yield result
+      if result.turn_complete:
+        break
+
   async def start_stream(
       self, *, stream: AsyncIterator[bytes], mime_type: str
   ) -> AsyncIterator[types.LiveServerMessage]:
@@ -500,33 +1033,30 @@ class AsyncSession:
         DeprecationWarning,
         stacklevel=4,
     )
-    stop_event = asyncio.Event()
-    # Start the send loop. When stream is complete stop_event is set.
-    asyncio.create_task(self._send_loop(stream, mime_type, stop_event))
-    recv_task = None
-    while not stop_event.is_set():
-      try:
-        recv_task = asyncio.create_task(self._receive())
-        await asyncio.wait(
-            [
-                recv_task,
-                asyncio.create_task(stop_event.wait()),
-            ],
-            return_when=asyncio.FIRST_COMPLETED,
-        )
-        if recv_task.done():
-          yield recv_task.result()
-          # Give a chance for the send loop to process requests.
-          await asyncio.sleep(10**-12)
-      except ConnectionClosed:
-        break
-    if recv_task is not None and not recv_task.done():
-      recv_task.cancel()
-      # Wait for the task to finish (cancelled or not)
+    async with LiveDuplexStream(
+        self,
+        send=functools.partial(self._send_media_chunk, mime_type=mime_type),
+        lazy=False,
+    ) as duplex:
+
+      async def feed() -> None:
+        try:
+          async for data in stream:
+            await duplex.send(data)
+          # Let the sender flush the input, then stop after the messages that
+          # were already received.
+          await duplex.drain()
+          await duplex.finish()
+        except Exception as e:  # pylint: disable=broad-except
+          await duplex.finish(error=e)
+
+      feeder = asyncio.create_task(feed())
       try:
-        await recv_task
-      except asyncio.CancelledError:
-        pass
+        async for message in duplex:
+          yield message
+      finally:
+        feeder.cancel()
+        await asyncio.gather(feeder, return_exceptions=True)
 
   async def _receive(self) -> types.LiveServerMessage:
     parameter_model = types.LiveServerMessage()
@@ -551,21 +1081,37 @@ class AsyncSession:
         response=response_dict, kwargs=parameter_model.model_dump()
     )
 
-  async def _send_loop(
-      self,
-      data_stream: AsyncIterator[bytes],
-      mime_type: str,
-      stop_event: asyncio.Event,
-  ) -> None:
-    async for data in data_stream:
-      model_input = types.LiveClientRealtimeInput(
-          media_chunks=[types.Blob(data=data, mime_type=mime_type)]
+  async def _receive_lazy(self) -> Optional[LazyLiveServerMessage]:
+    try:
+      raw_response = await self._ws.recv(decode=False)
+    except TypeError:
+      raw_response = await self._ws.recv()  # type: ignore[assignment]
+    if not raw_response:
+      return None
+    try:
+      response = json.loads(raw_response)
+    except json.decoder.JSONDecodeError:
+      raise ValueError(f'Failed to parse response: {raw_response!r}')
+
+    vertexai = bool(self._api_client.vertexai)
+    parts = _audio_only_parts(response)
+    if parts is None:
+      return LazyLiveServerMessage(response, vertexai)
+    if len(parts) == 1:
+      data = _decode_inline_data(parts[0]['inlineData']['data'])
+    else:
+      data = b''.join(
+          _decode_inline_data(part['inlineData']['data']) for part in parts
       )
-      await self.send(input=model_input)
-      # Give a chance for the receive loop to process responses.
-      await asyncio.sleep(10**-12)
-    # Give a chance for the receiver to process the last response.
-    stop_event.set()
+    return LazyLiveServerMessage(response, vertexai, data)
+
+  async def _send_media_chunk(self, data: bytes, mime_type: str) -> None:
+    # The deprecated `send` wire format, without a warning per chunk.
+    model_input = types.LiveClientRealtimeInput(
+        media_chunks=[types.Blob(data=data, mime_type=mime_type)]
+    )
+    client_message = self._parse_client_message(model_input)
+    await self._ws.send(json.dumps(client_message))
 
   def _parse_client_message(
       self,
@@ -874,17 +1420,200 @@ class AsyncSession:
     await self._ws.close()
 
 
+_STREAM_END = object()
+
+
+class LiveDuplexStream:
+  """[Preview] Full-duplex streaming over an `AsyncSession`.
+
+  Runs exactly two long-lived tasks: a sender that drains a bounded send
+  queue into the websocket and a receiver that reads server messages into a
+  bounded receive queue. A full send queue makes `send` wait and a full
+  receive queue stops reading from the socket, so backpressure reaches the
+  producer and the server instead of piling up in memory. No task is created
+  per message.
+
+  Usage:
+
+  .. code-block:: python
+
+    async with client.aio.live.connect(model='...', config=config) as session:
+      async with LiveDuplexStream(session) as stream:
+
+        async def pump_mic():
+          while chunk := await mic.read():
+            await stream.send(chunk)
+          await stream.end_input()
+
+        mic_task = asyncio.create_task(pump_mic())
+        async for message in stream:
+          if message.data:
+            play(message.data)
+  """
+
+  def __init__(
+      self,
+      session: 'AsyncSession',
+      *,
+      send: Optional[typing.Callable[[Any], typing.Awaitable[None]]] = None,
+      mime_type: str = 'audio/pcm',
+      send_queue_size: int = 32,
+      receive_queue_size: int = 64,
+      lazy: bool = True,
+  ):
+    """Initializes the stream.
+
+    Args:
+      session: The session to stream over.
+      send: Coroutine function used to send one queued item. Defaults to
+        `session.send_realtime_audio` with `mime_type`.
+      mime_type: The MIME type of the audio passed to `send`.
+      send_queue_size: Items `send` may queue before it waits.
+      receive_queue_size: Messages buffered before the receiver stops
+        reading from the socket.
+      lazy: Yield `LazyLiveServerMessage`s instead of validated
+        `types.LiveServerMessage`s.
+    """
+    self._session = session
+    if send is None:
+      send = functools.partial(
+          session.send_realtime_audio, mime_type=mime_type
+      )
+    self._send = send
+    self._receive = session._receive_lazy if lazy else session._receive
+    self._send_queue: asyncio.Queue[Any] = asyncio.Queue(
+        maxsize=send_queue_size
+    )
+    self._receive_queue: asyncio.Queue[Any] = asyncio.Queue(
+        maxsize=receive_queue_size
+    )
+    self._tasks: list[asyncio.Task[None]] = []
+    self._error: Optional[BaseException] = None
+    self._finished = False
+
+  async def __aenter__(self) -> 'LiveDuplexStream':
+    self.start()
+    return self
+
+  async def __aexit__(self, *exc_info: Any) -> None:
+    await self.close()
+
+  @property
+  def pending_send(self) -> int:
+    return self._send_queue.qsize()
+
+  @property
+  def pending_receive(self) -> int:
+    return self._receive_queue.qsize()
+
+  def start(self) -> None:
+    if not self._tasks:
+      self._tasks = [
+          asyncio.create_task(self._send_loop()),
+          asyncio.create_task(self._receive_loop()),
+      ]
+
+  async def send(self, data: Any) -> None:
+    """Queues one item for sending, waiting while the send queue is full."""
+    await self._send_queue.put(data)
+
+  async def end_input(self) -> None:
+    """Sends `audio_stream_end` after the queued input and stops the sender."""
+    await self._send_queue.put(_STREAM_END)
+
+  async def drain(self) -> None:
+    """Waits until everything queued so far has been sent."""
+    await self._send_queue.join()
+
+  async def finish(self, error: Optional[BaseException] = None) -> None:
+    """Ends iteration after the messages already received (or with `error`)."""
+    if error is not None:
+      self._error = error
+    await self._receive_queue.put(_STREAM_END)
+
+  async def close(self) -> None:
+    """Cancels both tasks and waits for them to exit."""
+    for task in self._tasks:
+      task.cancel()
+    await asyncio.gather(*self._tasks, return_exceptions=True)
+    self._finished = True
+
+  async def _send_loop(self) -> None:
+    try:
+      while True:
+        data = await self._send_queue.get()
+        try:
+          if data is _STREAM_END:
+            await self._session.send_realtime_input(audio_stream_end=True)
+            return
+          await self._send(data)
+        finally:
+          self._send_queue.task_done()
+    except ConnectionClosed:
+      pass
+    except Exception as e:  # pylint: disable=broad-except
+      await self.finish(error=e)
+
+  async def _receive_loop(self) -> None:
+    try:
+      while True:
+        message = await self._receive()
+        if message is not None:
+          await self._receive_queue.put(message)
+    except ConnectionClosed:
+      await self.finish()
+    except Exception as e:  # pylint: disable=broad-except
+      await self.finish(error=e)
+
+  def __aiter__(self) -> 'LiveDuplexStream':
+    return self
+
+  async def __anext__(self) -> Any:
+    if not self._finished:
+      message = await self._receive_queue.get()
+      if message is not _STREAM_END:
+        return message
+      self._finished = True
+    if self._error is not None:
+      error, self._error = self._error, None
+      raise error
+    raise StopAsyncIteration
+
+
 class AsyncLive(_api_module.BaseModule):
   """[Preview] AsyncLive."""
 
   def __init__(self, api_client: BaseApiClient):
     super().__init__(api_client)
     self._music = AsyncLiveMusic(api_client)
+    self._connect_timings_callbacks: list[Callable[[ConnectTimings], Any]] = []
 
   @property
   def music(self) -> AsyncLiveMusic:
     return self._music
 
+  def add_connect_timings_callback(
+      self, callback: Callable[[ConnectTimings], Any]
+  ) -> Callable[[], None]:
+    """[Preview] Calls `callback(timings)` after every connect attempt.
+
+    `timings` is a `ConnectTimings`, also available as
+    `session.connect_timings`. The callback runs on the event loop right
+    after setupComplete (or the failure), so it should only record.
+
+    Returns:
+      A function that removes the callback.
+    """
+    self._connect_timings_callbacks.append(callback)
+    return lambda: self._connect_timings_callbacks.remove(callback)
+
+  def _report_connect_timings(self, timings: ConnectTimings) -> None:
+    for callback in self._connect_timings_callbacks:
+      try:
+        callback(timings)
+      except Exception:  # pylint: disable=broad-except
+        logger.exception('Connect timings callback failed')
+
   @contextlib.asynccontextmanager
   async def connect(
       self,
@@ -921,22 +1650,34 @@ class AsyncLive(_api_module.BaseModule):
     Yields:
       An AsyncSession object.
     """
-    # TODO(b/404946570): Support per request http options.
-    if isinstance(config, dict):
-      config = types.LiveConnectConfig(**config)
-    if config and config.http_options:
-      raise ValueError(
-          'google.genai.client.aio.live.connect() does not support'
-          ' http_options at request-level in LiveConnectConfig yet. Please use'
-          ' the client-level http_options configuration instead.'
-      )
+    started = time.perf_counter()
+    timings = ConnectTimings()
+    # The setup message only depends on the model, the config and the client
+    # settings, so identical sessions reuse the serialized one. The key is
+    # looked up before validation, which only a new config has to pay for.
+    cache_key = _lookup_setup_key(self._api_client, model, config)
+    cached_setup = _SETUP_CACHE.get(cache_key) if cache_key else None
+    if cached_setup is None:
+      # TODO(b/404946570): Support per request http options.
+      if isinstance(config, dict):
+        config = types.LiveConnectConfig(**config)
+      if config and config.http_options:
+        raise ValueError(
+            'google.genai.client.aio.live.connect() does not support'
+            ' http_options at request-level in LiveConnectConfig yet. Please'
+            ' use the client-level http_options configuration instead.'
+        )
 
     base_url = self._api_client._websocket_base_url()
     if isinstance(base_url, bytes):
       base_url = base_url.decode('utf-8')
-    transformed_model = t.t_model(self._api_client, model)  # type: ignore
-
-    parameter_model = await _t_live_connect_config(self._api_client, config)
+    if cached_setup is not None:
+      _SETUP_CACHE.move_to_end(cache_key)
+      request, setup_kwargs = cached_setup
+    else:
+      transformed_model = t.t_model(self._api_client, model)  # type: ignore
+      parameter_model = await _t_live_connect_config(self._api_client, config)
+      setup_kwargs = parameter_model.model_dump()
 
     if self._api_client.api_key and not self._api_client.vertexai:
       version = self._api_client._http_options.api_version
@@ -966,20 +1707,21 @@ class AsyncLive(_api_module.BaseModule):
           )
       uri = f'{base_url}/ws/google.ai.generativelanguage.{version}.GenerativeService.{method}'
 
-      request_dict = _common.convert_to_dict(
-          live_converters._LiveConnectParameters_to_mldev(
-              api_client=self._api_client,
-              from_object=types.LiveConnectParameters(
-                  model=transformed_model,
-                  config=parameter_model,
-              ).model_dump(exclude_none=True),
-          )
-      )
-      del request_dict['config']
+      if cached_setup is None:
+        request_dict = _common.convert_to_dict(
+            live_converters._LiveConnectParameters_to_mldev(
+                api_client=self._api_client,
+                from_object=types.LiveConnectParameters(
+                    model=transformed_model,
+                    config=parameter_model,
+                ).model_dump(exclude_none=True),
+            )
+        )
+        del request_dict['config']
 
-      setv(request_dict, ['setup', 'model'], transformed_model)
+        setv(request_dict, ['setup', 'model'], transformed_model)
 
-      request = json.dumps(request_dict)
+        request = json.dumps(request_dict)
     elif self._api_client.api_key and self._api_client.vertexai:
       # Headers already contains api key for express mode.
       api_key = self._api_client.api_key
@@ -988,20 +1730,21 @@ class AsyncLive(_api_module.BaseModule):
       original_headers = self._api_client._http_options.headers
       headers = original_headers.copy() if original_headers is not None else {}
 
-      request_dict = _common.convert_to_dict(
-          live_converters._LiveConnectParameters_to_vertex(
-              api_client=self._api_client,
-              from_object=types.LiveConnectParameters(
-                  model=transformed_model,
-                  config=parameter_model,
-              ).model_dump(exclude_none=True),
-          )
-      )
-      del request_dict['config']
+      if cached_setup is None:
+        request_dict = _common.convert_to_dict(
+            live_converters._LiveConnectParameters_to_vertex(
+                api_client=self._api_client,
+                from_object=types.LiveConnectParameters(
+                    model=transformed_model,
+                    config=parameter_model,
+                ).model_dump(exclude_none=True),
+            )
+        )
+        del request_dict['config']
 
-      setv(request_dict, ['setup', 'model'], transformed_model)
+        setv(request_dict, ['setup', 'model'], transformed_model)
 
-      request = json.dumps(request_dict)
+        request = json.dumps(request_dict)
     else:
       version = self._api_client._http_options.api_version
       has_sufficient_auth = (
@@ -1012,7 +1755,8 @@ class AsyncLive(_api_module.BaseModule):
         # Enable custom url if auth is not sufficient.
         uri = self._api_client.custom_base_url
         # Keep the model as is.
-        transformed_model = model
+        if cached_setup is None:
+          transformed_model = model
         # Do not get credentials for custom url.
         original_headers = self._api_client._http_options.headers
         headers = (
@@ -1022,76 +1766,93 @@ class AsyncLive(_api_module.BaseModule):
       else:
         uri = f'{base_url}/ws/google.cloud.aiplatform.{version}.LlmBidiService/BidiGenerateContent'
 
-        if not self._api_client._credentials:
-          # Get bearer token through Application Default Credentials.
-          creds, _ = google.auth.default(  # type: ignore
-              scopes=['https://www.googleapis.com/auth/cloud-platform']
-          )
-        else:
-          creds = self._api_client._credentials
-        # creds.valid is False, and creds.token is None
-        # Need to refresh credentials to populate those
-        if not (creds.token and creds.valid):
-          if requests is None:
-            raise ValueError('The requests module is required to refresh google-auth credentials. Please install with `pip install google-auth[requests]`')
-          auth_req = requests.Request()  # type: ignore
-          creds.refresh(auth_req)
-        bearer_token = creds.token
-
         original_headers = self._api_client._http_options.headers
         headers = (
             original_headers.copy() if original_headers is not None else {}
         )
         if not headers.get('Authorization'):
+          # Application Default Credentials (or the client's), refreshed in
+          # a worker thread so a token fetch never blocks the event loop.
+          credentials_started = time.perf_counter()
+          bearer_token = await _credential_provider(
+              self._api_client
+          ).bearer_token()
+          timings.credentials_ms = _elapsed_ms(credentials_started)
           headers['Authorization'] = f'Bearer {bearer_token}'
 
-      location = self._api_client.location
-      project = self._api_client.project
-      if transformed_model.startswith('publishers/') and project and location:
-        transformed_model = (
-            f'projects/{project}/locations/{location}/' + transformed_model
-        )
-      request_dict = _common.convert_to_dict(
-          live_converters._LiveConnectParameters_to_vertex(
-              api_client=self._api_client,
-              from_object=types.LiveConnectParameters(
-                  model=transformed_model,
-                  config=parameter_model,
-              ).model_dump(exclude_none=True),
+      if cached_setup is None:
+        location = self._api_client.location
+        project = self._api_client.project
+        if transformed_model.startswith('publishers/') and project and location:
+          transformed_model = (
+              f'projects/{project}/locations/{location}/' + transformed_model
           )
-      )
-      del request_dict['config']
+        request_dict = _common.convert_to_dict(
+            live_converters._LiveConnectParameters_to_vertex(
+                api_client=self._api_client,
+                from_object=types.LiveConnectParameters(
+                    model=transformed_model,
+                    config=parameter_model,
+                ).model_dump(exclude_none=True),
+            )
+        )
+        del request_dict['config']
 
-      if (
-          getv(
-              request_dict, ['setup', 'generationConfig', 'responseModalities']
+        if (
+            getv(
+                request_dict,
+                ['setup', 'generationConfig', 'responseModalities'],
+            )
+            is None
+        ):
+          setv(
+              request_dict,
+              ['setup', 'generationConfig', 'responseModalities'],
+              ['AUDIO'],
           )
-          is None
-      ):
-        setv(
-            request_dict,
-            ['setup', 'generationConfig', 'responseModalities'],
-            ['AUDIO'],
-        )
 
-      request = json.dumps(request_dict)
+        request = json.dumps(request_dict)
 
-    if parameter_model.tools and _mcp_utils.has_mcp_tool_usage(
-        parameter_model.tools
-    ):
+    if cached_setup is None:
+      if cache_key:
+        _cache_setup(cache_key, (request, setup_kwargs))
+      # Configs with tools are never cached, so this only runs on a miss.
+      uses_mcp = parameter_model.tools and _mcp_utils.has_mcp_tool_usage(
+          parameter_model.tools
+      )
+    else:
+      uses_mcp = False
+    if uses_mcp:
       if headers is None:
         headers = {}
       _mcp_utils.set_mcp_usage_header(headers)
+    timings.config_ms = _elapsed_ms(started) - timings.credentials_ms
+    timings.setup_cached = cached_setup is not None
 
-    async with ws_connect(
-        uri, additional_headers=headers, **self._api_client._websocket_ssl_ctx
-    ) as ws:
-      await ws.send(request)
+    async with contextlib.AsyncExitStack() as stack:
       try:
-        # websockets 14.0+
-        raw_response = await ws.recv(decode=False)
-      except TypeError:
-        raw_response = await ws.recv()  # type: ignore[assignment]
+        ws = await stack.enter_async_context(
+            _timed_ws_connect(
+                uri, headers, self._api_client._websocket_ssl_ctx, timings
+            )
+        )
+        send_started = time.perf_counter()
+        await ws.send(request)
+        sent_at = time.perf_counter()
+        timings.setup_send_ms = (sent_at - send_started) * 1000
+        try:
+          # websockets 14.0+
+          raw_response = await ws.recv(decode=False)
+        except TypeError:
+          raw_response = await ws.recv()  # type: ignore[assignment]
+        timings.setup_complete_ms = _elapsed_ms(sent_at)
+      except Exception as e:
+        timings.error = repr(e)
+        timings.total_ms = _elapsed_ms(started)
+        self._report_connect_timings(timings)
+        raise
+      timings.total_ms = _elapsed_ms(started)
+      self._report_connect_timings(timings)
       if raw_response:
         try:
           response = json.loads(raw_response)
@@ -1106,17 +1867,19 @@ class AsyncLive(_api_module.BaseModule):
         response_dict = response
 
       setup_response = types.LiveServerMessage._from_response(
-          response=response_dict, kwargs=parameter_model.model_dump()
+          response=response_dict, kwargs=setup_kwargs
       )
       if setup_response.setup_complete:
         session_id = setup_response.setup_complete.session_id
       else:
         session_id = None
-      yield AsyncSession(
+      session = AsyncSession(
           api_client=self._api_client,
           websocket=ws,
           session_id=session_id,
       )
+      session.connect_timings = timings
+      yield session
 
 
 async def _t_live_connect_config(
@@ -2,9 +2,16 @@ import asyncio
 import pyaudio
 import time
 import os # Need this for GEMINI_API_KEY
+import sys
 from google import genai
 from google.genai import types
 
+# live_events.py and friends live in the repository root, one level up.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from live_config import INPUT_DEVICE_INDEX, OUTPUT_DEVICE_INDEX
+from live_events import AudioEvent, InterruptedEvent, LiveEventDispatcher, TextEvent, UsageEvent
+from resample import StreamingResampler, device_rate
+
 # --- Configuration ---
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
@@ -51,23 +58,33 @@ class AudioLoop:
         self.input_stream = None
         self.output_stream = None
         
+        # Devices come from LIVE_INPUT_DEVICE / LIVE_OUTPUT_DEVICE (default:
+        # the system defaults) and run at their native rates; audio is
+        # resampled to 16 kHz up and from the model's 24 kHz down here.
+        input_device = INPUT_DEVICE_INDEX if INPUT_DEVICE_INDEX is not None else pya.get_default_input_device_info()["index"]
+        output_device = OUTPUT_DEVICE_INDEX if OUTPUT_DEVICE_INDEX is not None else pya.get_default_output_device_info()["index"]
+        self.input_rate = device_rate(pya, input_device, RATE)
+        output_rate = device_rate(pya, output_device, 24000)
+        self.input_resampler = StreamingResampler(self.input_rate, RATE)
+        self.output_resampler = StreamingResampler(24000, output_rate)
+
         # Initialize streams outside of run to allow cleanup in finally block
         try:
             self.output_stream = pya.open(
                 format=FORMAT,
                 channels=CHANNELS,
-                rate=24000, # Must match the model's output rate
+                rate=output_rate,
                 output=True,
-                frames_per_buffer=CHUNK
+                frames_per_buffer=CHUNK,
+                output_device_index=output_device,
             )
-            # Explicitly using device 0, as confirmed by your diagnostic
             self.input_stream = pya.open(
                 format=FORMAT,
                 channels=CHANNELS,
-                rate=RATE,
+                rate=self.input_rate,
                 input=True,
-                frames_per_buffer=CHUNK,
-                input_device_index=0 
+                frames_per_buffer=CHUNK * self.input_rate // RATE,
+                input_device_index=input_device,
             )
         except Exception as e:
             print(f"Error opening audio streams: {e}")
@@ -82,43 +99,42 @@ class AudioLoop:
         while True:
             # Use to_thread to make the blocking PyAudio read non-blocking for asyncio
             audio_data = await asyncio.to_thread(
-                self.input_stream.read, CHUNK, exception_on_overflow=False
+                self.input_stream.read, CHUNK * self.input_rate // RATE, exception_on_overflow=False
             )
+            audio_data = self.input_resampler.process(audio_data)
             # Send audio data to the model
             await self.session.send(input={"data": audio_data, "mime_type": "audio/pcm"})
 
     async def receive_and_play_audio(self):
         """Task to receive responses from the session and handle output."""
-        while True:
-            # The session.receive() gives you an iterator over a single turn
-            turn = self.session.receive()
-            async for response in turn:
-                # 1. Handle audio data
-                if data := response.data:
-                    self.audio_in_queue.put_nowait(data)
-                    continue
-                
-                # 2. Handle text transcription
-                # Note: The response.text field captures transcription text
-                if text := response.text:
-                    print("Model Transcript:", text, end="")
-
-                # 3. Handle token usage and metadata
-                if response.usage_metadata:
-                    usage = response.usage_metadata
-                    # Print usage when a turn completes or metadata is available
-                    print(f"\n  Usage: Prompt Tokens: {usage.prompt_token_count}, Response Tokens: {usage.response_token_count}")
-
-            # Crucial: Clear audio buffer if interrupted to enable low-latency interruptions
-            while not self.audio_in_queue.empty():
-                self.audio_in_queue.get_nowait()
-    
+        dispatcher = LiveEventDispatcher()
+        # 1. Handle audio data
+        dispatcher.on(AudioEvent, lambda event: self.audio_in_queue.put_nowait(event.data))
+        # 2. Handle text transcription
+        dispatcher.on(TextEvent, self.print_text)
+        # 3. Handle token usage and metadata
+        dispatcher.on(UsageEvent, lambda event: print(
+            f"\n  Usage: Prompt Tokens: {event.prompt_tokens}, Response Tokens: {event.response_tokens}"
+        ))
+        # Crucial: Clear audio buffer if interrupted to enable low-latency interruptions
+        dispatcher.on(InterruptedEvent, lambda event: self.clear_audio())
+        await dispatcher.pump(self.session)
+
+    def print_text(self, event):
+        if not event.thought:
+            print("Model Transcript:", event.text, end="")
+
+    def clear_audio(self):
+        while not self.audio_in_queue.empty():
+            self.audio_in_queue.get_nowait()
+            self.audio_in_queue.task_done()
+
     async def play_audio(self):
         """Task to consume audio from the queue and play it."""
         while True:
             bytestream = await self.audio_in_queue.get()
             # Use to_thread to make the blocking PyAudio write non-blocking for asyncio
-            await asyncio.to_thread(self.output_stream.write, bytestream)
+            await asyncio.to_thread(self.output_stream.write, self.output_resampler.process(bytestream))
             self.audio_in_queue.task_done() # Tell the queue the item is processed
 
 
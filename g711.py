@@ -0,0 +1,131 @@
+"""G.711 mu-law/A-law codec and 8 kHz telephony bridging.
+
+Encoding and decoding are single numpy table lookups: 256-entry tables from
+code to linear sample, and 65536-entry tables from every 16-bit sample to its
+code, both built once at import with the reference G.711 segment arithmetic.
+
+``G711Source`` wraps a source of 8 kHz G.711 payloads (e.g. a ``QueueSource``
+fed from RTP) as the 16 kHz PCM source a call session expects;
+``G711Sink`` turns the model's 24 kHz PCM into 8 kHz G.711 for an inner sink
+that writes it to the telephony leg. Both follow the source/sink interface in
+``audio_io``.
+"""
+
+import numpy as np
+
+from live_config import RECEIVE_SAMPLE_RATE, SEND_SAMPLE_RATE
+from resample import StreamingResampler
+
+TELEPHONY_SAMPLE_RATE = 8000
+MULAW = "mulaw"
+ALAW = "alaw"
+
+_MULAW_BIAS = 0x84
+_MULAW_CLIP = 8159  # of the 14-bit magnitude
+_MULAW_SEGMENT_ENDS = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+_ALAW_SEGMENT_ENDS = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+
+
+def _mulaw_decode_table():
+    code = ~np.arange(256, dtype=np.int32) & 0xFF
+    magnitude = (((code & 0x0F) << 3) + _MULAW_BIAS) << ((code & 0x70) >> 4)
+    return np.where(code & 0x80, _MULAW_BIAS - magnitude, magnitude - _MULAW_BIAS).astype(np.int16)
+
+
+def _mulaw_encode_table():
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(pcm), _MULAW_CLIP) + (_MULAW_BIAS >> 2)
+    segment = np.searchsorted(_MULAW_SEGMENT_ENDS, magnitude)
+    code = (np.minimum(segment, 7) << 4) | ((magnitude >> (np.minimum(segment, 7) + 1)) & 0x0F)
+    code = np.where(segment >= 8, 0x7F, code) ^ mask
+    # Index by the int16 sample reinterpreted as uint16.
+    return np.roll(code.astype(np.uint8), -32768)
+
+
+def _alaw_decode_table():
+    code = np.arange(256, dtype=np.int32) ^ 0x55
+    segment = (code & 0x70) >> 4
+    magnitude = ((code & 0x0F) << 4) + np.where(segment == 0, 8, 0x108)
+    magnitude = np.where(segment > 1, magnitude << np.maximum(segment - 1, 0), magnitude)
+    return np.where(code & 0x80, magnitude, -magnitude).astype(np.int16)
+
+
+def _alaw_encode_table():
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    magnitude = np.where(pcm >= 0, pcm, -pcm - 1)
+    segment = np.searchsorted(_ALAW_SEGMENT_ENDS, magnitude)
+    shift = np.where(segment < 2, 1, np.minimum(segment, 7))
+    code = (np.minimum(segment, 7) << 4) | ((magnitude >> shift) & 0x0F)
+    code = np.where(segment >= 8, 0x7F, code) ^ mask
+    return np.roll(code.astype(np.uint8), -32768)
+
+
+_DECODE_TABLES = {MULAW: _mulaw_decode_table(), ALAW: _alaw_decode_table()}
+_ENCODE_TABLES = {MULAW: _mulaw_encode_table(), ALAW: _alaw_encode_table()}
+
+
+def decode(data, law=MULAW):
+    """G.711 bytes to an int16 sample array."""
+    return _DECODE_TABLES[law][np.frombuffer(data, dtype=np.uint8)]
+
+
+def encode(pcm, law=MULAW):
+    """int16 PCM (bytes-like or array) to G.711 bytes."""
+    samples = np.frombuffer(pcm, dtype=np.int16) if not isinstance(pcm, np.ndarray) else pcm
+    return _ENCODE_TABLES[law][samples.view(np.uint16)].tobytes()
+
+
+class G711Source:
+    """16 kHz PCM source over a source of 8 kHz G.711 payloads."""
+
+    def __init__(self, source, law=MULAW, rate=SEND_SAMPLE_RATE):
+        self.source = source
+        self.law = law
+        self.resampler = StreamingResampler(TELEPHONY_SAMPLE_RATE, rate)
+
+    async def start(self):
+        await self.source.start()
+
+    async def read(self):
+        data = await self.source.read()
+        if data is None:
+            return None
+        return self.resampler.process(decode(data, self.law))
+
+    def close(self):
+        self.source.close()
+
+
+class G711Sink:
+    """Sink taking 24 kHz PCM and writing 8 kHz G.711 to ``sink``.
+
+    If given an ``echo.PlaybackReference``, the 24 kHz audio is written there
+    as it is sent, for echo handling on the uplink.
+    """
+
+    def __init__(self, sink, law=MULAW, rate=RECEIVE_SAMPLE_RATE, reference=None):
+        self.sink = sink
+        self.law = law
+        self.reference = reference
+        self.resampler = StreamingResampler(rate, TELEPHONY_SAMPLE_RATE)
+
+    async def start(self):
+        await self.sink.start()
+
+    async def write(self, data):
+        if self.reference:
+            self.reference.write(data)
+        samples = self.resampler.process_samples(np.frombuffer(data, dtype=np.int16))
+        pcm = np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+        await self.sink.write(encode(pcm, self.law))
+
+    def clear(self):
+        self.sink.clear()
+
+    def turn_complete(self):
+        self.sink.turn_complete()
+
+    def close(self):
+        self.sink.close()
@@ -0,0 +1,538 @@
+"""Network ingress: bridge external caller audio streams into Live sessions.
+
+A media server (or any local client) connects over TCP, or WebSocket with
+``ws_port``, and speaks a small framed protocol. Every frame is a 5-byte
+header, a ``uint8`` type and a big-endian ``uint32`` payload length,
+followed by the payload. Over WebSocket each binary message is one frame.
+
+    HELLO          client, optional first frame: JSON ``{"codec": "pcm"}``,
+                   codec one of ``pcm`` (16 kHz up / 24 kHz down, 16-bit),
+                   ``mulaw`` or ``alaw`` (8 kHz G.711 both ways)
+    AUDIO          caller audio up, model audio down
+    END            client: no more caller audio; the reply still comes back
+    CLEAR          server: the caller barged in, drop any queued playback
+    TURN_COMPLETE  server: the model's turn is over
+    ERROR          server: UTF-8 reason, sent right before closing
+
+Each connection becomes one ``AudioLoop`` call on a shared ``CallServer``.
+Backpressure is per connection: caller audio goes into a bounded queue and
+the socket is not read while it is full (which also holds audio that arrives
+while the Live session is still connecting), and model audio is queued up
+to ``downlink_buffer_bytes`` before the session's playback task waits for
+the client. A client that accepts nothing for ``send_timeout_s``, or sends
+nothing for ``idle_timeout_s``, is disconnected. Clients are expected to
+stream continuously, silence included.
+
+    python ingress.py --port 9000
+    python ingress.py --mock --port 9000
+    python ingress.py --port 9000 --call hello.wav
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import os
+import struct
+import tempfile
+import time
+
+from websockets import ConnectionClosed
+
+try:
+    from websockets.asyncio.server import serve as ws_serve
+except ModuleNotFoundError:
+    from websockets.server import serve as ws_serve  # type: ignore
+
+from audio_io import QueueSource
+from call_server import AdmissionError
+from g711 import ALAW, MULAW, G711Sink, G711Source
+from live_config import RECEIVE_SAMPLE_RATE, SAMPLE_WIDTH
+
+HOST = "127.0.0.1"
+PORT = 9000
+HEADER = struct.Struct(">BI")
+MAX_FRAME_BYTES = 1 << 16
+
+HELLO = 0x00
+AUDIO = 0x01
+END = 0x02
+CLEAR = 0x03
+TURN_COMPLETE = 0x04
+ERROR = 0x7F
+
+PCM = "pcm"
+CODECS = (PCM, MULAW, ALAW)
+
+UPLINK_QUEUE_FRAMES = 50  # about 1.6 s of 512-sample chunks
+DOWNLINK_BUFFER_BYTES = 2 * RECEIVE_SAMPLE_RATE * SAMPLE_WIDTH  # 2 s of 24 kHz PCM
+IDLE_TIMEOUT_S = 30.0
+SEND_TIMEOUT_S = 10.0
+
+
+class ProtocolError(ValueError):
+    """Raised on a malformed frame; the connection is closed with ERROR."""
+
+
+class SlowConsumerError(RuntimeError):
+    """Raised when a client stops accepting model audio."""
+
+
+def encode_frame(kind, payload=b""):
+    """Header and payload of one frame, ready for ``writelines``."""
+    return HEADER.pack(kind, len(payload)), payload
+
+
+def _check_header(kind, length):
+    if length > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    return kind, length
+
+
+class _StreamTransport:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.peer = writer.get_extra_info("peername")
+
+    async def read_frame(self):
+        """Next ``(type, payload)``, or ``None`` once the client has gone."""
+        try:
+            kind, length = _check_header(*HEADER.unpack(await self.reader.readexactly(HEADER.size)))
+            payload = await self.reader.readexactly(length) if length else b""
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        return kind, payload
+
+    async def send(self, kind, payload=b""):
+        self.writer.writelines(encode_frame(kind, payload))
+        await self.writer.drain()
+
+    async def close(self):
+        self.writer.close()
+        with contextlib.suppress(ConnectionError):
+            await self.writer.wait_closed()
+
+
+class _WebSocketTransport:
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.peer = websocket.remote_address
+
+    async def read_frame(self):
+        try:
+            message = await self.websocket.recv()
+        except ConnectionClosed:
+            return None
+        if isinstance(message, str) or len(message) < HEADER.size:
+            raise ProtocolError("Expected a binary frame")
+        kind, length = _check_header(*HEADER.unpack_from(message))
+        if length != len(message) - HEADER.size:
+            raise ProtocolError(f"Frame length {length} does not match message size")
+        return kind, message[HEADER.size:]
+
+    async def send(self, kind, payload=b""):
+        await self.websocket.send(b"".join(encode_frame(kind, payload)))
+
+    async def close(self):
+        await self.websocket.close()
+
+
+class NetworkSink:
+    """Sink that queues model audio for a connection's writer task.
+
+    ``write()`` waits while ``max_pending_bytes`` are queued; ``clear()``
+    drops queued audio that has not been sent yet before sending CLEAR, so a
+    barge-in does not wait behind audio the caller will never hear.
+    """
+
+    def __init__(self, transport, max_pending_bytes=DOWNLINK_BUFFER_BYTES, send_timeout_s=SEND_TIMEOUT_S):
+        self.transport = transport
+        self.max_pending_bytes = max_pending_bytes
+        self.send_timeout_s = send_timeout_s
+        self._frames = collections.deque()
+        self._ready = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self.pending_bytes = 0
+        self.bytes_sent = 0
+        self.bytes_dropped = 0
+
+    async def start(self):
+        pass
+
+    def _push(self, kind, payload=b""):
+        self._frames.append((kind, payload))
+        self.pending_bytes += len(payload)
+        self._ready.set()
+
+    async def write(self, data):
+        while self.pending_bytes >= self.max_pending_bytes:
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), self.send_timeout_s)
+            except TimeoutError:
+                raise SlowConsumerError(
+                    f"Client accepted no audio for {self.send_timeout_s:.0f} s"
+                ) from None
+        self._push(AUDIO, data)
+
+    def clear(self):
+        kept = collections.deque(frame for frame in self._frames if frame[0] != AUDIO)
+        dropped = self.pending_bytes - sum(len(payload) for _, payload in kept)
+        self._frames = kept
+        self.pending_bytes -= dropped
+        self.bytes_dropped += dropped
+        self._drained.set()
+        self._push(CLEAR)
+
+    def turn_complete(self):
+        self._push(TURN_COMPLETE)
+
+    def close(self):
+        # The gateway owns the connection and closes it after the call.
+        pass
+
+    async def run(self):
+        """Send queued frames until cancelled."""
+        while True:
+            while not self._frames:
+                self._ready.clear()
+                await self._ready.wait()
+            kind, payload = self._frames.popleft()
+            self.pending_bytes -= len(payload)
+            if self.pending_bytes < self.max_pending_bytes:
+                self._drained.set()
+            try:
+                await asyncio.wait_for(self.transport.send(kind, payload), self.send_timeout_s)
+            except TimeoutError:
+                raise SlowConsumerError(
+                    f"Client accepted no audio for {self.send_timeout_s:.0f} s"
+                ) from None
+            self.bytes_sent += len(payload)
+
+
+class IngressServer:
+    def __init__(
+        self,
+        call_server,
+        host=HOST,
+        port=PORT,
+        ws_port=None,
+        idle_timeout_s=IDLE_TIMEOUT_S,
+        send_timeout_s=SEND_TIMEOUT_S,
+        uplink_queue_frames=UPLINK_QUEUE_FRAMES,
+        downlink_buffer_bytes=DOWNLINK_BUFFER_BYTES,
+    ):
+        self.call_server = call_server
+        self.host = host
+        self.port = port
+        self.ws_port = ws_port
+        self.idle_timeout_s = idle_timeout_s
+        self.send_timeout_s = send_timeout_s
+        self.uplink_queue_frames = uplink_queue_frames
+        self.downlink_buffer_bytes = downlink_buffer_bytes
+        self._servers = []
+        self._handlers = set()
+        self.connections = 0
+        self.rejected = 0
+        self.idle_timeouts = 0
+        self.protocol_errors = 0
+        self.slow_consumers = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _log(self, event, level="info", **fields):
+        if self.call_server.event_log:
+            self.call_server.event_log.log(event, level, **fields)
+
+    async def start(self):
+        server = await asyncio.start_server(self._on_tcp, self.host, self.port)
+        self._servers.append(server)
+        if not self.port:
+            self.port = server.sockets[0].getsockname()[1]
+        if self.ws_port is not None:
+            server = await ws_serve(self._on_websocket, self.host, self.ws_port, max_size=MAX_FRAME_BYTES + HEADER.size)
+            self._servers.append(server)
+            if not self.ws_port:
+                self.ws_port = next(iter(server.sockets)).getsockname()[1]
+
+    async def _on_tcp(self, reader, writer):
+        await self._handle(_StreamTransport(reader, writer))
+
+    async def _on_websocket(self, websocket):
+        await self._handle(_WebSocketTransport(websocket))
+
+    async def _read(self, transport):
+        try:
+            return await asyncio.wait_for(transport.read_frame(), self.idle_timeout_s)
+        except TimeoutError:
+            raise TimeoutError(f"No data from client for {self.idle_timeout_s:.0f} s") from None
+
+    async def _handle(self, transport):
+        self.connections += 1
+        self._handlers.add(asyncio.current_task())
+        self._log("ingress_connect", peer=str(transport.peer))
+        reason = "closed"
+        call = None
+        try:
+            first = await self._read(transport)
+            codec = PCM
+            if first and first[0] == HELLO:
+                codec = json.loads(first[1] or b"{}").get("codec", PCM)
+                if codec not in CODECS:
+                    raise ProtocolError(f"Unknown codec: {codec!r}")
+                first = None
+
+            uplink = QueueSource(maxsize=self.uplink_queue_frames)
+            downlink = NetworkSink(transport, self.downlink_buffer_bytes, self.send_timeout_s)
+            source, sink = uplink, downlink
+            if codec != PCM:
+                source, sink = G711Source(uplink, codec), G711Sink(downlink, codec)
+            try:
+                call = self.call_server.admit(source, sink)
+            except AdmissionError as e:
+                self.rejected += 1
+                reason = "rejected"
+                await transport.send(ERROR, str(e).encode())
+                return
+
+            tasks = {
+                asyncio.create_task(self._pump_uplink(transport, uplink, first)),
+                asyncio.create_task(downlink.run()),
+                asyncio.create_task(self.call_server.wait(call.session_id)),
+            }
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                await self.call_server.hangup(call.session_id)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self.bytes_out += downlink.bytes_sent
+            for task in done:
+                if not task.cancelled() and task.exception():
+                    raise task.exception()
+            if call.error:
+                reason = "call_error"
+                with contextlib.suppress(Exception):
+                    await asyncio.wait_for(transport.send(ERROR, repr(call.error).encode()), self.send_timeout_s)
+        except TimeoutError as e:
+            self.idle_timeouts += 1
+            reason = "idle_timeout"
+            with contextlib.suppress(Exception):
+                await asyncio.wait_for(transport.send(ERROR, str(e).encode()), self.send_timeout_s)
+        except (ProtocolError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            self.protocol_errors += 1
+            reason = "protocol_error"
+            with contextlib.suppress(Exception):
+                await asyncio.wait_for(transport.send(ERROR, str(e).encode()), self.send_timeout_s)
+        except SlowConsumerError:
+            self.slow_consumers += 1
+            reason = "slow_consumer"
+        except asyncio.CancelledError:
+            reason = "shutdown"
+            raise
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            self._log(
+                "ingress_close",
+                peer=str(transport.peer),
+                session_id=call.session_id if call else None,
+                reason=reason,
+            )
+            with contextlib.suppress(Exception):
+                await transport.close()
+
+    async def _pump_uplink(self, transport, source, first):
+        """Move caller audio into ``source`` until the client disconnects.
+
+        ``put`` waits while the queue is full and the socket is not read
+        meanwhile, so a client sending faster than the call consumes is
+        slowed down by TCP flow control instead of losing audio. Once the
+        client has sent END it has nothing more to say while the reply plays,
+        so the idle timeout no longer applies.
+        """
+        frame = first
+        ended = False
+        while True:
+            if frame is None:
+                frame = await (transport.read_frame() if ended else self._read(transport))
+                if frame is None:
+                    return
+            kind, payload = frame
+            if kind == AUDIO:
+                self.bytes_in += len(payload)
+                await source.queue.put(payload)
+            elif kind == END:
+                ended = True
+                await source.queue.put(None)
+            else:
+                raise ProtocolError(f"Unexpected frame type {kind:#x} from client")
+            frame = None
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+        # asyncio.start_server's done callback calls exception() on each
+        # handler task, which raises for the cancelled ones and gets logged as
+        # an error. That cancellation is ours: keep it out of the log.
+        loop = asyncio.get_running_loop()
+        handler = loop.get_exception_handler()
+
+        def quiet(loop, context):
+            if isinstance(context.get("exception"), asyncio.CancelledError):
+                return
+            if handler:
+                handler(loop, context)
+            else:
+                loop.default_exception_handler(context)
+
+        loop.set_exception_handler(quiet)
+        try:
+            for task in list(self._handlers):
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        finally:
+            loop.set_exception_handler(handler)
+        for server in self._servers:
+            await server.wait_closed()
+
+    def stats(self):
+        return {
+            "connections": self.connections,
+            "active_connections": len(self._handlers),
+            "rejected": self.rejected,
+            "idle_timeouts": self.idle_timeouts,
+            "protocol_errors": self.protocol_errors,
+            "slow_consumers": self.slow_consumers,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "calls": self.call_server.stats(),
+        }
+
+
+async def stream_call(host, port, source, sink, codec=PCM, tail_s=3.0):
+    """Client side: stream ``source`` to a gateway and play the reply into ``sink``.
+
+    Returns once ``tail_s`` has passed after the source ran out, or when the
+    gateway closes the connection.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    transport = _StreamTransport(reader, writer)
+
+    async def uplink():
+        await transport.send(HELLO, json.dumps({"codec": codec}).encode())
+        await source.start()
+        while (data := await source.read()) is not None:
+            await transport.send(AUDIO, bytes(data))
+        await transport.send(END)
+        await asyncio.sleep(tail_s)
+
+    async def downlink():
+        await sink.start()
+        while (frame := await transport.read_frame()) is not None:
+            kind, payload = frame
+            if kind == AUDIO:
+                await sink.write(payload)
+            elif kind == CLEAR:
+                sink.clear()
+            elif kind == TURN_COMPLETE:
+                sink.turn_complete()
+            elif kind == ERROR:
+                raise ConnectionError(f"Gateway error: {payload.decode(errors='replace')}")
+
+    tasks = [asyncio.create_task(uplink()), asyncio.create_task(downlink())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        source.close()
+        sink.close()
+        await transport.close()
+
+
+async def main(args):
+    if args.call:
+        from audio_io import QueueSink, WavFileSource
+
+        sink = QueueSink()
+        start = time.monotonic()
+        await stream_call(args.host, args.port, WavFileSource(args.call), sink, tail_s=args.tail_s)
+        received = 0
+        while not sink.queue.empty():
+            received += len(sink.queue.get_nowait())
+        print(
+            f"Received {received / (RECEIVE_SAMPLE_RATE * SAMPLE_WIDTH):.2f} s of audio "
+            f"in {time.monotonic() - start:.2f} s"
+        )
+        return
+
+    from google import genai
+
+    from call_server import CallServer
+    from event_log import EventLog
+    from live_config import API_VERSION
+    from mock_live_server import MockLiveServer, make_self_signed_cert
+
+    mock = None
+    tmpdir = tempfile.TemporaryDirectory()
+    http_options = {"api_version": API_VERSION}
+    if args.mock:
+        certfile, keyfile = make_self_signed_cert(tmpdir.name)
+        mock = MockLiveServer(port=0, certfile=certfile, keyfile=keyfile)
+        await mock.start()
+        http_options = mock.client_http_options(API_VERSION)
+    api_key = os.environ.get("GEMINI_API_KEY") or ("test" if args.mock else None)
+    event_log = EventLog()
+    call_server = CallServer(
+        client=genai.Client(api_key=api_key, http_options=http_options),
+        max_sessions=args.max_sessions,
+        event_log=event_log,
+        client_vad=args.client_vad,
+    )
+    ingress = IngressServer(
+        call_server,
+        host=args.host,
+        port=args.port,
+        ws_port=args.ws_port,
+        idle_timeout_s=args.idle_timeout_s,
+    )
+    await ingress.start()
+    print(f"Ingress listening on tcp://{ingress.host}:{ingress.port}")
+    if ingress.ws_port is not None:
+        print(f"Ingress listening on ws://{ingress.host}:{ingress.ws_port}")
+    try:
+        await asyncio.Future()
+    finally:
+        await ingress.close()
+        await call_server.shutdown()
+        if mock:
+            await mock.close()
+        event_log.close()
+        tmpdir.cleanup()
+        print(ingress.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--ws-port", type=int, help="also accept WebSocket connections on this port")
+    parser.add_argument("--max-sessions", type=int, default=100)
+    parser.add_argument("--idle-timeout-s", type=float, default=IDLE_TIMEOUT_S)
+    parser.add_argument("--mock", action="store_true", help="bridge to an in-process mock_live_server")
+    parser.add_argument(
+        "--client-vad", action="store_true", help="detect activity locally and send activity_start/activity_end"
+    )
+    parser.add_argument("--call", nargs="+", metavar="WAV", help="stream these WAVs to a running gateway instead")
+    parser.add_argument("--tail-s", type=float, default=3.0)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,89 @@
+"""Shared Gemini Live settings used by LiveApi.py and the call server."""
+
+import copy
+import os
+
+CHANNELS = 1
+SAMPLE_WIDTH = 2  # bytes per sample, 16-bit linear PCM
+SEND_SAMPLE_RATE = 16000
+RECEIVE_SAMPLE_RATE = 24000
+CHUNK_SIZE = 256
+
+# PortAudio device indexes; unset means the system default device. Devices
+# are opened at their native rate and resampled to the wire rates above.
+INPUT_DEVICE_INDEX = int(os.environ["LIVE_INPUT_DEVICE"]) if os.environ.get("LIVE_INPUT_DEVICE") else None
+OUTPUT_DEVICE_INDEX = int(os.environ["LIVE_OUTPUT_DEVICE"]) if os.environ.get("LIVE_OUTPUT_DEVICE") else None
+
+API_VERSION = "v1alpha"
+# Next to this file, so imports work from any working directory.
+SYSTEM_INSTRUCTION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "system_instruction.txt")
+
+_instruction_cache = {}
+
+
+def load_system_instruction(path=SYSTEM_INSTRUCTION_PATH):
+    """Contents of the system instruction file, re-read only after it changes."""
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _instruction_cache.get(path)
+    if cached and cached[0] == version:
+        return cached[1]
+    with open(path, "r") as f:
+        text = f.read()
+    _instruction_cache[path] = (version, text)
+    return text
+
+
+# Load system instruction from file
+system_instruction = load_system_instruction()
+
+MODEL = "gemini-2.5-flash-native-audio-preview-12-2025"
+CONFIG = {
+    "system_instruction": system_instruction,
+    "response_modalities": ["AUDIO"],
+    "realtime_input_config": {
+        "automatic_activity_detection": {
+            "disabled": False, # default
+            "start_of_speech_sensitivity": "START_SENSITIVITY_HIGH",
+            "end_of_speech_sensitivity": "END_SENSITIVITY_HIGH",
+            "prefix_padding_ms": 20,
+            "silence_duration_ms": 10 }},
+    "speech_config": {
+        "voice_config": {"prebuilt_voice_config": {"voice_name": "erinome"}}},
+    "enable_affective_dialog": False,
+    "proactivity": {'proactive_audio': True},
+    "output_audio_transcription": {},
+    "input_audio_transcription": {},
+    # Resumption handles and a sliding context window let resilient_session
+    # carry a call across connections past the session lifetime limits.
+    "session_resumption": {},
+    "context_window_compression": {"sliding_window": {}},
+}
+
+
+def client_activity_config(config=CONFIG):
+    """Return a copy of ``config`` with server-side activity detection disabled.
+
+    Use it with ``vad.ActivityGate``: the client then sends ``activity_start``
+    and ``activity_end`` itself.
+    """
+    config = copy.deepcopy(config)
+    realtime_input_config = config.setdefault("realtime_input_config", {})
+    realtime_input_config["automatic_activity_detection"] = {"disabled": True}
+    return config
+
+
+CLIENT_ACTIVITY_CONFIG = client_activity_config()
+
+
+def with_current_instruction(config):
+    """``config`` with the instruction file's current text.
+
+    Returns ``config`` itself while the file is unchanged, so connects keep
+    hitting the setup message cache in exp/live.py; an edited file gives a new
+    config (and so a new cache key) without restarting the process.
+    """
+    text = load_system_instruction()
+    if config.get("system_instruction") == text:
+        return config
+    return {**config, "system_instruction": text}
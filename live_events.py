@@ -0,0 +1,227 @@
+"""Typed events for Gemini Live server messages, and a dispatcher for them.
+
+``LiveEventDispatcher.dispatch()`` looks at each server message once, turns
+it into the events below, and calls the handlers registered for each event
+type from a table built at registration time. Nothing is looked up per
+message with ``hasattr``/``getattr``, and an event object is only built when
+something handles it. Audio-only frames from ``receive_lazy()`` (exp/live.py)
+go straight to ``AudioEvent`` without pydantic validation.
+
+Handlers are plain callables run on the receive task; keep them short and
+hand slow work to a queue. ``counts`` tallies every event type seen, which is
+the place to read per-session message metrics from.
+
+    dispatcher = LiveEventDispatcher()
+    dispatcher.on(AudioEvent, lambda event: queue.put_nowait(event.data))
+    dispatcher.on(InterruptedEvent, lambda event: flush())
+    await dispatcher.pump(session)
+"""
+
+import dataclasses
+from typing import Any, Optional
+
+
+@dataclasses.dataclass(slots=True)
+class AudioEvent:
+    data: bytes
+
+
+@dataclasses.dataclass(slots=True)
+class TextEvent:
+    text: str
+    thought: bool = False
+
+
+@dataclasses.dataclass(slots=True)
+class InputTranscriptionEvent:
+    text: Optional[str]
+    finished: Optional[bool] = None
+
+
+@dataclasses.dataclass(slots=True)
+class OutputTranscriptionEvent:
+    text: Optional[str]
+    finished: Optional[bool] = None
+
+
+@dataclasses.dataclass(slots=True)
+class GenerationCompleteEvent:
+    pass
+
+
+@dataclasses.dataclass(slots=True)
+class InterruptedEvent:
+    pass
+
+
+@dataclasses.dataclass(slots=True)
+class TurnCompleteEvent:
+    reason: Any = None
+
+
+@dataclasses.dataclass(slots=True)
+class UsageEvent:
+    prompt_tokens: int
+    response_tokens: int
+    total_tokens: int
+    response_tokens_details: dict
+    usage_metadata: Any = None
+
+
+@dataclasses.dataclass(slots=True)
+class ToolCallEvent:
+    function_calls: list
+    tool_call: Any = None
+
+
+@dataclasses.dataclass(slots=True)
+class GoAwayEvent:
+    time_left: Optional[str]
+
+
+EVENT_TYPES = (
+    AudioEvent,
+    TextEvent,
+    InputTranscriptionEvent,
+    OutputTranscriptionEvent,
+    GenerationCompleteEvent,
+    InterruptedEvent,
+    TurnCompleteEvent,
+    UsageEvent,
+    ToolCallEvent,
+    GoAwayEvent,
+)
+
+
+class LiveEventDispatcher:
+    def __init__(self):
+        self._handlers = {event_type: [] for event_type in EVENT_TYPES}
+        self._table = {event_type: () for event_type in EVENT_TYPES}
+        self.counts = dict.fromkeys(EVENT_TYPES, 0)
+        self.messages = 0
+
+    def on(self, event_type, handler):
+        """Call ``handler(event)`` for every ``event_type`` event, in registration order."""
+        if event_type not in self._handlers:
+            raise ValueError(f"Unknown Live event type: {event_type!r}")
+        self._handlers[event_type].append(handler)
+        self._table[event_type] = tuple(self._handlers[event_type])
+        return handler
+
+    def off(self, event_type, handler):
+        self._handlers[event_type].remove(handler)
+        self._table[event_type] = tuple(self._handlers[event_type])
+
+    def dispatch(self, message):
+        """Classify one server message and run the handlers for each event in it."""
+        self.messages += 1
+        table = self._table
+        counts = self.counts
+
+        if getattr(message, "is_audio", False):
+            counts[AudioEvent] += 1
+            if handlers := table[AudioEvent]:
+                event = AudioEvent(message.data)
+                for handler in handlers:
+                    handler(event)
+            if message.turn_complete:
+                self._turn_complete(None)
+            return
+
+        if server_content := message.server_content:
+            if (model_turn := server_content.model_turn) and model_turn.parts:
+                for part in model_turn.parts:
+                    if (inline_data := part.inline_data) and inline_data.data:
+                        counts[AudioEvent] += 1
+                        if handlers := table[AudioEvent]:
+                            event = AudioEvent(inline_data.data)
+                            for handler in handlers:
+                                handler(event)
+                    elif part.text:
+                        counts[TextEvent] += 1
+                        if handlers := table[TextEvent]:
+                            event = TextEvent(part.text, bool(part.thought))
+                            for handler in handlers:
+                                handler(event)
+
+            if transcription := server_content.input_transcription:
+                counts[InputTranscriptionEvent] += 1
+                if handlers := table[InputTranscriptionEvent]:
+                    event = InputTranscriptionEvent(transcription.text, transcription.finished)
+                    for handler in handlers:
+                        handler(event)
+
+            if transcription := server_content.output_transcription:
+                counts[OutputTranscriptionEvent] += 1
+                if handlers := table[OutputTranscriptionEvent]:
+                    event = OutputTranscriptionEvent(transcription.text, transcription.finished)
+                    for handler in handlers:
+                        handler(event)
+
+            if server_content.generation_complete:
+                counts[GenerationCompleteEvent] += 1
+                if handlers := table[GenerationCompleteEvent]:
+                    event = GenerationCompleteEvent()
+                    for handler in handlers:
+                        handler(event)
+
+            if server_content.interrupted:
+                counts[InterruptedEvent] += 1
+                if handlers := table[InterruptedEvent]:
+                    event = InterruptedEvent()
+                    for handler in handlers:
+                        handler(event)
+
+        if tool_call := message.tool_call:
+            counts[ToolCallEvent] += 1
+            if handlers := table[ToolCallEvent]:
+                event = ToolCallEvent(tool_call.function_calls or [], tool_call)
+                for handler in handlers:
+                    handler(event)
+
+        if usage := message.usage_metadata:
+            counts[UsageEvent] += 1
+            if handlers := table[UsageEvent]:
+                details = {}
+                for detail in usage.response_tokens_details or ():
+                    modality = detail.modality
+                    details[getattr(modality, "value", modality)] = detail.token_count or 0
+                event = UsageEvent(
+                    usage.prompt_token_count or 0,
+                    usage.response_token_count or 0,
+                    usage.total_token_count or 0,
+                    details,
+                    usage,
+                )
+                for handler in handlers:
+                    handler(event)
+
+        if go_away := message.go_away:
+            counts[GoAwayEvent] += 1
+            if handlers := table[GoAwayEvent]:
+                event = GoAwayEvent(go_away.time_left)
+                for handler in handlers:
+                    handler(event)
+
+        # Last, so handlers see the whole final message before the turn ends.
+        if server_content and server_content.turn_complete:
+            self._turn_complete(server_content.turn_complete_reason)
+
+    def _turn_complete(self, reason):
+        self.counts[TurnCompleteEvent] += 1
+        if handlers := self._table[TurnCompleteEvent]:
+            event = TurnCompleteEvent(reason)
+            for handler in handlers:
+                handler(event)
+
+    async def pump(self, session):
+        """Dispatch every message from ``session`` until the connection closes.
+
+        Uses ``receive_lazy()`` when the session has it (exp/live.py) so audio
+        frames skip validation.
+        """
+        receive = getattr(session, "receive_lazy", session.receive)
+        dispatch = self.dispatch
+        while True:
+            async for message in receive():
+                dispatch(message)
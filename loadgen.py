@@ -0,0 +1,329 @@
+"""Synthetic caller load generator for the Gemini Live call path.
+
+Starts N simulated callers on one ``CallServer``. Every caller is a
+``LiveApi.AudioLoop``, the class a real call runs, streaming WAV files at
+real-time pace against the real API or a local ``mock_live_server``.
+
+Reports the latency from the end of each caller utterance to the first
+response audio byte (p50/p95/p99), dropped uplink chunks, queue depths,
+capture lag, and process CPU and RSS per session. With an SDK that reports
+connect timings (exp/live.py), also the p50 of each connect phase. With
+``--echo-cancel`` every call also runs the echo canceller against the reply
+audio, as a speakerphone call does.
+
+    python loadgen.py --mock --callers 100
+    python loadgen.py --callers 20 --wav hello.wav question.wav
+    python loadgen.py --mock --callers 100 --client-vad
+    python loadgen.py --mock --callers 20 --ramp-s 5 --pool-size 4
+    python loadgen.py --mock --callers 50 --echo-cancel
+"""
+
+import argparse
+import array
+import asyncio
+import dataclasses
+import json
+import math
+import os
+import resource
+import tempfile
+import time
+import wave
+
+from google import genai
+
+from audio_io import WavFileSource
+from call_server import CallServer
+from live_config import (
+    API_VERSION,
+    CHANNELS,
+    CLIENT_ACTIVITY_CONFIG,
+    CONFIG,
+    MODEL,
+    SAMPLE_WIDTH,
+    SEND_SAMPLE_RATE,
+)
+from mock_live_server import MockLiveServer, make_self_signed_cert
+from session_pool import SessionPool
+
+GAP_MS = 3000  # silence after each utterance, leaves room for the reply
+TAIL_S = 3.0  # keep the call open this long after the last utterance
+SAMPLE_INTERVAL_S = 1.0
+CONNECT_PHASES = (
+    "config_ms", "credentials_ms", "dns_ms", "tcp_ms", "tls_ms", "upgrade_ms", "setup_send_ms", "setup_complete_ms"
+)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def connect_phase_percentiles(timings, pct):
+    """``pct`` percentile of each connect phase over successful connects."""
+    rows = [dataclasses.asdict(t) for t in timings if not t.error]
+    return {
+        phase: _percentile(sorted(row[phase] for row in rows if row[phase] is not None), pct)
+        for phase in CONNECT_PHASES
+    }
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak rather than current RSS; ru_maxrss is in kB on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_speech_wav(path, duration_ms=1500, hz=220):
+    """Write a tone that the mock server's energy detector treats as speech."""
+    samples = int(SEND_SAMPLE_RATE * duration_ms / 1000)
+    step = 2 * math.pi * hz / SEND_SAMPLE_RATE
+    pcm = array.array("h", (int(8000 * math.sin(i * step)) for i in range(samples)))
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(CHANNELS)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(SEND_SAMPLE_RATE)
+        wav.writeframes(pcm.tobytes())
+    return path
+
+
+class LatencySink:
+    """Discards response audio, recording when the first byte of each reply arrives."""
+
+    def __init__(self, source):
+        self.source = source
+        self.latencies_ms = []
+        self.bytes_received = 0
+        self._answered = 0
+        # Set by AudioLoop when it runs an echo canceller; fed the reply as if played.
+        self.reference = None
+
+    async def start(self):
+        pass
+
+    async def write(self, data):
+        self.bytes_received += len(data)
+        if self.reference:
+            self.reference.write(data)
+        speech_end_times = self.source.speech_end_times
+        if len(speech_end_times) > self._answered:
+            self.latencies_ms.append((time.monotonic() - speech_end_times[-1]) * 1000)
+            self._answered = len(speech_end_times)
+
+    def clear(self):
+        pass
+
+    def turn_complete(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class LoadGenerator:
+    def __init__(self, server, wav_paths, callers, ramp_s=0.0, gap_ms=GAP_MS, tail_s=TAIL_S):
+        self.server = server
+        self.wav_paths = wav_paths
+        self.callers = callers
+        self.ramp_s = ramp_s
+        self.gap_ms = gap_ms
+        self.tail_s = tail_s
+        self.calls = []
+        self.samples = []
+
+    async def _caller(self, delay):
+        await asyncio.sleep(delay)
+        source = WavFileSource(self.wav_paths, gap_ms=self.gap_ms)
+        sink = LatencySink(source)
+        call = self.server.admit(source, sink)
+        self.calls.append((call, source, sink))
+        done = asyncio.create_task(self.server.wait(call.session_id))
+        finished = asyncio.create_task(source.finished.wait())
+        await asyncio.wait([done, finished], return_when=asyncio.FIRST_COMPLETED)
+        if not done.done():
+            await asyncio.sleep(self.tail_s)
+            await self.server.hangup(call.session_id)
+        finished.cancel()
+        await asyncio.gather(done, return_exceptions=True)
+
+    async def _monitor(self):
+        last_wall = time.monotonic()
+        last_cpu = time.process_time()
+        while True:
+            await asyncio.sleep(SAMPLE_INTERVAL_S)
+            wall, cpu = time.monotonic(), time.process_time()
+            stats = self.server.stats()
+            depths = [call.out_queue.qsize() for call in self.server.sessions.values() if call.out_queue]
+            sample = {
+                "active_sessions": stats["active_sessions"],
+                "cpu_percent": (cpu - last_cpu) / (wall - last_wall) * 100,
+                "rss_mb": _rss_mb(),
+                "out_queue_depth": stats["out_queue_depth"],
+                "max_out_queue_depth": max(depths, default=0),
+                "dropped_chunks": stats["dropped_chunks"],
+            }
+            self.samples.append(sample)
+            print(
+                f"[{len(self.samples):4d}s] sessions={sample['active_sessions']} "
+                f"cpu={sample['cpu_percent']:.0f}% rss={sample['rss_mb']:.0f}MB "
+                f"out_queue={sample['out_queue_depth']} (max {sample['max_out_queue_depth']}) "
+                f"dropped={sample['dropped_chunks']}"
+            )
+            last_wall, last_cpu = wall, cpu
+
+    async def run(self):
+        start_wall, start_cpu = time.monotonic(), time.process_time()
+        start_rss = _rss_mb()
+        monitor = asyncio.create_task(self._monitor())
+        step = self.ramp_s / self.callers if self.callers else 0.0
+        try:
+            await asyncio.gather(*(self._caller(i * step) for i in range(self.callers)))
+        finally:
+            monitor.cancel()
+        return self.report(
+            time.monotonic() - start_wall, time.process_time() - start_cpu, start_rss
+        )
+
+    def report(self, wall_s, cpu_s, start_rss_mb):
+        latencies = sorted(ms for _, _, sink in self.calls for ms in sink.latencies_ms)
+        utterances = sum(len(source.speech_end_times) for _, source, _ in self.calls)
+        stats = self.server.stats()
+        sessions = max(1, len(self.calls))
+        peak_rss = max((s["rss_mb"] for s in self.samples), default=_rss_mb())
+        return {
+            "callers": self.callers,
+            "failed_calls": stats["failed"],
+            "utterances": utterances,
+            "replies": len(latencies),
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "max": latencies[-1] if latencies else None,
+            },
+            "connect_latency_ms_p50": _percentile(
+                sorted(call.connect_latency_ms for call, _, _ in self.calls if call.connect_latency_ms),
+                50,
+            ),
+            "dropped_chunks": stats["dropped_chunks"],
+            "chunks_sent": stats["chunks_sent"],
+            "max_out_queue_depth": max((call.max_out_queue_depth for call, _, _ in self.calls), default=0),
+            "max_capture_lag_ms": max((source.max_lag_ms for _, source, _ in self.calls), default=0.0),
+            "cpu_percent_avg": cpu_s / wall_s * 100 if wall_s else 0.0,
+            "cpu_ms_per_session_second": cpu_s * 1000 / (sessions * wall_s) if wall_s else 0.0,
+            "rss_mb_peak": peak_rss,
+            "rss_mb_per_session": (peak_rss - start_rss_mb) / sessions,
+            "echo_cancel_cpu_ms": sum(
+                call.echo_canceller.cpu_s * 1000 for call, _, _ in self.calls if call.echo_canceller
+            ),
+            "errors": sorted({call.stats()["error"] for call, _, _ in self.calls if call.error}),
+        }
+
+
+def print_report(report):
+    latency = report["latency_ms"]
+    fmt = lambda v: "n/a" if v is None else f"{v:.1f}"
+    print("\n--- Load Test Summary ---")
+    print(f"Callers: {report['callers']} (failed: {report['failed_calls']})")
+    print(f"Replies: {report['replies']}/{report['utterances']} utterances")
+    print(
+        f"End of speech -> first audio byte (ms): p50 {fmt(latency['p50'])}, "
+        f"p95 {fmt(latency['p95'])}, p99 {fmt(latency['p99'])}, max {fmt(latency['max'])}"
+    )
+    print(f"Connect latency p50: {fmt(report['connect_latency_ms_p50'])} ms")
+    if report.get("connect_phases_ms_p50"):
+        phases = report["connect_phases_ms_p50"]
+        print("Connect phases p50 (ms): " + ", ".join(
+            f"{phase.removesuffix('_ms')} {fmt(value)}" for phase, value in phases.items()
+        ))
+    print(f"Dropped chunks: {report['dropped_chunks']} of {report['chunks_sent']} sent")
+    print(f"Max out_queue depth: {report['max_out_queue_depth']}")
+    print(f"Max capture lag: {report['max_capture_lag_ms']:.1f} ms")
+    print(
+        f"CPU: {report['cpu_percent_avg']:.0f}% avg, "
+        f"{report['cpu_ms_per_session_second']:.2f} ms per session-second"
+    )
+    if report["echo_cancel_cpu_ms"]:
+        print(f"Echo canceller CPU: {report['echo_cancel_cpu_ms']:.0f} ms total")
+    print(f"RSS: {report['rss_mb_peak']:.0f} MB peak, {report['rss_mb_per_session']:.2f} MB per session")
+    for error in report["errors"]:
+        print(f"Error: {error}")
+
+
+async def main(args):
+    mock = None
+    tmpdir = tempfile.TemporaryDirectory()
+    http_options = {"api_version": API_VERSION}
+    if args.base_url:
+        http_options["base_url"] = args.base_url
+    if args.mock:
+        certfile, keyfile = make_self_signed_cert(tmpdir.name)
+        mock = MockLiveServer(
+            port=0,
+            response_delay_ms=args.mock_response_delay_ms,
+            certfile=certfile,
+            keyfile=keyfile,
+        )
+        await mock.start()
+        http_options = mock.client_http_options(API_VERSION)
+    wav_paths = args.wav or [write_speech_wav(os.path.join(tmpdir.name, "speech.wav"))]
+
+    api_key = os.environ.get("GEMINI_API_KEY") or ("test" if args.mock else None)
+    client = genai.Client(api_key=api_key, http_options=http_options)
+    # Every connect, the pool's included, when the SDK can report its phases.
+    connect_timings = []
+    if hasattr(client.aio.live, "add_connect_timings_callback"):
+        client.aio.live.add_connect_timings_callback(connect_timings.append)
+    pool = None
+    if args.pool_size:
+        pool = SessionPool(client, size=args.pool_size)
+        pool.warm(MODEL, CLIENT_ACTIVITY_CONFIG if args.client_vad else CONFIG)
+        await pool.start()
+    server = CallServer(
+        client=client,
+        max_sessions=args.callers,
+        client_vad=args.client_vad,
+        pool=pool,
+        echo_cancel=args.echo_cancel,
+    )
+    generator = LoadGenerator(server, wav_paths, args.callers, ramp_s=args.ramp_s, gap_ms=args.gap_ms)
+    try:
+        report = await generator.run()
+    finally:
+        await server.shutdown()
+        if pool:
+            await pool.close()
+            print(f"Session pool: {pool.stats()}")
+        if mock:
+            await mock.close()
+        tmpdir.cleanup()
+    if connect_timings:
+        report["connect_phases_ms_p50"] = connect_phase_percentiles(connect_timings, 50)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--callers", type=int, default=10)
+    parser.add_argument("--wav", nargs="*", help="16 kHz mono 16-bit WAV utterances, played in order")
+    parser.add_argument("--ramp-s", type=float, default=0.0, help="spread caller start over this many seconds")
+    parser.add_argument("--gap-ms", type=int, default=GAP_MS)
+    parser.add_argument("--base-url", help="Live API endpoint (default: the SDK's)")
+    parser.add_argument("--mock", action="store_true", help="run against an in-process mock_live_server")
+    parser.add_argument("--mock-response-delay-ms", type=float, default=300)
+    parser.add_argument(
+        "--client-vad", action="store_true", help="detect activity locally and send activity_start/activity_end"
+    )
+    parser.add_argument("--pool-size", type=int, default=0, help="keep this many sessions pre-connected")
+    parser.add_argument("--echo-cancel", action="store_true", help="run each call's echo canceller on the reply audio")
+    parser.add_argument("--json", help="also write the report to this file")
+    asyncio.run(main(parser.parse_args()))
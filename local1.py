@@ -6,6 +6,9 @@ import base64
 import time
 import os
 
+from live_config import INPUT_DEVICE_INDEX, OUTPUT_DEVICE_INDEX
+from resample import StreamingResampler, device_rate
+
 # --- Configuration ---
 FORMAT = pyaudio.paInt16  # Audio format
 CHANNELS = 1              # Mono audio
@@ -13,23 +16,37 @@ RATE = 16000              # Sample rate (Hz)
 CHUNK = 512              # Audio chunk size
 
 API_KEY = os.getenv("GEMINI_API_KEY") # Your Gemini API key environment variable
-GEMINI_LIVE_API_URL = f"wss://generativelanguage.googleapis.com/ws/google.ai.generativelanguage.v1alpha.GenerativeService.BidiGenerateContent?key={API_KEY}" # Official Gemini Live API WebSocket endpoint with API key as query parameter
+GEMINI_LIVE_API_URL = os.getenv(
+    "GEMINI_LIVE_API_URL",  # e.g. ws://127.0.0.1:8765 for mock_live_server.py
+    f"wss://generativelanguage.googleapis.com/ws/google.ai.generativelanguage.v1alpha.GenerativeService.BidiGenerateContent?key={API_KEY}" # Official Gemini Live API WebSocket endpoint with API key as query parameter
+)
 
 # --- PyAudio Setup ---
 audio = pyaudio.PyAudio()
 
+# Open both devices at their native rates and resample to the 16 kHz / 24 kHz
+# wire rates ourselves, instead of leaving it to PortAudio or the OS.
+input_device = INPUT_DEVICE_INDEX if INPUT_DEVICE_INDEX is not None else audio.get_default_input_device_info()["index"]
+output_device = OUTPUT_DEVICE_INDEX if OUTPUT_DEVICE_INDEX is not None else audio.get_default_output_device_info()["index"]
+input_rate = device_rate(audio, input_device, RATE)
+output_rate = device_rate(audio, output_device, 24000)
+input_resampler = StreamingResampler(input_rate, RATE)
+output_resampler = StreamingResampler(24000, output_rate)
+
 # Open input stream (microphone)
 input_stream = audio.open(format=FORMAT,
                           channels=CHANNELS,
-                          rate=RATE,
+                          rate=input_rate,
                           input=True,
-                          frames_per_buffer=CHUNK)
+                          input_device_index=input_device,
+                          frames_per_buffer=CHUNK * input_rate // RATE)
 
 # Open output stream (speakers)
 output_stream = audio.open(format=FORMAT,
                            channels=CHANNELS,
-                           rate=24000,
+                           rate=output_rate,
                            output=True,
+                           output_device_index=output_device,
                            frames_per_buffer=CHUNK)
 
 # Variable to store the start time for initial response latency calculation
@@ -65,7 +82,7 @@ def on_message(ws, message):
                 if "inlineData" in part and "data" in part["inlineData"]:
                     returned_audio_data = base64.b64decode(part["inlineData"]["data"])
                     if returned_audio_data:
-                        output_stream.write(returned_audio_data)
+                        output_stream.write(output_resampler.process(returned_audio_data))
         elif "setupResponse" in response_data:
             print(f"Received setup response: {response_data['setupResponse']}")
         elif "setupComplete" in response_data:
@@ -163,7 +180,9 @@ ws_thread.start()
 try:
     while True:
         # 1. Capture audio from microphone
-        audio_data = input_stream.read(CHUNK, exception_on_overflow=False)
+        audio_data = input_resampler.process(
+            input_stream.read(CHUNK * input_rate // RATE, exception_on_overflow=False)
+        )
         
         # 2. Send audio to Gemini Live API via WebSocket
         if ws and ws.sock and ws.sock.connected:
@@ -0,0 +1,372 @@
+"""Local stand-in for the Gemini Live BidiGenerateContent WebSocket.
+
+Speaks enough of the protocol for ``client.aio.live.connect`` (see
+``exp/live.py``) and ``local1.py``: the setup/setupComplete handshake,
+realtimeInput audio, and serverContent with inlineData audio, transcriptions,
+generationComplete, interrupted, turnComplete and usageMetadata. The caller's
+turn ends after ``end_of_speech_ms`` of silence following speech, or on
+audioStreamEnd/activityEnd; when setup disables automaticActivityDetection,
+only activityStart/activityEnd mark turns. Speech that arrives while a
+response is streaming interrupts it. When setup asks for sessionResumption,
+a resumable sessionResumptionUpdate follows setupComplete and every
+turnComplete, and a ``resumable: false`` one is sent when the caller starts
+speaking and when a response starts, like the real service while a turn is
+in progress; with ``go_away_after_s`` each connection gets a goAway that
+long after setup and is closed ``go_away_notice_s`` later.
+
+The SDK always connects with ``wss://``, so give the server a certificate
+(``make_self_signed_cert`` writes one with the openssl CLI) and point a client
+at it with::
+
+    genai.Client(api_key="test", http_options=server.client_http_options())
+
+``local1.py`` can use plain ``ws://`` by setting ``GEMINI_LIVE_API_URL``.
+"""
+
+import argparse
+import array
+import asyncio
+import base64
+import contextlib
+import json
+import math
+import os
+import ssl
+import subprocess
+import time
+
+try:
+    from websockets.asyncio.server import serve
+except ModuleNotFoundError:
+    from websockets.server import serve  # type: ignore
+from websockets import ConnectionClosed
+
+from live_config import RECEIVE_SAMPLE_RATE, SAMPLE_WIDTH, SEND_SAMPLE_RATE
+
+HOST = "127.0.0.1"
+PORT = 8765
+RESPONSE_DELAY_MS = 300
+RESPONSE_AUDIO_MS = 2000
+CHUNK_MS = 40
+END_OF_SPEECH_MS = 300
+SILENCE_PEAK = 500  # int16 peak at or below which a chunk counts as silence
+AUDIO_TOKENS_PER_SECOND = 32
+GO_AWAY_NOTICE_S = 2.0
+TONE_HZ = 440
+INPUT_TRANSCRIPT = "halo"
+OUTPUT_TRANSCRIPT = "Halo, ada yang bisa saya bantu?"
+
+
+def _b64decode(data):
+    # The SDK sends url-safe base64, local1.py sends the standard alphabet.
+    return base64.b64decode(data.replace("-", "+").replace("_", "/"))
+
+
+def _tone(duration_ms, rate=RECEIVE_SAMPLE_RATE, hz=TONE_HZ, amplitude=6000):
+    samples = int(rate * duration_ms / 1000)
+    step = 2 * math.pi * hz / rate
+    return array.array("h", (int(amplitude * math.sin(i * step)) for i in range(samples))).tobytes()
+
+
+def make_self_signed_cert(directory):
+    """Write a localhost certificate and key into ``directory``; return their paths."""
+    certfile = os.path.join(directory, "mock_live_cert.pem")
+    keyfile = os.path.join(directory, "mock_live_key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout", keyfile, "-out", certfile,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return certfile, keyfile
+
+
+class _MockCall:
+    """Protocol state for one WebSocket connection."""
+
+    def __init__(self, server, websocket):
+        self.server = server
+        self.websocket = websocket
+        self.in_speech = False
+        self.silent_samples = 0
+        self.turn_input_samples = 0
+        self.response_task = None
+        self.go_away_task = None
+        self.manual_activity = False
+        self.resumption = False
+        self.handles = 0
+
+    async def run(self):
+        setup = json.loads(await self.websocket.recv())
+        if "setup" not in setup:
+            await self.websocket.close(1007, "First message must be setup")
+            return
+        self.server.sessions_opened += 1
+        realtime_input_config = setup["setup"].get("realtimeInputConfig") or {}
+        detection = realtime_input_config.get("automaticActivityDetection") or {}
+        # With automatic detection disabled only activityStart/activityEnd mark turns.
+        self.manual_activity = bool(detection.get("disabled"))
+        resumption = setup["setup"].get("sessionResumption")
+        self.resumption = resumption is not None
+        if resumption and resumption.get("handle"):
+            self.server.sessions_resumed += 1
+        await self.send({"setupComplete": {}})
+        await self.send_resumption_update()
+        if self.server.go_away_after_s is not None:
+            self.go_away_task = asyncio.create_task(self.go_away())
+        try:
+            async for message in self.websocket:
+                await self.on_client_message(json.loads(message))
+        except ConnectionClosed:
+            pass
+        finally:
+            if self.response_task:
+                self.response_task.cancel()
+            if self.go_away_task:
+                self.go_away_task.cancel()
+
+    async def send(self, message):
+        await self.websocket.send(json.dumps(message))
+
+    async def send_resumption_update(self, resumable=True):
+        if not self.resumption:
+            return
+        if not resumable:
+            await self.send({"sessionResumptionUpdate": {"resumable": False}})
+            return
+        self.handles += 1
+        handle = f"mock-{id(self):x}-{self.handles}"
+        await self.send({"sessionResumptionUpdate": {"newHandle": handle, "resumable": True}})
+
+    async def go_away(self):
+        server = self.server
+        await asyncio.sleep(server.go_away_after_s)
+        with contextlib.suppress(ConnectionClosed):
+            await self.send({"goAway": {"timeLeft": f"{server.go_away_notice_s}s"}})
+            server.go_aways += 1
+            await asyncio.sleep(server.go_away_notice_s)
+            await self.websocket.close(1011, "Session lifetime exceeded")
+
+    async def on_client_message(self, message):
+        realtime_input = message.get("realtimeInput") or message.get("realtime_input")
+        if realtime_input is not None:
+            if audio := realtime_input.get("audio"):
+                await self.on_audio(_b64decode(audio["data"]))
+            # The deprecated send()/start_stream() path uses snake_case keys.
+            for chunk in realtime_input.get("mediaChunks") or realtime_input.get("media_chunks") or ():
+                if (chunk.get("mimeType") or chunk.get("mime_type", "")).startswith("audio/"):
+                    await self.on_audio(_b64decode(chunk["data"]))
+            if "activityStart" in realtime_input:
+                await self.on_speech_start()
+            if realtime_input.get("audioStreamEnd") or "activityEnd" in realtime_input:
+                self.end_turn()
+            return
+        client_content = message.get("clientContent") or message.get("client_content")
+        if client_content is not None and client_content.get("turnComplete", True):
+            self.end_turn()
+
+    async def on_audio(self, pcm):
+        self.server.chunks_received += 1
+        samples = array.array("h", pcm)
+        if self.manual_activity:
+            if self.in_speech:
+                self.turn_input_samples += len(samples)
+            return
+        self.turn_input_samples += len(samples)
+        if samples and max(max(samples), -min(samples)) > self.server.silence_peak:
+            self.silent_samples = 0
+            if not self.in_speech:
+                await self.on_speech_start()
+            return
+        if self.in_speech:
+            self.silent_samples += len(samples)
+            if self.silent_samples * 1000 >= self.server.end_of_speech_ms * SEND_SAMPLE_RATE:
+                self.end_turn()
+
+    async def on_speech_start(self):
+        self.in_speech = True
+        await self.send_resumption_update(resumable=False)
+        if self.response_task and not self.response_task.done():
+            self.response_task.cancel()
+            self.server.interruptions += 1
+            await self.send({"serverContent": {"interrupted": True}})
+
+    def end_turn(self):
+        if not self.in_speech and not self.turn_input_samples:
+            return
+        input_samples = self.turn_input_samples
+        self.in_speech = False
+        self.silent_samples = 0
+        self.turn_input_samples = 0
+        if self.response_task and not self.response_task.done():
+            self.response_task.cancel()
+        self.response_task = asyncio.create_task(self.respond(input_samples))
+
+    async def respond(self, input_samples):
+        server = self.server
+        await self.send_resumption_update(resumable=False)
+        await asyncio.sleep(server.response_delay_ms / 1000)
+        await self.send({"serverContent": {"inputTranscription": {"text": INPUT_TRANSCRIPT}}})
+
+        audio = server.response_audio
+        chunk_bytes = int(RECEIVE_SAMPLE_RATE * server.chunk_ms / 1000) * SAMPLE_WIDTH
+        interval = server.chunk_interval_ms / 1000
+        next_send = time.monotonic()
+        for offset in range(0, len(audio), chunk_bytes):
+            data = base64.b64encode(audio[offset:offset + chunk_bytes]).decode("ascii")
+            await self.send({"serverContent": {"modelTurn": {"parts": [
+                {"inlineData": {"mimeType": f"audio/pcm;rate={RECEIVE_SAMPLE_RATE}", "data": data}}]}}})
+            server.chunks_sent += 1
+            if interval:
+                next_send += interval
+                await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+
+        await self.send({"serverContent": {"outputTranscription": {"text": OUTPUT_TRANSCRIPT}}})
+        await self.send({"serverContent": {"generationComplete": True}})
+        prompt_tokens = int(input_samples / SEND_SAMPLE_RATE * AUDIO_TOKENS_PER_SECOND)
+        response_tokens = int(server.response_audio_ms / 1000 * AUDIO_TOKENS_PER_SECOND)
+        await self.send({
+            "serverContent": {"turnComplete": True},
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "responseTokenCount": response_tokens,
+                "totalTokenCount": prompt_tokens + response_tokens,
+                "responseTokensDetails": [{"modality": "AUDIO", "tokenCount": response_tokens}],
+            },
+        })
+        server.turns_completed += 1
+        await self.send_resumption_update()
+
+
+class MockLiveServer:
+    def __init__(
+        self,
+        host=HOST,
+        port=PORT,
+        response_delay_ms=RESPONSE_DELAY_MS,
+        response_audio_ms=RESPONSE_AUDIO_MS,
+        chunk_ms=CHUNK_MS,
+        chunk_interval_ms=None,
+        end_of_speech_ms=END_OF_SPEECH_MS,
+        silence_peak=SILENCE_PEAK,
+        certfile=None,
+        keyfile=None,
+        go_away_after_s=None,
+        go_away_notice_s=GO_AWAY_NOTICE_S,
+    ):
+        self.host = host
+        self.port = port
+        self.response_delay_ms = response_delay_ms
+        self.response_audio_ms = response_audio_ms
+        self.chunk_ms = chunk_ms
+        # Default cadence is real time; 0 sends every chunk back to back.
+        self.chunk_interval_ms = chunk_ms if chunk_interval_ms is None else chunk_interval_ms
+        self.end_of_speech_ms = end_of_speech_ms
+        self.silence_peak = silence_peak
+        self.response_audio = _tone(response_audio_ms)
+        self.go_away_after_s = go_away_after_s
+        self.go_away_notice_s = go_away_notice_s
+        self.certfile = certfile
+        self.ssl_context = None
+        if certfile:
+            self.ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.ssl_context.load_cert_chain(certfile, keyfile)
+        self._server = None
+        self.sessions_opened = 0
+        self.sessions_resumed = 0
+        self.go_aways = 0
+        self.chunks_received = 0
+        self.chunks_sent = 0
+        self.turns_completed = 0
+        self.interruptions = 0
+
+    @property
+    def base_url(self):
+        scheme = "https" if self.ssl_context else "http"
+        return f"{scheme}://{self.host}:{self.port}"
+
+    def client_http_options(self, api_version="v1alpha"):
+        """http_options for a genai.Client that trusts this server's certificate."""
+        client_ssl = ssl.create_default_context(cafile=self.certfile)
+        return {
+            "api_version": api_version,
+            "base_url": self.base_url,
+            "async_client_args": {"ssl": client_ssl},
+        }
+
+    async def _handler(self, websocket):
+        await _MockCall(self, websocket).run()
+
+    async def start(self):
+        self._server = await serve(
+            self._handler, self.host, self.port, ssl=self.ssl_context, max_size=None
+        )
+        if not self.port:
+            self.port = next(iter(self._server.sockets)).getsockname()[1]
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def stats(self):
+        return {
+            "sessions_opened": self.sessions_opened,
+            "sessions_resumed": self.sessions_resumed,
+            "go_aways": self.go_aways,
+            "chunks_received": self.chunks_received,
+            "chunks_sent": self.chunks_sent,
+            "turns_completed": self.turns_completed,
+            "interruptions": self.interruptions,
+        }
+
+
+async def main(args):
+    server = MockLiveServer(
+        host=args.host,
+        port=args.port,
+        response_delay_ms=args.response_delay_ms,
+        response_audio_ms=args.response_audio_ms,
+        chunk_ms=args.chunk_ms,
+        chunk_interval_ms=args.chunk_interval_ms,
+        end_of_speech_ms=args.end_of_speech_ms,
+        certfile=args.certfile,
+        keyfile=args.keyfile,
+        go_away_after_s=args.go_away_after_s,
+    )
+    await server.start()
+    scheme = "wss" if server.ssl_context else "ws"
+    print(f"Mock Gemini Live server listening on {scheme}://{server.host}:{server.port}")
+    try:
+        await asyncio.Future()
+    finally:
+        await server.close()
+        print(server.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--response-delay-ms", type=float, default=RESPONSE_DELAY_MS)
+    parser.add_argument("--response-audio-ms", type=int, default=RESPONSE_AUDIO_MS)
+    parser.add_argument("--chunk-ms", type=int, default=CHUNK_MS)
+    parser.add_argument(
+        "--chunk-interval-ms",
+        type=float,
+        default=None,
+        help="delay between audio chunks (default: chunk length, 0 for no pacing)",
+    )
+    parser.add_argument("--end-of-speech-ms", type=int, default=END_OF_SPEECH_MS)
+    parser.add_argument(
+        "--go-away-after-s", type=float, help="send goAway this long into each connection, then close it"
+    )
+    parser.add_argument("--certfile", help="serve wss:// with this certificate")
+    parser.add_argument("--keyfile")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
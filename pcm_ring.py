@@ -0,0 +1,75 @@
+"""Fixed-capacity PCM ring buffer shared by the capture, DSP and send stages.
+
+One producer (usually the PortAudio callback thread) writes into a
+preallocated ``bytearray``; one consumer on the event loop reads contiguous
+``memoryview`` slices of it. The first ``max_read`` bytes of the ring are
+mirrored past its end, so every read of up to ``max_read`` bytes is a single
+contiguous view and nothing is copied between capture and the base64 encoder.
+
+Both cursors carry a monotonic timestamp: ``read()`` returns the capture time
+of the first sample it hands out, derived from the time of the latest write.
+"""
+
+import time
+
+from live_config import SAMPLE_WIDTH, SEND_SAMPLE_RATE
+
+
+class PcmRingBuffer:
+    def __init__(self, capacity_ms, max_read, rate=SEND_SAMPLE_RATE):
+        self.bytes_per_second = rate * SAMPLE_WIDTH
+        capacity = int(self.bytes_per_second * capacity_ms / 1000)
+        self.capacity = max(capacity - capacity % SAMPLE_WIDTH, 2 * max_read)
+        self.max_read = max_read
+        self._buffer = bytearray(self.capacity + max_read)
+        self._view = memoryview(self._buffer)
+        self.write_pos = 0  # total bytes written, only advanced by write()
+        self.read_pos = 0  # total bytes read, only advanced by read()
+        self.write_time = None
+        self.read_time = None
+        self.overruns = 0
+
+    def available(self):
+        return self.write_pos - self.read_pos
+
+    def _put(self, offset, segment):
+        end = offset + len(segment)
+        self._view[offset:end] = segment
+        if offset < self.max_read:
+            mirror_end = min(end, self.max_read)
+            self._view[self.capacity + offset:self.capacity + mirror_end] = segment[:mirror_end - offset]
+
+    def write(self, data, timestamp=None):
+        """Copy ``data`` in at the write cursor; the oldest audio is overwritten when full."""
+        data = memoryview(data)
+        if len(data) > self.capacity:
+            data = data[-self.capacity:]
+        start = self.write_pos % self.capacity
+        split = self.capacity - start
+        if len(data) <= split:
+            self._put(start, data)
+        else:
+            self._put(start, data[:split])
+            self._put(0, data[split:])
+        self.write_time = time.monotonic() if timestamp is None else timestamp
+        self.write_pos += len(data)
+
+    def read(self, nbytes):
+        """Return ``(view, capture_time)`` for the next ``nbytes``, or ``None`` if not yet written.
+
+        The view aliases the ring: use it before another ``capacity - nbytes``
+        bytes are written.
+        """
+        if nbytes > self.max_read:
+            raise ValueError(f"Cannot read {nbytes} bytes, max_read is {self.max_read}")
+        write_pos = self.write_pos
+        if write_pos - self.read_pos < nbytes:
+            return None
+        if write_pos - self.read_pos > self.capacity - nbytes:
+            # The reader fell a whole ring behind: skip to the newest audio.
+            self.overruns += 1
+            self.read_pos = write_pos - nbytes
+        start = self.read_pos % self.capacity
+        self.read_time = self.write_time - (write_pos - self.read_pos) / self.bytes_per_second
+        self.read_pos += nbytes
+        return self._view[start:start + nbytes], self.read_time
@@ -0,0 +1,272 @@
+"""Full-duplex call recording: uplink and downlink WAVs plus an event timeline.
+
+``SessionRecorder`` writes ``uplink.wav`` (16 kHz), ``downlink.wav`` (24 kHz)
+and ``timeline.jsonl`` into one directory per call. Its ``uplink()``,
+``downlink()`` and ``event()`` only copy the audio and put it on a bounded
+queue, so they are safe to call from the event loop or an audio callback;
+when the queue is full the item is dropped and counted, never waited for.
+On the event loop, finish with ``aclose()``, which waits for the writer on
+a worker thread.
+
+The files are created when the recorder is; a ``RecordingWriter`` thread
+does every write after that and can be shared by every call in a process. Each WAV is preallocated and memory-mapped, so an
+append is a memcpy into the page cache; the file is grown by remapping when
+full and truncated to its real length, with the header patched, on close.
+
+Audio is placed by its monotonic timestamp relative to the start of the
+recording, so both WAVs and the timeline share one clock: gaps (silence
+between replies, dropped chunks) are left as zeros and audio arriving faster
+than real time, like a reply burst, is appended back to back. Timeline lines
+carry ``t``, seconds on that clock.
+"""
+
+import asyncio
+import dataclasses
+import json
+import mmap
+import os
+import queue
+import re
+import struct
+import threading
+import time
+
+from live_config import CHANNELS, RECEIVE_SAMPLE_RATE, SAMPLE_WIDTH, SEND_SAMPLE_RATE
+from live_events import EVENT_TYPES, AudioEvent
+
+PREALLOCATE_S = 300
+MAX_PENDING_ITEMS = 20000
+MAX_JITTER_MS = 60  # timestamp lead tolerated before leaving a gap
+
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+_CLOSE = object()
+
+# Timeline names ("TurnCompleteEvent" -> "turn_complete") and the event fields
+# worth keeping; the raw SDK objects are left out.
+_EVENT_NAMES = {
+    event_type: re.sub(r"(?<!^)(?=[A-Z])", "_", event_type.__name__.removesuffix("Event")).lower()
+    for event_type in EVENT_TYPES
+}
+_EVENT_FIELDS = {
+    event_type: tuple(
+        field.name for field in dataclasses.fields(event_type) if field.name not in ("usage_metadata", "tool_call")
+    )
+    for event_type in EVENT_TYPES
+}
+
+
+def _wav_header(rate, data_bytes):
+    return _WAV_HEADER.pack(
+        b"RIFF", 36 + data_bytes, b"WAVE", b"fmt ", 16, 1, CHANNELS, rate,
+        rate * CHANNELS * SAMPLE_WIDTH, CHANNELS * SAMPLE_WIDTH, SAMPLE_WIDTH * 8,
+        b"data", data_bytes,
+    )
+
+
+class MappedWavWriter:
+    """Mono 16-bit WAV file written through a growing memory map.
+
+    Not thread-safe; once created, only the ``RecordingWriter`` thread touches it.
+    """
+
+    def __init__(self, path, rate, preallocate_s=PREALLOCATE_S):
+        self.path = path
+        self.rate = rate
+        self.length = 0  # data bytes written, including gaps
+        self._capacity = max(mmap.ALLOCATIONGRANULARITY, int(preallocate_s * rate) * SAMPLE_WIDTH)
+        self._file = open(path, "w+b")
+        self._file.truncate(_WAV_HEADER.size + self._capacity)
+        self._map = mmap.mmap(self._file.fileno(), _WAV_HEADER.size + self._capacity)
+        self._map[:_WAV_HEADER.size] = _wav_header(rate, 0)
+
+    def write_at(self, offset, data):
+        """Copy ``data`` to byte ``offset`` of the data chunk, or just after the
+        last write when that is later. Skipped bytes stay zero (silence)."""
+        offset = max(self.length, offset - offset % SAMPLE_WIDTH)
+        end = offset + len(data)
+        if end > self._capacity:
+            self._grow(end)
+        start = _WAV_HEADER.size + offset
+        self._map[start:start + len(data)] = data
+        self.length = end
+
+    def _grow(self, needed):
+        while self._capacity < needed:
+            self._capacity *= 2
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(_WAV_HEADER.size + self._capacity)
+        self._map = mmap.mmap(self._file.fileno(), _WAV_HEADER.size + self._capacity)
+
+    def close(self):
+        self._map[:_WAV_HEADER.size] = _wav_header(self.rate, self.length)
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(_WAV_HEADER.size + self.length)
+        self._file.close()
+
+
+class RecordingWriter:
+    """Background thread that performs every recorder's disk writes."""
+
+    def __init__(self, max_pending=MAX_PENDING_ITEMS):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._write_loop, name="recorder", daemon=True)
+        self._thread.start()
+
+    def submit(self, item, wait=False):
+        """Queue ``item``; unless ``wait``, never blocks and returns False if it was dropped."""
+        try:
+            self._queue.put(item, block=wait)
+        except queue.Full:
+            return False
+        return True
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _CLOSE:
+                break
+            recorder, kind, *args = item
+            try:
+                recorder._apply(kind, *args)
+            except (OSError, ValueError) as e:
+                recorder.error = e
+
+    def close(self):
+        """Finish every queued write and stop the thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_CLOSE)
+        self._thread.join()
+
+    async def aclose(self):
+        """``close()`` for the event loop: the wait happens on a worker thread."""
+        await asyncio.to_thread(self.close)
+
+
+class SessionRecorder:
+    def __init__(
+        self,
+        directory,
+        writer=None,
+        uplink_rate=SEND_SAMPLE_RATE,
+        downlink_rate=RECEIVE_SAMPLE_RATE,
+        preallocate_s=PREALLOCATE_S,
+    ):
+        """Record into ``directory``; without a shared ``writer`` one is started
+        and stopped with this recorder."""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._owns_writer = writer is None
+        self.writer = writer or RecordingWriter()
+        self.start_time = time.monotonic()
+        self.dropped = 0
+        self.error = None
+        self.closed = False
+        # Opened here rather than queued like the writes: an "open" dropped
+        # from a full queue would lose the whole call. Creating the files and
+        # their maps is quick; everything else on disk is the writer thread's.
+        self._streams = None
+        try:
+            self._open(uplink_rate, downlink_rate, preallocate_s)
+        except (OSError, ValueError) as e:
+            self.error = e
+
+    def _open(self, uplink_rate, downlink_rate, preallocate_s):
+        streams = {}
+        try:
+            streams["uplink"] = MappedWavWriter(
+                os.path.join(self.directory, "uplink.wav"), uplink_rate, preallocate_s
+            )
+            streams["downlink"] = MappedWavWriter(
+                os.path.join(self.directory, "downlink.wav"), downlink_rate, preallocate_s
+            )
+            self._timeline = open(os.path.join(self.directory, "timeline.jsonl"), "w", buffering=1 << 16)
+        except BaseException:
+            for wav in streams.values():
+                wav.close()
+            raise
+        self._streams = streams
+        self._write_event("recording_start", self.start_time, {"wall_time": time.time()})
+
+    def _submit(self, kind, *args):
+        if self._streams is None:
+            # Not open (see ``error``); nothing would be written.
+            return
+        if not self.writer.submit((self, kind, *args)):
+            self.dropped += 1
+
+    def uplink(self, pcm, timestamp=None):
+        """Record caller audio captured at monotonic ``timestamp`` (default: now)."""
+        self._submit("uplink", bytes(pcm), time.monotonic() if timestamp is None else timestamp)
+
+    def downlink(self, pcm, timestamp=None):
+        """Record model audio received at monotonic ``timestamp`` (default: now)."""
+        self._submit("downlink", bytes(pcm), time.monotonic() if timestamp is None else timestamp)
+
+    def event(self, name, **fields):
+        self._submit("event", name, time.monotonic(), fields)
+
+    def close(self, **summary):
+        """Append ``summary`` as a final ``session_summary`` event and finalize the files."""
+        if not self._begin_close(summary):
+            return
+        # Finalizing must not be lost to a full queue.
+        self.writer.submit((self, "close"), wait=True)
+        if self._owns_writer:
+            self.writer.close()
+
+    async def aclose(self, **summary):
+        """``close()`` for the event loop: never blocks it on the queue or the writer thread."""
+        if not self._begin_close(summary):
+            return
+        if not self.writer.submit((self, "close")):
+            await asyncio.to_thread(self.writer.submit, (self, "close"), True)
+        if self._owns_writer:
+            await self.writer.aclose()
+
+    def _begin_close(self, summary):
+        if self.closed:
+            return False
+        self.closed = True
+        if summary:
+            self.event("session_summary", dropped=self.dropped, **summary)
+        return True
+
+    # Writer thread only from here on.
+
+    def _apply(self, kind, *args):
+        if self._streams is None:
+            return
+        elif kind == "event":
+            self._write_event(*args)
+        elif kind == "close":
+            for wav in self._streams.values():
+                wav.close()
+            self._timeline.close()
+            self._streams = None
+        else:
+            data, timestamp = args
+            wav = self._streams[kind]
+            position = int(max(0.0, timestamp - self.start_time) * wav.rate) * SAMPLE_WIDTH
+            # Leave a gap only when the timestamp is clearly ahead; capture
+            # timestamps jitter by a few ms from chunk to chunk.
+            if position - wav.length < MAX_JITTER_MS * wav.rate // 1000 * SAMPLE_WIDTH:
+                position = wav.length
+            wav.write_at(position, data)
+
+    def _write_event(self, name, timestamp, fields):
+        record = {"t": round(timestamp - self.start_time, 6), "event": name, **fields}
+        self._timeline.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def attach(self, dispatcher):
+        """Record a ``LiveEventDispatcher``'s audio as downlink and its other events on the timeline."""
+        dispatcher.on(AudioEvent, lambda event: self.downlink(event.data))
+        for event_type in EVENT_TYPES:
+            if event_type is not AudioEvent:
+                dispatcher.on(event_type, self._on_event)
+
+    def _on_event(self, event):
+        fields = {name: getattr(event, name) for name in _EVENT_FIELDS[type(event)]}
+        self.event(_EVENT_NAMES[type(event)], **fields)
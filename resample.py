@@ -0,0 +1,106 @@
+"""Streaming polyphase sample-rate conversion for 16-bit mono PCM.
+
+Lets capture and playback run at whatever rate the device prefers (44.1 or
+48 kHz, typically) while the wire stays at 16 kHz up and 24 kHz down, instead
+of asking PortAudio or the OS to resample.
+
+``StreamingResampler`` converts by the exact rational ratio ``up / down``
+with a Kaiser-windowed sinc split into ``up`` polyphase branches. Each call
+to ``process()`` takes any number of input samples and returns every output
+sample they complete; the tail of the input is kept as filter history, so
+blocks join without clicks. Per call, the input samples each output needs
+are gathered into an ``(outputs, taps)`` array and reduced against the
+matching branch coefficients in one numpy operation; the gather indices and
+coefficient rows are cached per block shape.
+"""
+
+import fractions
+
+import numpy as np
+
+TAPS_PER_PHASE = 32
+CUTOFF = 0.92  # of the lower Nyquist frequency
+KAISER_BETA = 8.0
+MAX_CACHED_KERNELS = 64
+
+
+class StreamingResampler:
+    def __init__(self, in_rate, out_rate, taps_per_phase=TAPS_PER_PHASE, cutoff=CUTOFF):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        ratio = fractions.Fraction(out_rate, in_rate)
+        self.up, self.down = ratio.numerator, ratio.denominator
+        self.taps = taps_per_phase
+        # Low-pass at the upsampled rate; branch p holds taps p, p + up, ...
+        length = taps_per_phase * self.up
+        n = np.arange(length) - (length - 1) / 2
+        fc = cutoff * 0.5 * min(in_rate, out_rate) / (in_rate * self.up)
+        h = 2 * fc * np.sinc(2 * fc * n) * np.kaiser(length, KAISER_BETA) * self.up
+        self._bank = h.reshape(taps_per_phase, self.up).T[:, ::-1].astype(np.float32).copy()
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self._position = 0  # upsampled position of the next output, from the history start
+        self._kernels = {}
+        # Group delay of the filter, in output samples.
+        self.delay = (length - 1) / 2 / self.down
+
+    @property
+    def passthrough(self):
+        return self.up == self.down
+
+    def process(self, pcm):
+        """Resample a block of int16 ``pcm`` (bytes-like) and return int16 bytes."""
+        if self.passthrough:
+            return bytes(pcm)
+        y = self.process_samples(np.frombuffer(pcm, dtype=np.int16))
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16).tobytes()
+
+    def process_samples(self, samples):
+        """Resample an array of samples and return float32 samples."""
+        if self.passthrough:
+            return np.asarray(samples, dtype=np.float32)
+        x = np.concatenate((self._history, np.asarray(samples, dtype=np.float32)))
+        taps = self.taps
+        # Output n needs input samples first[n] .. first[n] + taps - 1.
+        last = (len(x) - taps) * self.up + self.up - 1
+        count = max(0, (last - self._position) // self.down + 1)
+        if x.any():
+            index, coef = self._kernel(self._position, count)
+            y = np.einsum("ij,ij->i", x[index], coef)
+        else:
+            # Silence in, silence out; only the phase needs to move on.
+            y = np.zeros(count, dtype=np.float32)
+        consumed = len(x) - (taps - 1)
+        self._history = x[consumed:]
+        self._position += count * self.down - consumed * self.up
+        return y
+
+    def _kernel(self, position, count):
+        """Gather indices and coefficients for ``count`` outputs from ``position``.
+
+        Fixed-size blocks keep hitting the same few phases, so they are cached.
+        """
+        key = (position, count)
+        kernel = self._kernels.get(key)
+        if kernel is None:
+            if len(self._kernels) >= MAX_CACHED_KERNELS:
+                self._kernels.clear()
+            positions = position + np.arange(count) * self.down
+            index = (positions // self.up)[:, None] + np.arange(self.taps)
+            kernel = self._kernels[key] = (index, self._bank[positions % self.up])
+        return kernel
+
+    def output_size(self, input_samples):
+        """Roughly how many samples ``input_samples`` turn into."""
+        return input_samples * self.up // self.down
+
+    def reset(self):
+        self._history[:] = 0
+        self._position = 0
+
+
+def device_rate(pya, device_index, fallback):
+    """The device's default (native) sample rate, or ``fallback`` if unknown."""
+    try:
+        return int(pya.get_device_info_by_index(device_index)["defaultSampleRate"])
+    except (OSError, KeyError, TypeError, ValueError):
+        return fallback
@@ -0,0 +1,465 @@
+"""Live session that survives go-away messages and dropped connections.
+
+A Live connection has a bounded lifetime: the server sends ``go_away`` some
+seconds before it closes it, and a network blip can drop it at any time.
+``ResilientSession`` wraps the SDK session with the same ``send_*`` and
+``receive()``/``receive_lazy()`` methods, so ``LiveEventDispatcher.pump``
+and ``AudioLoop`` use it unchanged and keep one dispatcher,
+one set of queues and one set of token counters for the whole call.
+
+It asks for session resumption and keeps the latest resumable handle. On
+``go_away`` (or after ``max_connection_s``) it waits for a turn boundary,
+the first resumable handle after a turnComplete with no caller activity or
+model output since, then opens the replacement connection with that handle
+while the old one is still up, switches over and closes the old one. A turn
+still in progress when ``go_away`` arrives finishes on the old connection,
+which stays usable until ``time_left`` runs out. A dropped connection
+is reopened the same way, with retries; the last attempt starts a fresh
+session in case the handle itself is the problem. A connection that keeps
+closing before the server sends anything ends the call instead.
+
+Uplink input sent while no connection can take it is held (up to
+``hold_ms`` of audio) and flushed in order to the new connection, after
+re-sending the input sent since the handle it resumes from, so nothing the
+caller said is lost in the swap. When more than ``replay_ms`` of audio has
+been sent since that handle, none of it is replayed (a resumed session
+would hear the utterance with its start cut off) and ``replay_overflow``
+is logged.
+
+    async with resilient_connect(client.aio.live.connect, model=MODEL, config=CONFIG) as session:
+        ...
+"""
+
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import re
+import time
+
+from google.genai import errors
+from websockets import ConnectionClosed
+
+from live_config import SAMPLE_WIDTH, SEND_SAMPLE_RATE
+from pcm_ring import PcmRingBuffer
+
+REPLAY_MS = 5000
+REPLAY_READ_MS = 100  # replayed audio is re-sent in pieces of at most this much
+HOLD_MS = 10000
+GO_AWAY_TIME_LEFT_S = 5.0  # assumed when go_away does not say
+GO_AWAY_GRACE_S = 2.0  # past time_left, rotate mid-turn if the old connection is somehow still up
+TURN_BOUNDARY_WAIT_S = 30.0  # longest a max_connection_s rotation waits for a turn boundary
+RECONNECT_ATTEMPTS = 3
+RECONNECT_BACKOFF_S = 0.25
+
+_AUDIO_BYTES_PER_MS = SEND_SAMPLE_RATE * SAMPLE_WIDTH // 1000
+
+
+def _seconds(duration):
+    """Seconds in a protobuf Duration string such as ``"4.5s"``, or None."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?)s\s*", duration or "")
+    return float(match.group(1)) if match else None
+
+
+def _audio_bytes(item):
+    kind, payload = item
+    return memoryview(payload).nbytes if kind == "audio" else 0
+
+
+def resumable_config(config, handle=None):
+    """``config`` asking for session resumption, resuming from ``handle`` if given.
+
+    Returns ``config`` itself when it already asks for exactly that, so the
+    pool and setup cache keys of the first connect are unchanged.
+    """
+    resumption = dict(config.get("session_resumption") or {})
+    if handle:
+        resumption["handle"] = handle
+    else:
+        resumption.pop("handle", None)
+    if config.get("session_resumption") == resumption:
+        return config
+    return {**config, "session_resumption": resumption}
+
+
+async def _close_quietly(context):
+    with contextlib.suppress(Exception):
+        await context.__aexit__(None, None, None)
+
+
+class ResilientSession:
+    def __init__(
+        self,
+        connect,
+        model,
+        config,
+        event_log=None,
+        replay_ms=REPLAY_MS,
+        hold_ms=HOLD_MS,
+        max_connection_s=None,
+    ):
+        # client.aio.live.connect, or SessionPool.connect for a warm first connection.
+        self._connect = connect
+        self.model = model
+        self.config = resumable_config(config)
+        self.event_log = event_log
+        self.replay_limit = replay_ms * _AUDIO_BYTES_PER_MS
+        self.hold_limit = hold_ms * _AUDIO_BYTES_PER_MS
+        self.max_connection_s = max_connection_s
+        self.handle = None
+        self.error = None
+        self._context = None
+        self._session = None
+        # Input sent since the handle a new connection would resume from. Audio
+        # entries are byte counts; the audio itself is the newest
+        # ``_replay_audio`` bytes of the ring.
+        self._replay = collections.deque()
+        self._replay_audio = 0
+        self._replay_ring = PcmRingBuffer(replay_ms + REPLAY_READ_MS, REPLAY_READ_MS * _AUDIO_BYTES_PER_MS)
+        # More was sent since the handle than the replay can hold; nothing is replayed.
+        self._replay_overflow = False
+        # Input no connection has taken yet.
+        self._held = collections.deque()
+        self._held_audio = 0
+        self._swapping = False
+        self._lost = False
+        self._lost_in_a_row = 0
+        # A caller or model turn is in progress: no boundary to rotate at.
+        self._in_turn = False
+        # Set at a turn boundary (a resumable handle outside a turn) or once the connection is gone.
+        self._cutover = asyncio.Event()
+        self._rotation = None
+        self._age_timer = None
+        self._closing = set()
+        self.rotations = 0
+        self.reconnects = 0
+        self.go_aways = 0
+        self.handle_updates = 0
+        self.replayed_bytes = 0
+        self.replay_overflows = 0
+        self.dropped_bytes = 0
+        self.max_hold_ms = 0.0
+
+    def _log(self, event, level="info", **fields):
+        if self.event_log:
+            self.event_log.log(event, level, **fields)
+
+    def __getattr__(self, name):
+        # send_client_content, send_tool_response, ... go to the current connection.
+        if name.startswith("_") or self._session is None:
+            raise AttributeError(name)
+        return getattr(self._session, name)
+
+    async def open(self):
+        self._context, self._session = await self._open(self.config)
+        self._connected()
+
+    async def _open(self, config):
+        context = self._connect(model=self.model, config=config)
+        return context, await context.__aenter__()
+
+    def _connected(self):
+        if self._age_timer:
+            self._age_timer.cancel()
+        if self.max_connection_s:
+            self._age_timer = asyncio.get_running_loop().call_later(
+                self.max_connection_s, self._start_rotation, "max_connection_age", TURN_BOUNDARY_WAIT_S
+            )
+
+    async def close(self):
+        if self._age_timer:
+            self._age_timer.cancel()
+        if self._rotation:
+            self._rotation.cancel()
+            await asyncio.gather(self._rotation, return_exceptions=True)
+        await asyncio.gather(*self._closing, return_exceptions=True)
+        if self._context:
+            await _close_quietly(self._context)
+        self._context = self._session = None
+
+    async def send_realtime_audio(self, data):
+        # The caller's buffer goes straight to the connection; only what is
+        # kept for replay, or held during a swap, is copied.
+        await self._send(("audio", data))
+
+    async def send_realtime_input(self, **kwargs):
+        await self._send(("input", kwargs))
+
+    async def _send(self, item):
+        if self.error:
+            raise self.error
+        kind, payload = item
+        if kind == "input" and "activity_start" in payload:
+            self._turn_started()
+        if self._swapping:
+            self._hold(item)
+            return
+        self._remember(item)
+        try:
+            await self._deliver(self._session, item)
+        except ConnectionClosed:
+            # Kept for replay, so the replacement connection gets it.
+            self._start_rotation("connection_lost")
+
+    def _remember(self, item):
+        if self._replay_overflow:
+            return
+        kind, payload = item
+        if kind == "audio":
+            nbytes = _audio_bytes(item)
+            if self._replay_audio + nbytes > self.replay_limit:
+                self._overflow_replay(nbytes)
+                return
+            self._replay_ring.write(payload)
+            item = (kind, nbytes)
+            self._replay_audio += nbytes
+        self._replay.append(item)
+
+    def _overflow_replay(self, nbytes):
+        # Cutting the oldest audio would resume into a truncated utterance.
+        self._log(
+            "replay_overflow",
+            level="warning",
+            replay_ms=(self._replay_audio + nbytes) // _AUDIO_BYTES_PER_MS,
+            replay_limit_ms=self.replay_limit // _AUDIO_BYTES_PER_MS,
+        )
+        self.replay_overflows += 1
+        self._replay_overflow = True
+        self._reset_replay()
+
+    def _reset_replay(self):
+        self._replay.clear()
+        self._replay_audio = 0
+
+    def _replay_items(self):
+        """The remembered input in order, its audio as views of the replay ring."""
+        ring = self._replay_ring
+        ring.read_pos = ring.write_pos - self._replay_audio
+        for kind, payload in list(self._replay):
+            if kind != "audio":
+                yield kind, payload
+                continue
+            while payload:
+                nbytes = min(payload, ring.max_read)
+                view, _ = ring.read(nbytes)
+                yield kind, view
+                payload -= nbytes
+
+    def _hold(self, item):
+        kind, payload = item
+        if kind == "audio":
+            # Outlives the caller's buffer.
+            item = (kind, bytes(payload))
+        self._held.append(item)
+        self._held_audio += _audio_bytes(item)
+        while self._held_audio > self.hold_limit:
+            dropped = _audio_bytes(self._held.popleft())
+            self._held_audio -= dropped
+            self.dropped_bytes += dropped
+
+    @staticmethod
+    async def _deliver(session, item):
+        kind, payload = item
+        if kind == "input":
+            await session.send_realtime_input(**payload)
+        elif send_audio := getattr(session, "send_realtime_audio", None):
+            await send_audio(payload)
+        else:
+            await session.send_realtime_input(audio={"data": bytes(payload), "mime_type": "audio/pcm"})
+
+    def receive(self):
+        return self._receive(lazy=False)
+
+    def receive_lazy(self):
+        return self._receive(lazy=True)
+
+    async def _receive(self, lazy):
+        """One turn of messages, like the SDK's ``receive()``, across connection swaps."""
+        while True:
+            session = self._session
+            receive = getattr(session, "receive_lazy", session.receive) if lazy else session.receive
+            try:
+                async with contextlib.aclosing(receive()) as messages:
+                    async for message in messages:
+                        if session is not self._session:
+                            break
+                        self._inspect(message)
+                        yield message
+                    else:
+                        if session is self._session:
+                            return
+            # The stock SDK reports a closed connection as an APIError with the close code.
+            except (ConnectionClosed, errors.APIError) as e:
+                if session is self._session:
+                    self._connection_lost(e)
+            await self._replaced(session)
+
+    def _connection_lost(self, error):
+        self._lost_in_a_row += 1
+        if self._lost_in_a_row > RECONNECT_ATTEMPTS:
+            self.error = error
+            self._log("session_lost", level="error", reason="connection_lost", error=repr(error))
+            return
+        self._start_rotation("connection_lost")
+
+    async def _replaced(self, session):
+        """Wait until ``session`` is no longer the current connection."""
+        while self._session is session:
+            if self.error:
+                raise self.error
+            if self._rotation is None or self._rotation.done():
+                self._start_rotation("connection_lost")
+            # Shielded: a cancelled receiver must not abandon the swap half way.
+            await asyncio.shield(self._rotation)
+
+    def _turn_started(self):
+        self._in_turn = True
+        if not self._lost:
+            self._cutover.clear()
+
+    def _inspect(self, message):
+        self._lost_in_a_row = 0
+        if getattr(message, "is_audio", False):
+            # Reply audio: the model's turn is streaming.
+            self._turn_started()
+            return
+        content = message.server_content
+        if content:
+            if content.turn_complete:
+                # The boundary is the next resumable handle, which covers this turn.
+                self._in_turn = False
+            elif (
+                content.model_turn
+                or content.input_transcription
+                or content.output_transcription
+                or content.interrupted
+                or content.generation_complete
+            ):
+                self._turn_started()
+        update = message.session_resumption_update
+        # Updates from the old connection are ignored once its replacement is being opened.
+        if update and not self._swapping:
+            if update.resumable and update.new_handle:
+                self.handle = update.new_handle
+                self.handle_updates += 1
+                # The server holds everything sent so far; only newer input needs re-sending.
+                self._reset_replay()
+                self._replay_overflow = False
+                if not self._in_turn:
+                    self._cutover.set()
+            elif not self._lost:
+                self._cutover.clear()
+        if message.go_away:
+            self.go_aways += 1
+            time_left = _seconds(message.go_away.time_left)
+            if time_left is None:
+                time_left = GO_AWAY_TIME_LEFT_S
+            # Usually the turn boundary or the old connection closing comes first.
+            self._start_rotation("go_away", time_left + GO_AWAY_GRACE_S)
+
+    def _start_rotation(self, reason, wait_s=0.0):
+        if reason == "connection_lost":
+            self._lost = True
+            self._cutover.set()
+        if self.error or (self._rotation and not self._rotation.done()):
+            return
+        self._rotation = asyncio.create_task(self._rotate(reason, wait_s))
+
+    async def _rotate(self, reason, wait_s):
+        if not self._lost:
+            # Resume from a turn boundary, so no reply is cut off half way.
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._cutover.wait(), wait_s)
+        self._swapping = True
+        held_since = time.monotonic()
+        old_context = self._context
+        error = None
+        for attempt in range(RECONNECT_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(RECONNECT_BACKOFF_S * 2 ** (attempt - 1))
+            # The last attempt starts over, in case the handle is what fails.
+            handle = self.handle if attempt < RECONNECT_ATTEMPTS - 1 else None
+            try:
+                context, session = await self._open(resumable_config(self.config, handle))
+                break
+            except Exception as e:
+                error = e
+                self._log("session_connect_failed", level="warning", reason=reason, attempt=attempt + 1, error=repr(e))
+        else:
+            self.error = error
+            self._swapping = False
+            self._log("session_lost", level="error", reason=reason, error=repr(error))
+            await _close_quietly(old_context)
+            return
+        connect_ms = (time.monotonic() - held_since) * 1000
+        self._context, self._session = context, session
+        replay_overflow = self._replay_overflow
+        if not handle:
+            # A fresh session has none of the earlier input; nothing to replay into.
+            self._reset_replay()
+            self._replay_overflow = False
+        replayed = self._replay_audio
+        try:
+            for item in self._replay_items():
+                await self._deliver(session, item)
+            while self._held:
+                item = self._held.popleft()
+                self._held_audio -= _audio_bytes(item)
+                self._remember(item)
+                await self._deliver(session, item)
+        except ConnectionClosed:
+            # Already lost again; the receiver notices and starts the next swap.
+            pass
+        hold_ms = (time.monotonic() - held_since) * 1000
+        self._swapping = False
+        self._lost = False
+        # The new connection reports its own boundaries; a turn cut off by a
+        # lost connection is re-sent in the replay and starts over.
+        self._in_turn = False
+        self._cutover.clear()
+        if reason == "connection_lost":
+            self.reconnects += 1
+        else:
+            self.rotations += 1
+        self.replayed_bytes += replayed
+        self.max_hold_ms = max(self.max_hold_ms, hold_ms)
+        timings = getattr(session, "connect_timings", None)
+        self._log(
+            "session_rotated",
+            reason=reason,
+            resumed=bool(handle),
+            connect_ms=connect_ms,
+            hold_ms=hold_ms,
+            replayed_bytes=replayed,
+            replay_overflow=replay_overflow,
+            connect_timings=dataclasses.asdict(timings) if timings else None,
+        )
+        self._connected()
+        # Closing the old connection also ends a receiver still waiting on it.
+        task = asyncio.create_task(_close_quietly(old_context))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def stats(self):
+        return {
+            "rotations": self.rotations,
+            "reconnects": self.reconnects,
+            "go_aways": self.go_aways,
+            "handle_updates": self.handle_updates,
+            "replayed_bytes": self.replayed_bytes,
+            "replay_overflows": self.replay_overflows,
+            "dropped_bytes": self.dropped_bytes,
+            "max_hold_ms": self.max_hold_ms,
+        }
+
+
+@contextlib.asynccontextmanager
+async def resilient_connect(connect, *, model, config, **kwargs):
+    """``connect`` (``client.aio.live.connect`` or ``SessionPool.connect``)
+    yielding a ``ResilientSession``; ``kwargs`` go to its constructor."""
+    session = ResilientSession(connect, model, config, **kwargs)
+    await session.open()
+    try:
+        yield session
+    finally:
+        await session.close()
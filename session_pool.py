@@ -0,0 +1,237 @@
+"""Pool of pre-connected Live sessions, so a new call skips the handshake.
+
+Opening a session runs the whole of ``client.aio.live.connect``: config
+transformation, credentials, the TLS WebSocket connect, the setup message
+and the wait for setupComplete. ``SessionPool`` does that ahead of time in
+the background for each (model, config) registered with ``warm()`` and keeps
+up to ``size`` handshaken sessions ready. ``connect()`` has the same shape as
+``client.aio.live.connect`` and hands out a ready session with a deque pop,
+falling back to a normal connect when the pool is empty or the (model,
+config) is not warmed.
+
+Ready sessions older than ``max_idle_s``, or whose WebSocket has closed, are
+closed and replaced. New connects are rate limited to ``refill_per_s`` (with
+bursts up to ``size``), and back off after failures.
+
+    pool = SessionPool(client, size=4)
+    pool.warm(MODEL, CONFIG)
+    await pool.start()
+    async with pool.connect(model=MODEL, config=CONFIG) as session:
+        ...
+    await pool.close()
+"""
+
+import asyncio
+import collections
+import contextlib
+import json
+import time
+
+POOL_SIZE = 2
+MAX_IDLE_S = 60.0
+REFILL_PER_S = 2.0
+MAX_BACKOFF_S = 30.0
+
+
+def _pool_key(model, config):
+    return model, json.dumps(config, sort_keys=True, default=str)
+
+
+class _PooledSession:
+    __slots__ = ("context", "session", "created", "connect_ms")
+
+    def __init__(self, context, session, created, connect_ms):
+        self.context = context
+        self.session = session
+        self.created = created
+        self.connect_ms = connect_ms
+
+    @property
+    def open(self):
+        ws = getattr(self.session, "_ws", None)
+        return ws is None or getattr(ws, "close_code", None) is None
+
+    async def close(self):
+        with contextlib.suppress(Exception):
+            await self.context.__aexit__(None, None, None)
+
+
+class _Warm:
+    """Ready sessions and refill state for one (model, config)."""
+
+    def __init__(self, model, config, size):
+        self.model = model
+        self.config = config
+        self.size = size
+        self.ready = collections.deque()
+        self.connecting = 0
+        self.tokens = float(size)
+        self.refilled_at = time.monotonic()
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class SessionPool:
+    def __init__(self, client, size=POOL_SIZE, max_idle_s=MAX_IDLE_S, refill_per_s=REFILL_PER_S, event_log=None):
+        self.client = client
+        self.size = size
+        self.max_idle_s = max_idle_s
+        self.refill_per_s = refill_per_s
+        self.event_log = event_log
+        self._pools = {}
+        self._wake = asyncio.Event()
+        self._task = None
+        self._connects = set()
+        self.hits = 0
+        self.misses = 0
+        self.opened = 0
+        self.expired = 0
+        self.closed_remotely = 0
+        self.failed = 0
+
+    def _log(self, event, level="info", **fields):
+        if self.event_log:
+            self.event_log.log(event, level, **fields)
+
+    def warm(self, model, config, size=None):
+        """Keep ``size`` (default: the pool size) sessions ready for ``model``/``config``."""
+        key = _pool_key(model, config)
+        if key not in self._pools:
+            self._pools[key] = _Warm(model, config, self.size if size is None else size)
+        self._wake.set()
+
+    def unwarm(self, model, config):
+        """Stop keeping sessions ready for ``model``/``config`` and close the ready ones."""
+        warm = self._pools.pop(_pool_key(model, config), None)
+        if warm:
+            while warm.ready:
+                self._retire(warm.ready.popleft())
+
+    async def start(self):
+        self._task = asyncio.create_task(self._maintain())
+
+    def claim(self, model, config):
+        """A ready session for ``model``/``config``, or ``None``. Never waits."""
+        warm = self._pools.get(_pool_key(model, config))
+        if warm is None:
+            return None
+        now = time.monotonic()
+        while warm.ready:
+            pooled = warm.ready.popleft()
+            if pooled.open and now - pooled.created < self.max_idle_s:
+                self._wake.set()
+                return pooled
+            # Stale; the maintenance task would have closed it shortly anyway.
+            self._retire(pooled)
+        self._wake.set()
+        return None
+
+    @contextlib.asynccontextmanager
+    async def connect(self, *, model, config=None):
+        """Drop-in for ``client.aio.live.connect`` that prefers a warm session."""
+        pooled = self.claim(model, config)
+        if pooled is None:
+            self.misses += 1
+            async with self.client.aio.live.connect(model=model, config=config) as session:
+                yield session
+            return
+        self.hits += 1
+        try:
+            yield pooled.session
+        finally:
+            await pooled.close()
+
+    def _retire(self, pooled):
+        if pooled.open:
+            self.expired += 1
+        else:
+            self.closed_remotely += 1
+        task = asyncio.create_task(pooled.close())
+        self._connects.add(task)
+        task.add_done_callback(self._connects.discard)
+
+    async def _open(self, warm):
+        started = time.monotonic()
+        context = self.client.aio.live.connect(model=warm.model, config=warm.config)
+        try:
+            session = await context.__aenter__()
+        except Exception as e:
+            self.failed += 1
+            warm.failures += 1
+            warm.retry_at = time.monotonic() + min(MAX_BACKOFF_S, 0.5 * 2 ** warm.failures)
+            self._log("pool_connect_failed", level="warning", model=warm.model, error=repr(e))
+            return
+        finally:
+            warm.connecting -= 1
+            self._wake.set()
+        connect_ms = (time.monotonic() - started) * 1000
+        warm.failures = 0
+        self.opened += 1
+        warm.ready.append(_PooledSession(context, session, time.monotonic(), connect_ms))
+
+    def _refill(self, warm, now):
+        """Start the connects ``warm`` is short of; return when to look again."""
+        # Retire sessions that have idled too long or were closed by the server.
+        if any(now - pooled.created >= self.max_idle_s or not pooled.open for pooled in warm.ready):
+            ready = collections.deque()
+            for pooled in warm.ready:
+                if now - pooled.created >= self.max_idle_s or not pooled.open:
+                    self._retire(pooled)
+                else:
+                    ready.append(pooled)
+            warm.ready = ready
+
+        warm.tokens = min(warm.size, warm.tokens + (now - warm.refilled_at) * self.refill_per_s)
+        warm.refilled_at = now
+        next_check = warm.ready[0].created + self.max_idle_s if warm.ready else now + self.max_idle_s
+        missing = warm.size - len(warm.ready) - warm.connecting
+        if missing <= 0:
+            return next_check
+        if now < warm.retry_at:
+            return min(next_check, warm.retry_at)
+        while missing > 0 and warm.tokens >= 1.0:
+            warm.tokens -= 1.0
+            warm.connecting += 1
+            missing -= 1
+            task = asyncio.create_task(self._open(warm))
+            self._connects.add(task)
+            task.add_done_callback(self._connects.discard)
+        if missing > 0:
+            return min(next_check, now + (1.0 - warm.tokens) / self.refill_per_s)
+        return next_check
+
+    async def _maintain(self):
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            next_check = now + self.max_idle_s
+            for warm in self._pools.values():
+                next_check = min(next_check, self._refill(warm, now))
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), max(0.0, next_check - time.monotonic()))
+
+    async def close(self):
+        """Stop refilling and close every ready session."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        for task in list(self._connects):
+            task.cancel()
+        await asyncio.gather(*self._connects, return_exceptions=True)
+        for warm in self._pools.values():
+            while warm.ready:
+                await warm.ready.popleft().close()
+
+    def stats(self):
+        ready = [pooled for warm in self._pools.values() for pooled in warm.ready]
+        return {
+            "ready": len(ready),
+            "connecting": sum(warm.connecting for warm in self._pools.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "opened": self.opened,
+            "expired": self.expired,
+            "closed_remotely": self.closed_remotely,
+            "failed": self.failed,
+            "connect_ms_avg": sum(p.connect_ms for p in ready) / len(ready) if ready else None,
+        }
@@ -0,0 +1,166 @@
+"""Client-side voice activity detection for manual Live activity signalling.
+
+With ``automatic_activity_detection`` disabled the server no longer decides
+when the caller starts and stops talking; the client sends ``activity_start``
+and ``activity_end`` instead. ``EnergyVad`` classifies capture chunks with
+one numpy pass over fixed analysis frames, tracking an adaptive noise floor.
+``ActivityGate`` adds start/end hysteresis on top of it and turns the capture
+stream into what should go on the uplink: ``ACTIVITY_START``, the audio of
+each utterance (with a short pre-roll so onsets are not clipped) and
+``ACTIVITY_END``. Silence between utterances is not sent at all.
+"""
+
+import collections
+
+import numpy as np
+
+from live_config import SAMPLE_WIDTH, SEND_SAMPLE_RATE
+
+FRAME_MS = 10
+THRESHOLD_DB = -45.0  # dBFS; never call anything quieter than this speech
+NOISE_MARGIN_DB = 12.0  # speech must be this far above the noise floor
+NOISE_RISE_DB = 0.05  # per frame, how fast the floor follows rising noise
+START_MS = 30  # voiced audio needed before activity_start
+END_SILENCE_MS = 250  # unvoiced audio that ends the activity
+PREROLL_MS = 200  # audio from before activity_start sent along with it
+
+# Uplink items besides audio produced by ActivityGate.
+ACTIVITY_START = object()
+ACTIVITY_END = object()
+
+
+def frame_levels_db(samples, frame_samples):
+    """Level in dBFS of each whole ``frame_samples`` frame of int16 ``samples``.
+
+    Input shorter than one frame is measured as a single frame.
+    """
+    frames = len(samples) // frame_samples
+    if not frames:
+        frames, frame_samples = 1, len(samples)
+        if not frame_samples:
+            return np.empty(0, dtype=np.float32)
+    block = samples[:frames * frame_samples].reshape(frames, frame_samples).astype(np.float32)
+    power = np.einsum("ij,ij->i", block, block) / (frame_samples * 32768.0 * 32768.0)
+    return 10.0 * np.log10(np.maximum(power, 1e-12))
+
+
+class EnergyVad:
+    def __init__(
+        self,
+        rate=SEND_SAMPLE_RATE,
+        frame_ms=FRAME_MS,
+        threshold_db=THRESHOLD_DB,
+        noise_margin_db=NOISE_MARGIN_DB,
+        noise_rise_db=NOISE_RISE_DB,
+    ):
+        self.rate = rate
+        self.frame_samples = int(rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.noise_rise_db = noise_rise_db
+        self.noise_floor_db = threshold_db - noise_margin_db
+        self.level_db = -120.0
+
+    def frame_levels(self, pcm):
+        """Return the level in dBFS of each whole analysis frame in ``pcm``."""
+        return frame_levels_db(np.frombuffer(pcm, dtype=np.int16), self.frame_samples)
+
+    def voiced_ms(self, pcm):
+        """Milliseconds of ``pcm`` classified as speech; updates the noise floor."""
+        voiced = 0
+        floor = self.noise_floor_db
+        for level in self.frame_levels(pcm).tolist():
+            if level > self.threshold_db and level > floor + self.noise_margin_db:
+                voiced += 1
+            # Drop straight to quieter levels and creep up towards louder ones:
+            # the pauses inside speech keep the floor near the background noise.
+            floor = level if level < floor else floor + self.noise_rise_db
+            self.level_db = level
+        self.noise_floor_db = floor
+        frame_samples = min(self.frame_samples, len(pcm) // SAMPLE_WIDTH)
+        return voiced * frame_samples * 1000 / self.rate
+
+
+class ActivityGate:
+    def __init__(
+        self,
+        vad=None,
+        start_ms=START_MS,
+        end_silence_ms=END_SILENCE_MS,
+        preroll_ms=PREROLL_MS,
+        rate=SEND_SAMPLE_RATE,
+    ):
+        self.vad = vad or EnergyVad(rate=rate)
+        self.rate = rate
+        self.start_ms = start_ms
+        self.end_silence_ms = end_silence_ms
+        self.preroll_bytes = int(rate * preroll_ms / 1000) * SAMPLE_WIDTH
+        self.active = False
+        self._voiced_ms = 0.0
+        self._silence_ms = 0.0
+        self._preroll = collections.deque()
+        self._preroll_len = 0
+        self.activities = 0
+        self.chunks_in = 0
+        self.chunks_sent = 0
+        self.bytes_skipped = 0
+
+    def feed(self, chunk):
+        """Return the uplink items for one capture chunk, in order.
+
+        Audio items are ``chunk`` itself while active, or one ``bytes`` object
+        holding the pre-roll when an activity starts.
+        """
+        self.chunks_in += 1
+        chunk_ms = len(chunk) * 1000 / (self.rate * SAMPLE_WIDTH)
+        voiced_ms = self.vad.voiced_ms(chunk)
+
+        if self.active:
+            self.chunks_sent += 1
+            if voiced_ms:
+                self._silence_ms = 0.0
+                return (chunk,)
+            self._silence_ms += chunk_ms
+            if self._silence_ms < self.end_silence_ms:
+                return (chunk,)
+            self.active = False
+            self._voiced_ms = 0.0
+            return (chunk, ACTIVITY_END)
+
+        # Idle: hold recent audio back until enough of it is voiced. Capture
+        # chunks may alias a ring buffer, so the pre-roll keeps copies.
+        self._voiced_ms = self._voiced_ms + voiced_ms if voiced_ms else 0.0
+        self._preroll.append(bytes(chunk))
+        self._preroll_len += len(chunk)
+        while self._preroll_len - len(self._preroll[0]) >= self.preroll_bytes:
+            dropped = len(self._preroll.popleft())
+            self._preroll_len -= dropped
+            self.bytes_skipped += dropped
+        if self._voiced_ms < self.start_ms:
+            return ()
+        self.active = True
+        self.activities += 1
+        self._silence_ms = 0.0
+        self.chunks_sent += len(self._preroll)
+        preroll = b"".join(self._preroll)
+        self._preroll.clear()
+        self._preroll_len = 0
+        return (ACTIVITY_START, preroll)
+
+    def flush(self):
+        """Return the items that close an activity still open at end of input."""
+        self._preroll.clear()
+        self._preroll_len = 0
+        if not self.active:
+            return ()
+        self.active = False
+        return (ACTIVITY_END,)
+
+    def stats(self):
+        return {
+            "activities": self.activities,
+            "chunks_in": self.chunks_in,
+            "chunks_sent": self.chunks_sent,
+            "bytes_skipped": self.bytes_skipped,
+            "noise_floor_db": self.vad.noise_floor_db,
+        }